@@ -0,0 +1,56 @@
+"""
+Benchmarks of the power calculation for ensemble forecasts.
+"""
+import numpy as np
+import pandas as pd
+
+
+from solarforecastarbiter import datamodel, pvmodel
+
+
+class IrradianceToPowerEnsemble:
+    """irradiance_to_power for a 21 member ensemble, like the GEFS, either
+    one member at a time or all at once."""
+    params = ['fixed', 'single_axis']
+    param_names = ['system']
+
+    def setup(self, system):
+        latitude, longitude, elevation = 32.2, -110.9, 700.
+        times = pd.date_range('20190515', freq='1h', periods=24 * 16,
+                              tz='UTC')
+        self.solpos = pvmodel.calculate_solar_position(
+            latitude, longitude, elevation, times)
+        cs = pvmodel.calculate_clearsky(
+            latitude, longitude, elevation, self.solpos['apparent_zenith'])
+        scale = pd.DataFrame(
+            np.random.default_rng(0).uniform(0.2, 1., (len(times), 21)),
+            index=times)
+        self.irrad = [scale.mul(cs[k], axis=0) for k in ('ghi', 'dni', 'dhi')]
+        self.temp_air = scale * 20 + 5
+        self.wind_speed = scale * 5
+        if system == 'fixed':
+            self.modeling_parameters = datamodel.FixedTiltModelingParameters(
+                ac_capacity=10, dc_capacity=12, temperature_coefficient=-0.4,
+                dc_loss_factor=0, ac_loss_factor=0, surface_tilt=30,
+                surface_azimuth=180)
+        else:
+            self.modeling_parameters = datamodel.SingleAxisModelingParameters(
+                ac_capacity=10, dc_capacity=12, temperature_coefficient=-0.4,
+                dc_loss_factor=0, ac_loss_factor=0, axis_tilt=0,
+                axis_azimuth=0, ground_coverage_ratio=2 / 7, backtrack=True,
+                max_rotation_angle=45)
+
+    def time_per_member(self, system):
+        pd.DataFrame({
+            col: pvmodel.irradiance_to_power(
+                self.modeling_parameters, self.solpos['apparent_zenith'],
+                self.solpos['azimuth'], *(fx[col] for fx in self.irrad),
+                temp_air=self.temp_air[col],
+                wind_speed=self.wind_speed[col])
+            for col in self.irrad[0].columns})
+
+    def time_broadcast(self, system):
+        pvmodel.irradiance_to_power(
+            self.modeling_parameters, self.solpos['apparent_zenith'],
+            self.solpos['azimuth'], *self.irrad, temp_air=self.temp_air,
+            wind_speed=self.wind_speed)
@@ -0,0 +1,47 @@
+"""
+Benchmarks of the solar position algorithms and their accuracy relative
+to NREL SPA.
+"""
+import pandas as pd
+
+
+from solarforecastarbiter import pvmodel
+
+
+LATITUDE, LONGITUDE, ELEVATION = 32.2, -110.9, 700.
+
+
+class SolarPosition:
+    """Solar position of 30 days at 1 minute resolution, as used for
+    validation of interval average observations."""
+    params = list(pvmodel.SOLAR_POSITION_METHODS)
+    param_names = ['method']
+
+    def setup(self, method):
+        self.times = pd.date_range('20190601', freq='1min',
+                                   periods=30 * 1440, tz='UTC')
+
+    def time_calculate_solar_position(self, method):
+        pvmodel.calculate_solar_position(LATITUDE, LONGITUDE, ELEVATION,
+                                         self.times, method=method)
+
+
+class SolarPositionAccuracy:
+    """Maximum absolute difference in degrees from NREL SPA over a year
+    at 10 minute resolution."""
+    params = ['zenith', 'apparent_zenith', 'azimuth']
+    param_names = ['column']
+    unit = 'degrees'
+
+    def setup_cache(self):
+        times = pd.date_range('20190101', '20200101', freq='10min',
+                              tz='UTC')
+        return {method: pvmodel.calculate_solar_position(
+            LATITUDE, LONGITUDE, ELEVATION, times, method=method)
+            for method in pvmodel.SOLAR_POSITION_METHODS}
+
+    def track_ephemeris_max_difference(self, solpos, column):
+        diff = solpos['ephemeris'][column] - solpos['nrel_numpy'][column]
+        if column == 'azimuth':
+            diff = (diff + 180) % 360 - 180
+        return float(diff.abs().max())
@@ -139,9 +139,16 @@ def cli():
     '--only-missing/--not-only-missing',
     is_flag=True, default=True,
     help='Only apply validation to periods where daily validation is missing')
+@click.option(
+    '--by-day/--not-by-day',
+    is_flag=True, default=False,
+    help='Fetch, validate, and post the data one day at a time')
+@click.option('--workers', type=int, default=1, show_default=True,
+              help=('Number of processes to validate all observations '
+                    'with when no OBSERVATION_ID is given'))
 @click.argument('observation_id', nargs=-1)
 def validate(verbose, user, password, start, end, base_url,
-             only_missing, observation_id):
+             only_missing, by_day, workers, observation_id):
     """
     Run the validation tasks for a given set of observations
     """
@@ -153,7 +160,7 @@ def validate(verbose, user, password, start, end, base_url,
              'observations'), start, end)
         validation_tasks.fetch_and_validate_all_observations(
             token, start, end, only_missing=only_missing,
-            base_url=base_url)
+            base_url=base_url, by_day=by_day, max_workers=workers)
     else:
         logger.info(
             ('Validating observation data from %s to %s for '
@@ -161,7 +168,7 @@ def validate(verbose, user, password, start, end, base_url,
         for obsid in observation_id:
             validation_tasks.fetch_and_validate_observation(
                 token, obsid, start, end, only_missing=only_missing,
-                base_url=base_url)
+                base_url=base_url, by_day=by_day)
 
 
 @cli.group(help=reference_data.CLI_DESCRIPTION)
@@ -244,11 +251,30 @@ def referenceaggregates(verbose, user, password, base_url, provider):
               help='Only convert files at save_directory to netcdf')
 @click.option('--workers', type=int, default=1,
               help='Number of worker processes')
+@click.option('--site-file', type=click.Path(
+    exists=True, resolve_path=True, dir_okay=False),
+              help=('CSV file with latitude and longitude columns of sites '
+                    'to extract time-series for after each model run'))
+@click.option('--sites-from-api', is_flag=True,
+              help=('Extract time-series after each model run for the '
+                    'sites available from the API to --user. The sites '
+                    'are requested again for every model run'))
+@click.option('-u', '--user', show_envvar=True, envvar='SFA_API_USER',
+              help='Username to access API. Only used with --sites-from-api')
+@click.option('-p', '--password', show_envvar=True,
+              envvar='SFA_API_PASSWORD',
+              help='Password to access API. Only used with --sites-from-api')
+@click.option('--base-url', show_default=True,
+              envvar='SFA_API_BASE_URL',
+              show_envvar=True,
+              default='https://api.solarforecastarbiter.org',
+              help='URL of the SolarForecastArbiter API')
 @click.argument('save_directory', type=click.Path(
     exists=True, writable=True, resolve_path=True, file_okay=False))
 @click.argument('model', type=click.Choice([
     'gfs_0p25', 'nam_12km', 'rap', 'hrrr_hourly', 'hrrr_subhourly', 'gefs']))
 def fetchnwp(verbose, chunksize, once, use_tmp, netcdf_only, workers,
+             site_file, sites_from_api, user, password, base_url,
              save_directory, model):
     """
     Retrieve weather forecasts with variables relevant to solar power
@@ -260,6 +286,25 @@ def fetchnwp(verbose, chunksize, once, use_tmp, netcdf_only, workers,
     nwp.check_wgrib2()
     update_num_workers(workers)
     basepath = Path(save_directory)
+    file_sites = []
+    if site_file is not None:
+        file_sites = nwp.load_sites(site_file)
+    sites = file_sites or None
+    if sites_from_api:
+        if user is None or password is None:
+            logger.error('--user and --password are required with '
+                         '--sites-from-api')
+            sys.exit(1)
+        # check the credentials before starting
+        cli_access_token(user, password)
+
+        def sites():
+            # a new token each time since the daemon outlives a token
+            token = request_cli_access_token(user, password)
+            session = APISession(token, base_url=base_url)
+            api_sites = [(site.latitude, site.longitude)
+                         for site in session.list_sites()]
+            return list(dict.fromkeys(file_sites + api_sites))
     if netcdf_only:
         path_to_files = basepath
         if (
@@ -269,11 +314,12 @@ def fetchnwp(verbose, chunksize, once, use_tmp, netcdf_only, workers,
             logger.error('%s is not a valid directory with grib files',
                          path_to_files)
             sys.exit(1)
-        fut = asyncio.ensure_future(nwp.optimize_only(path_to_files, model))
+        fut = asyncio.ensure_future(nwp.optimize_only(path_to_files, model,
+                                                      sites))
     else:
         logger.info('Fetching NWP forecasts for %s', model)
         fut = asyncio.ensure_future(nwp.run(basepath, model, chunksize,
-                                            once, use_tmp))
+                                            once, use_tmp, sites))
 
     loop = asyncio.get_event_loop()
 
@@ -310,15 +356,20 @@ itbuffer = click.option('--issue-time-buffer', type=str,
 nwpdir = click.argument('nwp_directory', type=click.Path(
     exists=True, resolve_path=True, file_okay=False),
                         required=False)
+nwpworkers = click.option('--workers', type=int, default=1,
+                          show_default=True,
+                          help=('Number of processes to compute forecast '
+                                'groups with'))
 
 
 @ref_nwp.command(name='latest')
 @common_options
 @run_time
 @itbuffer
+@nwpworkers
 @nwpdir
 def refnwp_latest(verbose, user, password, base_url, run_time,
-                  issue_time_buffer, nwp_directory):
+                  issue_time_buffer, workers, nwp_directory):
 
     """
     Make the reference NWP forecasts that should be issued around run_time
@@ -328,7 +379,7 @@ def refnwp_latest(verbose, user, password, base_url, run_time,
     issue_buffer = pd.Timedelta(issue_time_buffer)
     nwp.set_base_path(nwp_directory)
     reference_forecasts.make_latest_nwp_forecasts(
-        token, run_time, issue_buffer, base_url)
+        token, run_time, issue_buffer, base_url, max_workers=workers)
 
 
 fxstart = click.option('--start', show_default='00:00:00 Yesterday (UTC)',
@@ -345,14 +396,16 @@ fxend = click.option('--end', default=lambda: midnight,
 @common_options
 @fxstart
 @fxend
+@nwpworkers
 @nwpdir
-def refnwp_fill(verbose, user, password, base_url, start, end,
+def refnwp_fill(verbose, user, password, base_url, start, end, workers,
                 nwp_directory):
     """Fill in any missing NWP forecasts from start to end"""
     set_log_level(verbose)
     token = cli_access_token(user, password)
     nwp.set_base_path(nwp_directory)
-    reference_forecasts.fill_nwp_forecast_gaps(token, start, end, base_url)
+    reference_forecasts.fill_nwp_forecast_gaps(token, start, end, base_url,
+                                               max_workers=workers)
 
 
 @referencefx.group(name='persistence', help='Make persistence forecasts')
@@ -408,9 +461,10 @@ def refpers_fill(verbose, user, password, base_url, start, end,
 @common_options
 @run_time
 @itbuffer
+@nwpworkers
 @nwpdir
 def referencenwp(verbose, user, password, base_url, run_time,
-                 issue_time_buffer, nwp_directory):
+                 issue_time_buffer, workers, nwp_directory):
     """
     Make the reference NWP forecasts that should be issued around run_time
     """
@@ -419,7 +473,7 @@ def referencenwp(verbose, user, password, base_url, run_time,
     issue_buffer = pd.Timedelta(issue_time_buffer)
     nwp.set_base_path(nwp_directory)
     reference_forecasts.make_latest_nwp_forecasts(
-        token, run_time, issue_buffer, base_url)
+        token, run_time, issue_buffer, base_url, max_workers=workers)
 
 
 @cli.command()
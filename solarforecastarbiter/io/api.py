@@ -1,9 +1,15 @@
 """
 Functions to connect to and process data from SolarForecastArbiter API
 """
+import codecs
+from concurrent.futures import ThreadPoolExecutor
 import datetime as dt
+from functools import wraps
+from inspect import signature
 import json
 import logging
+import threading
+import time
 
 
 import requests
@@ -19,6 +25,11 @@ from solarforecastarbiter.io.utils import (
     json_payload_to_forecast_series,
     observation_df_to_json_payload,
     forecast_object_to_json,
+    observation_df_to_packed_payload,
+    forecast_object_to_packed_payload,
+    packed_payload_to_dict,
+    iter_json_payload_batches,
+    PACKED_VALUES_MIMETYPE,
     adjust_timeseries_for_interval_label,
     serialize_timeseries,
     HiddenToken, ensure_timestamps,
@@ -32,6 +43,10 @@ logger = logging.getLogger(__name__)
 # to break up large requests into smaller requests to avoid timeout.
 GET_VALUES_LIMIT = '365D'
 
+# Seconds to cache metadata in sessions used by automated tasks that
+# list and get the same objects many times in a run
+TASK_METADATA_TTL = 600
+
 
 def request_cli_access_token(user, password, **kwargs):
     """Request an API access token from Auth0.
@@ -62,6 +77,124 @@ def request_cli_access_token(user, password, **kwargs):
     return req.json()['access_token']
 
 
+class MetadataCache:
+    """
+    Time-to-live cache of the metadata objects, e.g. sites and
+    observations, retrieved by an :py:class:`APISession`. Objects are
+    stored by kind and id along with the complete list of objects of
+    each kind.
+
+    Parameters
+    ----------
+    ttl : float
+        Number of seconds objects remain valid after they are retrieved
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # kind -> (expiration, {id: object})
+        self._lists = {}
+        # (kind, id) -> (expiration, object)
+        self._objects = {}
+
+    def _valid(self, entry):
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, kind, id_):
+        """Get the object of kind with id_ or None if not cached"""
+        with self._lock:
+            entry = self._objects.get((kind, id_))
+            if self._valid(entry):
+                return entry[1]
+            list_entry = self._lists.get(kind)
+            if self._valid(list_entry):
+                return list_entry[1].get(id_)
+        return None
+
+    def get_list(self, kind):
+        """Get the list of all objects of kind or None if not cached"""
+        with self._lock:
+            entry = self._lists.get(kind)
+            if self._valid(entry):
+                return list(entry[1].values())
+        return None
+
+    def put(self, kind, id_, obj):
+        """Store obj of kind and add it to the list of kind if cached"""
+        with self._lock:
+            self._objects[(kind, id_)] = (time.monotonic() + self.ttl, obj)
+            if self._valid(self._lists.get(kind)):
+                self._lists[kind][1][id_] = obj
+
+    def put_list(self, kind, objs, id_attr):
+        """Store the list of all objects of kind"""
+        with self._lock:
+            self._lists[kind] = (time.monotonic() + self.ttl,
+                                 {getattr(obj, id_attr): obj for obj in objs})
+
+    def invalidate(self, kind=None):
+        """Remove all objects of kind, or all objects if kind is None"""
+        with self._lock:
+            if kind is None:
+                self._lists.clear()
+                self._objects.clear()
+            else:
+                self._lists.pop(kind, None)
+                self._objects = {k: v for k, v in self._objects.items()
+                                 if k[0] != kind}
+
+
+def _cache_get(kind):
+    """Decorator to use the metadata cache of the session for a
+    get method that takes the object id"""
+    def decorator(f):
+        sig = signature(f)
+
+        @wraps(f)
+        def wrapper(self, *args, **kwargs):
+            if self.metadata_cache is None:
+                return f(self, *args, **kwargs)
+            id_ = sig.bind(self, *args, **kwargs).args[1]
+            obj = self.metadata_cache.get(kind, id_)
+            if obj is None:
+                obj = f(self, *args, **kwargs)
+                self.metadata_cache.put(kind, id_, obj)
+            return obj
+        return wrapper
+    return decorator
+
+
+def _cache_list(kind, id_attr):
+    """Decorator to use the metadata cache of the session for a
+    list method"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(self):
+            if self.metadata_cache is None:
+                return f(self)
+            objs = self.metadata_cache.get_list(kind)
+            if objs is None:
+                objs = f(self)
+                self.metadata_cache.put_list(kind, objs, id_attr)
+            return objs
+        return wrapper
+    return decorator
+
+
+def _cache_create(kind, id_attr):
+    """Decorator to add objects returned by a create method to the
+    metadata cache of the session"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(self, *args, **kwargs):
+            new = f(self, *args, **kwargs)
+            if self.metadata_cache is not None:
+                self.metadata_cache.put(kind, getattr(new, id_attr), new)
+            return new
+        return wrapper
+    return decorator
+
+
 class APISession(requests.Session):
     """
     Subclass of requests.Session to handle requets to the SolarForecastArbiter
@@ -80,6 +213,28 @@ class APISession(requests.Session):
         server.
     base_url : string
         URL to use as the base for endpoints to APISession
+    max_workers : int, default 1
+        Maximum number of requests to make concurrently when retrieving
+        values that must be split into multiple requests by
+        `request_limit`. The default of 1 makes the requests serially.
+    packed_values : bool, default False
+        If True, request and post time series values in the packed binary
+        format described by :py:data:`io.utils.PACKED_VALUES_MIMETYPE`
+        instead of JSON. JSON is still used when the API does not support
+        the packed format.
+    stream_batch_size : int or None, default None
+        If set, JSON responses with time series values are streamed and
+        parsed incrementally in batches of this many values to limit the
+        memory needed for large requests.
+    metadata_ttl : float or None, default None
+        If set, cache the metadata of sites, observations, forecasts,
+        probabilistic forecasts, and aggregates for this many seconds.
+        Objects created through this session are added to the cache.
+    value_cache : io.cache.ValueCache or None, default None
+        If set, time series values are read from this local cache and only
+        the ranges missing from the cache are requested from the API.
+        Values posted through this session invalidate the affected days
+        of the cache.
 
     Notes
     -----
@@ -98,7 +253,9 @@ class APISession(requests.Session):
     """
 
     def __init__(self, access_token, default_timeout=(10, 60),
-                 base_url=None):
+                 base_url=None, max_workers=1, packed_values=False,
+                 stream_batch_size=None, metadata_ttl=None,
+                 value_cache=None):
         super().__init__()
         if isinstance(access_token, HiddenToken):
             access_token = access_token.token
@@ -107,6 +264,19 @@ class APISession(requests.Session):
                         'Accept-Encoding': 'gzip,deflate'}
         self.default_timeout = default_timeout
         self.base_url = base_url or BASE_URL
+        self.max_workers = max_workers
+        # marks the threads of get_values_bulk, whose objects are already
+        # requested concurrently
+        self._bulk_worker = threading.local()
+        self.packed_values = packed_values
+        self.stream_batch_size = stream_batch_size
+        self.value_cache = value_cache
+        if metadata_ttl is None:
+            self.metadata_cache = None
+        else:
+            self.metadata_cache = MetadataCache(metadata_ttl)
+        # set to False if the API rejects a packed payload
+        self._post_packed_values = packed_values
         # set requests to automatically retry
         retries = Retry(total=10, connect=3, read=3, status=3,
                         status_forcelist=[408, 423, 444, 500, 501, 502, 503,
@@ -114,7 +284,10 @@ class APISession(requests.Session):
                         backoff_factor=0.5,
                         raise_on_status=False,
                         remove_headers_on_redirect=[])
-        adapter = requests.adapters.HTTPAdapter(max_retries=retries)
+        # make sure the connection pool can serve each concurrent request
+        adapter = requests.adapters.HTTPAdapter(
+            max_retries=retries,
+            pool_maxsize=max(requests.adapters.DEFAULT_POOLSIZE, max_workers))
         self.mount(self.base_url, adapter)
 
     def request(self, method, url, *args, **kwargs):
@@ -154,6 +327,7 @@ class APISession(requests.Session):
         else:
             return datamodel.Site.from_dict(site_dict)
 
+    @_cache_get('sites')
     def get_site(self, site_id):
         """
         Retrieve site metadata for site_id from the API and process
@@ -174,6 +348,7 @@ class APISession(requests.Session):
         site_dict = req.json()
         return self._process_site_dict(site_dict)
 
+    @_cache_list('sites', 'site_id')
     def list_sites(self):
         """
         List all the sites available to a user.
@@ -221,6 +396,7 @@ class APISession(requests.Session):
                                'longitude': longitude})
         return [r['name'] for r in req.json()]
 
+    @_cache_create('sites', 'site_id')
     def create_site(self, site):
         """
         Create a new site in the API with the given Site model
@@ -244,6 +420,7 @@ class APISession(requests.Session):
         new_id = req.text
         return self.get_site(new_id)
 
+    @_cache_get('observations')
     def get_observation(self, observation_id):
         """
         Get the metadata from the API for the a given observation_id
@@ -264,6 +441,7 @@ class APISession(requests.Session):
         obs_dict['site'] = site
         return datamodel.Observation.from_dict(obs_dict)
 
+    @_cache_list('observations', 'observation_id')
     def list_observations(self):
         """
         List the observations a user has access to.
@@ -285,6 +463,7 @@ class APISession(requests.Session):
             out.append(datamodel.Observation.from_dict(obs_dict))
         return out
 
+    @_cache_create('observations', 'observation_id')
     def create_observation(self, observation):
         """
         Create a new observation in the API with the given Observation model
@@ -325,6 +504,7 @@ class APISession(requests.Session):
         else:
             return datamodel.Forecast.from_dict(fx_dict)
 
+    @_cache_get('forecasts')
     def get_forecast(self, forecast_id):
         """
         Get Forecast metadata from the API for the given forecast_id
@@ -342,6 +522,7 @@ class APISession(requests.Session):
         fx_dict = req.json()
         return self._process_fx(fx_dict)
 
+    @_cache_list('forecasts', 'forecast_id')
     def list_forecasts(self):
         """
         List all Forecasts a user has access to.
@@ -362,6 +543,7 @@ class APISession(requests.Session):
             out.append(self._process_fx(fx_dict, sites=sites))
         return out
 
+    @_cache_create('forecasts', 'forecast_id')
     def create_forecast(self, forecast):
         """
         Create a new forecast in the API with the given Forecast model
@@ -413,6 +595,7 @@ class APISession(requests.Session):
         fx_dict['constant_values'] = cvs
         return datamodel.ProbabilisticForecast.from_dict(fx_dict)
 
+    @_cache_list('probabilistic_forecasts', 'forecast_id')
     def list_probabilistic_forecasts(self):
         """
         List all ProbabilisticForecasts a user has access to.
@@ -433,6 +616,7 @@ class APISession(requests.Session):
             out.append(self._process_prob_forecast(fx_dict, sites))
         return out
 
+    @_cache_get('probabilistic_forecasts')
     def get_probabilistic_forecast(self, forecast_id):
         """
         Get ProbabilisticForecast metadata from the API for the given
@@ -508,6 +692,7 @@ class APISession(requests.Session):
             fx_dict['aggregate'] = aggregate
         return datamodel.ProbabilisticForecastConstantValue.from_dict(fx_dict)
 
+    @_cache_create('probabilistic_forecasts', 'forecast_id')
     def create_probabilistic_forecast(self, forecast):
         """
         Create a new forecast in the API with the given
@@ -1018,10 +1203,10 @@ class APISession(requests.Session):
             Parameters passed through POST request. Types are the same as
             Requests <https://2.python-requests.org/en/master/api/#requests.Request>
         """  # NOQA
-        json_vals = observation_df_to_json_payload(observation_df)
-        self.post(f'/observations/{observation_id}/values',
-                  data=json_vals, params=params,
-                  headers={'Content-Type': 'application/json'})
+        self._post_values(
+            f'/observations/{observation_id}/values', observation_df,
+            observation_df_to_json_payload, observation_df_to_packed_payload,
+            params=params)
 
     def post_forecast_values(self, forecast_id, forecast_series):
         """
@@ -1036,10 +1221,9 @@ class APISession(requests.Session):
             Pandas series with a datetime index that contains the values to
             upload to the API
         """
-        json_vals = forecast_object_to_json(forecast_series)
-        self.post(f'/forecasts/single/{forecast_id}/values',
-                  data=json_vals,
-                  headers={'Content-Type': 'application/json'})
+        self._post_values(
+            f'/forecasts/single/{forecast_id}/values', forecast_series,
+            forecast_object_to_json, forecast_object_to_packed_payload)
 
     def post_probabilistic_forecast_constant_value_values(self, forecast_id,
                                                           forecast_series):
@@ -1055,9 +1239,42 @@ class APISession(requests.Session):
             Pandas series with a datetime index that contains the values to
             upload to the API
         """
-        json_vals = forecast_object_to_json(forecast_series)
-        self.post(f'/forecasts/cdf/single/{forecast_id}/values',
-                  data=json_vals,
+        self._post_values(
+            f'/forecasts/cdf/single/{forecast_id}/values', forecast_series,
+            forecast_object_to_json, forecast_object_to_packed_payload)
+
+    def _post_values(self, api_path, data, json_fn, packed_fn, params=None):
+        """Post time series values in the packed format if enabled and
+        supported by the API, otherwise as JSON.
+
+        Parameters
+        ----------
+        api_path : str
+        data : pandas.Series or pandas.DataFrame
+        json_fn : function
+            Converts data into a JSON payload
+        packed_fn : function
+            Converts data into a packed binary payload
+        params : dict, list, string, default None
+            Parameters passed through POST request.
+        """
+        if self.value_cache is not None and len(data) > 0:
+            self.value_cache.invalidate(
+                api_path, data.index.min(), data.index.max())
+        if self._post_packed_values:
+            try:
+                self.post(api_path, data=packed_fn(data), params=params,
+                          headers={'Content-Type': PACKED_VALUES_MIMETYPE})
+            except requests.exceptions.HTTPError as e:
+                # 415 Unsupported Media Type
+                if e.response.status_code != 415:
+                    raise
+                logger.info('API does not support packed values, '
+                            'falling back to JSON')
+                self._post_packed_values = False
+            else:
+                return
+        self.post(api_path, data=json_fn(data), params=params,
                   headers={'Content-Type': 'application/json'})
 
     def process_report_dict(self, rep_dict):
@@ -1320,6 +1537,7 @@ class APISession(requests.Session):
         """
         self.post(f'/reports/{report_id}/status/{status}')
 
+    @_cache_get('aggregates')
     def get_aggregate(self, aggregate_id):
         """
         Get Aggregate metadata from the API for the given aggregate_id
@@ -1339,6 +1557,7 @@ class APISession(requests.Session):
             o['observation'] = self.get_observation(o['observation_id'])
         return datamodel.Aggregate.from_dict(agg_dict)
 
+    @_cache_list('aggregates', 'aggregate_id')
     def list_aggregates(self):
         """
         List all Aggregates a user has access to.
@@ -1362,6 +1581,7 @@ class APISession(requests.Session):
             out.append(datamodel.Aggregate.from_dict(agg_dict))
         return out
 
+    @_cache_create('aggregates', 'aggregate_id')
     def create_aggregate(self, aggregate):
         """
         Create a new aggregate in the API with the given Aggregate model
@@ -1496,6 +1716,74 @@ class APISession(requests.Session):
         return f(obj_id, start, end, interval_label=interval_label,
                  request_limit=request_limit)
 
+    @ensure_timestamps('start', 'end')
+    def get_values_bulk(self, objects, start, end, interval_label=None,
+                        request_limit=GET_VALUES_LIMIT, max_workers=None):
+        """
+        Get time series values from start to end for many objects from the
+        API, making the requests for different objects concurrently.
+
+        Parameters
+        ----------
+        objects : iterable
+            Of datamodel.Observation, datamodel.Aggregate,
+            datamodel.Forecast, datamodel.ProbabilisticForecast, or
+            datamodel.ProbabilisticForecastConstantValue. Values are only
+            retrieved once for repeated objects.
+        start : timelike object
+            Start time in interval to retrieve values for
+        end : timelike object
+            End time of the interval
+        interval_label : str or None
+            If beginning or ending, return only data that is
+            valid between start and end. If None, return any data
+            between start and end inclusive of the endpoints.
+        request_limit : string
+            Timedelta string describing maximum request length. Defaults to 365
+            days.
+        max_workers : int or None
+            Maximum number of objects to retrieve values for concurrently.
+            If None, use the `max_workers` of the session. When objects are
+            retrieved concurrently, the requests for each object are made
+            serially so that at most max_workers requests are open at once.
+
+        Returns
+        -------
+        dict
+            With the objects as keys and the pandas.Series or
+            pandas.DataFrame returned by
+            :py:meth:`~.APISession.get_values` as values
+
+        Raises
+        ------
+        ValueError
+            If start or end cannot be converted into a Pandas Timestamp
+        """
+        if max_workers is None:
+            max_workers = self.max_workers
+        # dict preserves order while removing duplicates
+        objects = list(dict.fromkeys(objects))
+
+        def _get(obj):
+            return self.get_values(obj, start, end,
+                                   interval_label=interval_label,
+                                   request_limit=request_limit)
+
+        def _get_in_worker(obj):
+            self._bulk_worker.active = True
+            try:
+                return _get(obj)
+            finally:
+                self._bulk_worker.active = False
+
+        if max_workers > 1 and len(objects) > 1:
+            with ThreadPoolExecutor(
+                    max_workers=min(max_workers, len(objects))) as executor:
+                values = list(executor.map(_get_in_worker, objects))
+        else:
+            values = [_get(obj) for obj in objects]
+        return dict(zip(objects, values))
+
     @ensure_timestamps('start', 'end')
     def get_value_gaps(self, obj, start, end):
         """
@@ -1580,7 +1868,7 @@ class APISession(requests.Session):
 
     def chunk_value_requests(
             self, api_path, start, end, parse_fn, params={},
-            request_limit=GET_VALUES_LIMIT):
+            request_limit=GET_VALUES_LIMIT, max_workers=None):
         """Breaks up a get requests for values into multiple requests limited
         by the request_limit argument.
 
@@ -1590,42 +1878,115 @@ class APISession(requests.Session):
         start : pandas.Timestamp
         end : pandas.Timestamp
         parse_fn : function
-            A function used to parse json api response into a pandas Series
-            or DataFrame.
+            A function used to parse the api response payload dict into a
+            pandas Series or DataFrame. If the response is in the packed
+            format, the "values" of the payload is already a DataFrame.
         params : dict
             Any additional parameters to be passed with the get function.
         request_limit : string
             Timedelta string describing maximum request length. Defaults to 365
             days.
+        max_workers : int or None
+            Maximum number of requests to make concurrently. If None, use
+            the `max_workers` of the session.
 
         Returns
         -------
         all_data: pandas.DataFrame or pandas.Series
             The concatenated results of each request when parsed by parse_fn.
         """
-        data_objects = []
-        request_start = start
-        if end - start.tz_convert(end.tz) > pd.Timedelta(request_limit):
-            # Recurse toward the beginning of the requested period to avoid
-            # needing to sort the result.
-            request_start = end - pd.Timedelta(request_limit)
-            data_objects.append(
-                self.chunk_value_requests(
-                    api_path,
-                    start,
-                    request_start,
-                    parse_fn=parse_fn,
-                    params=params,
-                    request_limit=request_limit,
-                )
-            )
-        # Request the remaining data, period < = request_limit
-        parameters = {'start': request_start, 'end': end}
-        parameters.update(params)
-        req = self.get(api_path, params=parameters)
-        data_objects.append(parse_fn(req.json()))
+        if self.value_cache is not None and not params:
+            def _fetch(fetch_start, fetch_end):
+                return self._request_values(
+                    api_path, fetch_start, fetch_end, parse_fn, params,
+                    request_limit, max_workers)
+            return self.value_cache.get_values(
+                api_path, start, end, _fetch, parse_fn)
+        return self._request_values(api_path, start, end, parse_fn, params,
+                                    request_limit, max_workers)
+
+    def _request_values(self, api_path, start, end, parse_fn, params,
+                        request_limit, max_workers):
+        """Request values from the API in windows of request_limit"""
+        if max_workers is None:
+            # avoid nesting thread pools in get_values_bulk, which would
+            # open up to max_workers**2 connections
+            if getattr(self._bulk_worker, 'active', False):
+                max_workers = 1
+            else:
+                max_workers = self.max_workers
+        windows = _split_request_range(start, end, request_limit)
+
+        if self.packed_values:
+            # the API may ignore the packed type and respond with JSON
+            headers = {'Accept': f'{PACKED_VALUES_MIMETYPE}, '
+                                 'application/json;q=0.9'}
+        else:
+            headers = None
+
+        def _get_window(window):
+            parameters = {'start': window[0], 'end': window[1]}
+            parameters.update(params)
+            stream = self.stream_batch_size is not None
+            with self.get(api_path, params=parameters, headers=headers,
+                          stream=stream) as req:
+                if req.headers.get('Content-Type', '').startswith(
+                        PACKED_VALUES_MIMETYPE):
+                    return parse_fn(packed_payload_to_dict(req.content))
+                elif stream:
+                    return self._parse_streamed_values(req, parse_fn)
+                else:
+                    return parse_fn(req.json())
+
+        if max_workers > 1 and len(windows) > 1:
+            with ThreadPoolExecutor(
+                    max_workers=min(max_workers, len(windows))) as executor:
+                # map returns results in the order of windows
+                data_objects = list(executor.map(_get_window, windows))
+        else:
+            data_objects = [_get_window(window) for window in windows]
         all_data = pd.concat(data_objects)
 
         # drop duplicate indices
         all_data = all_data[~all_data.index.duplicated(keep='first')]
         return all_data
+
+    def _parse_streamed_values(self, req, parse_fn):
+        """Parse the values of a streamed JSON response in batches of
+        stream_batch_size values with parse_fn"""
+        # 64 KiB reads, decoded incrementally in case a multi-byte
+        # character is split between reads
+        chunks = codecs.iterdecode(req.iter_content(chunk_size=65536),
+                                   req.encoding or 'utf-8')
+        batches = [
+            parse_fn(payload) for payload in iter_json_payload_batches(
+                chunks, self.stream_batch_size)]
+        return pd.concat(batches)
+
+
+def _split_request_range(start, end, request_limit):
+    """Split the period from start to end into consecutive windows that
+    are no longer than request_limit. Windows are aligned to end and
+    ordered from earliest to latest so that the results of each request
+    can be concatenated without sorting.
+
+    Parameters
+    ----------
+    start : pandas.Timestamp
+    end : pandas.Timestamp
+    request_limit : string
+        Timedelta string describing maximum request length.
+
+    Returns
+    -------
+    list of (pandas.Timestamp, pandas.Timestamp)
+    """
+    limit = pd.Timedelta(request_limit)
+    windows = []
+    request_end = end
+    while request_end - start.tz_convert(end.tz) > limit:
+        request_start = request_end - limit
+        windows.append((request_start, request_end))
+        request_end = request_start
+    windows.append((start, request_end))
+    return windows[::-1]
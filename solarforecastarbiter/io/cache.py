@@ -0,0 +1,345 @@
+"""
+Local on-disk cache of time series values retrieved from the
+SolarForecastArbiter API. Values are stored in one file per object per UTC
+day using the packed binary format of :py:mod:`solarforecastarbiter.io.utils`
+and the time ranges already retrieved for each object are tracked so that
+only missing ranges are requested from the API.
+"""
+from collections import OrderedDict
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import threading
+
+
+import pandas as pd
+
+
+from solarforecastarbiter.utils import merge_ranges
+from solarforecastarbiter.io.utils import (
+    observation_df_to_packed_payload, forecast_object_to_packed_payload,
+    packed_payload_to_dict)
+
+
+logger = logging.getLogger(__name__)
+
+PARTITION_SUFFIX = '.sfav'
+COVERAGE_FILE = 'coverage.json'
+ONE_NS = pd.Timedelta(1, unit='ns')
+ONE_DAY = pd.Timedelta('1D')
+
+
+def subtract_range(ranges, start, end):
+    """Remove the closed interval [start, end] from the closed intervals
+    in ranges.
+
+    Parameters
+    ----------
+    ranges : list of (pandas.Timestamp, pandas.Timestamp)
+    start : pandas.Timestamp
+    end : pandas.Timestamp
+
+    Returns
+    -------
+    list of (pandas.Timestamp, pandas.Timestamp)
+        The sorted ranges that remain
+    """
+    out = []
+    for rstart, rend in ranges:
+        if rend < start or rstart > end:
+            out.append((rstart, rend))
+            continue
+        if rstart < start:
+            out.append((rstart, start - ONE_NS))
+        if rend > end:
+            out.append((end + ONE_NS, rend))
+    return sorted(out)
+
+
+def _days(start, end):
+    """UTC days that overlap the closed interval [start, end]"""
+    return pd.date_range(start.tz_convert('UTC').floor('1D'),
+                         end.tz_convert('UTC').floor('1D'), freq='1D')
+
+
+def _to_packed(data):
+    if isinstance(data, pd.Series):
+        return forecast_object_to_packed_payload(data)
+    else:
+        return observation_df_to_packed_payload(data)
+
+
+class ValueCache:
+    """
+    On-disk cache of time series values keyed by the API path of the
+    values of an object, e.g. ``/observations/{observation_id}/values``.
+
+    Values are stored in per object, per UTC day partitions and the least
+    recently used partitions are evicted when the total size of the cache
+    exceeds `max_size`. The cache does not know about values posted to the
+    API by other clients. Values posted through an
+    :py:class:`~solarforecastarbiter.io.api.APISession` that uses the cache
+    invalidate the affected days.
+
+    Parameters
+    ----------
+    cache_dir : str or path-like
+        Directory to store the cached values in. Created if it does not
+        exist.
+    max_size : int, default 1 GiB
+        Maximum size of the cached values in bytes.
+    """
+    def __init__(self, cache_dir, max_size=2**30):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._lock = threading.RLock()
+        self._coverage = {}
+        # partition path -> size in bytes, least recently used first
+        self._partitions = OrderedDict()
+        existing = sorted(
+            (p.stat().st_mtime, p) for p in
+            self.cache_dir.glob(f'*/*{PARTITION_SUFFIX}'))
+        for _, path in existing:
+            self._partitions[path] = path.stat().st_size
+        self.size = sum(self._partitions.values())
+
+    def _key_dir(self, key):
+        return self.cache_dir / re.sub(r'[^\w.-]', '_', key.strip('/'))
+
+    def _partition_path(self, key, day):
+        return self._key_dir(key) / (day.strftime('%Y-%m-%d') +
+                                     PARTITION_SUFFIX)
+
+    def _load_coverage(self, keydir):
+        if keydir not in self._coverage:
+            path = keydir / COVERAGE_FILE
+            if path.exists():
+                with open(path) as f:
+                    ranges = [(pd.Timestamp(s), pd.Timestamp(e))
+                              for s, e in json.load(f)]
+            else:
+                ranges = []
+            self._coverage[keydir] = ranges
+        return list(self._coverage[keydir])
+
+    def _store_coverage(self, keydir, ranges):
+        merged = []
+        for rstart, rend in merge_ranges(ranges):
+            # also join ranges that are adjacent at nanosecond precision
+            if merged and rstart - merged[-1][1] <= ONE_NS:
+                merged[-1] = (merged[-1][0], max(rend, merged[-1][1]))
+            else:
+                merged.append((rstart, rend))
+        ranges = merged
+        self._coverage[keydir] = ranges
+        keydir.mkdir(exist_ok=True)
+        with open(keydir / COVERAGE_FILE, 'w') as f:
+            json.dump([(s.isoformat(), e.isoformat()) for s, e in ranges], f)
+
+    def _remove_day_coverage(self, keydir, day):
+        self._store_coverage(keydir, subtract_range(
+            self._load_coverage(keydir), day, day + ONE_DAY - ONE_NS))
+
+    def coverage(self, key):
+        """
+        Get the time ranges with values cached for key
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        list of (pandas.Timestamp, pandas.Timestamp)
+            Closed intervals of the cached ranges
+        """
+        with self._lock:
+            return self._load_coverage(self._key_dir(key))
+
+    def missing_ranges(self, key, start, end):
+        """
+        Get the ranges from start to end that are not in the cache
+
+        Parameters
+        ----------
+        key : str
+        start : pandas.Timestamp
+        end : pandas.Timestamp
+
+        Returns
+        -------
+        list of (pandas.Timestamp, pandas.Timestamp)
+            Closed intervals that are not cached
+        """
+        missing = [(start, end)]
+        for cstart, cend in self.coverage(key):
+            missing = subtract_range(missing, cstart, cend)
+        return missing
+
+    def _read_partition(self, path):
+        with open(path, 'rb') as f:
+            content = f.read()
+        os.utime(path)
+        self._partitions.move_to_end(path)
+        return packed_payload_to_dict(content)['values']
+
+    def _write_partition(self, path, data):
+        content = _to_packed(data)
+        path.parent.mkdir(exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        self.size += len(content) - self._partitions.pop(path, 0)
+        self._partitions[path] = len(content)
+
+    def _remove_partition(self, path):
+        self.size -= self._partitions.pop(path, 0)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def read(self, key, start, end):
+        """
+        Read the cached values for key from start to end, inclusive.
+
+        Parameters
+        ----------
+        key : str
+        start : pandas.Timestamp
+        end : pandas.Timestamp
+
+        Returns
+        -------
+        dict
+            Payload dict with a "values" DataFrame that may be passed to
+            the payload parsing functions of
+            :py:mod:`solarforecastarbiter.io.utils`
+        """
+        with self._lock:
+            frames = []
+            for day in _days(start, end):
+                path = self._partition_path(key, day)
+                if path in self._partitions:
+                    frames.append(self._read_partition(path))
+        if len(frames) == 0:
+            values = pd.DataFrame(
+                [], columns=['value', 'quality_flag'],
+                index=pd.DatetimeIndex([], name='timestamp', tz='UTC'))
+        else:
+            values = pd.concat(frames)
+        values = values.loc[start.tz_convert('UTC'):end.tz_convert('UTC')]
+        return {'values': values}
+
+    def write(self, key, data, start, end):
+        """
+        Store values retrieved from start to end for key, replacing any
+        cached values in that range. Unless the range after end is
+        already cached, only the range up to the last timestamp of data is
+        recorded as cached since values after it may still be added to
+        the API.
+
+        Parameters
+        ----------
+        key : str
+        data : pandas.Series or pandas.DataFrame
+            Values with a localized DatetimeIndex, as returned by the
+            payload parsing functions of
+            :py:mod:`solarforecastarbiter.io.utils`
+        start : pandas.Timestamp
+        end : pandas.Timestamp
+        """
+        data = data.tz_convert('UTC').sort_index()
+        keydir = self._key_dir(key)
+        with self._lock:
+            for day in _days(start, end):
+                path = self._partition_path(key, day)
+                lo, hi = data.index.searchsorted([day, day + ONE_DAY])
+                new = data.iloc[lo:hi]
+                if path in self._partitions:
+                    old = self._read_partition(path)
+                    if isinstance(new, pd.Series):
+                        old = old['value']
+                    old = old[(old.index < start) | (old.index > end)]
+                    new = pd.concat([old, new]).sort_index()
+                if len(new) == 0:
+                    continue
+                self._write_partition(path, new)
+            coverage = self._load_coverage(keydir)
+            if any(cstart <= end + ONE_NS <= cend
+                   for cstart, cend in coverage):
+                # values after end are already known
+                cover_end = end
+            elif len(data) > 0:
+                cover_end = min(end, data.index.max())
+            else:
+                return
+            self._store_coverage(keydir, coverage + [
+                (start.tz_convert('UTC'), cover_end.tz_convert('UTC'))])
+
+    def invalidate(self, key, start=None, end=None):
+        """
+        Remove the cached days of key that overlap start to end.
+
+        Parameters
+        ----------
+        key : str
+        start : pandas.Timestamp or None
+            If None, remove all cached values of key
+        end : pandas.Timestamp or None
+            If None, remove all cached values of key
+        """
+        keydir = self._key_dir(key)
+        with self._lock:
+            if start is None or end is None:
+                for path in list(self._partitions):
+                    if path.parent == keydir:
+                        self._remove_partition(path)
+                self._store_coverage(keydir, [])
+                return
+            for day in _days(start, end):
+                self._remove_partition(self._partition_path(key, day))
+                self._remove_day_coverage(keydir, day)
+
+    def evict(self):
+        """Remove the least recently used days until the size of the
+        cache is no more than max_size"""
+        with self._lock:
+            while self.size > self.max_size and self._partitions:
+                path = next(iter(self._partitions))
+                logger.debug('Evicting %s from value cache', path)
+                self._remove_partition(path)
+                day = pd.Timestamp(path.name[:-len(PARTITION_SUFFIX)],
+                                   tz='UTC')
+                self._remove_day_coverage(path.parent, day)
+
+    def get_values(self, key, start, end, fetch_fn, parse_fn):
+        """
+        Get the values for key from start to end, inclusive, retrieving
+        only the ranges missing from the cache with fetch_fn.
+
+        Parameters
+        ----------
+        key : str
+        start : pandas.Timestamp
+        end : pandas.Timestamp
+        fetch_fn : function
+            Called like fetch_fn(start, end) for each missing range to get
+            the values from the API as a pandas Series or DataFrame.
+        parse_fn : function
+            A function used to parse the payload of cached values into a
+            pandas Series or DataFrame.
+
+        Returns
+        -------
+        pandas.Series or pandas.DataFrame
+            As returned by parse_fn
+        """
+        for mstart, mend in self.missing_ranges(key, start, end):
+            logger.debug('Requesting %s from %s to %s', key, mstart, mend)
+            self.write(key, fetch_fn(mstart, mend), mstart, mend)
+        out = parse_fn(self.read(key, start, end))
+        self.evict()
+        return out
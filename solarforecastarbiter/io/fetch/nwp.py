@@ -4,9 +4,13 @@ as a CLI program.
 
 
 The script fetches grib2 files from NOMADS as they are available using g2sub,
-uses wgrib2 to convert the grib files to netCDF (and adds wind speed),
-and optimizes the netCDF file for our expected usage accessing a time-series
-for a single location.
+uses wgrib2 to convert each grib file to netCDF (and adds wind speed) as soon
+as it is retrieved, and combines the netCDF files of a model run into one
+file optimized for our expected usage accessing a time-series for a single
+location. If a list of sites is given, the time-series of the
+closest grid points to the sites are also extracted to a small netCDF file
+next to the model file that is read by
+:py:func:`solarforecastarbiter.io.nwp.load_forecast` instead of the full grid.
 
 Each possible model has an associated dictonary with parameters that are
 passed in the HTTP request. Other keys in the dictionaries are used
@@ -41,6 +45,7 @@ import tempfile
 
 
 import aiohttp
+import numpy as np
 import pandas as pd
 import xarray as xr
 
@@ -48,7 +53,8 @@ import xarray as xr
 from solarforecastarbiter.io.fetch import (
     make_session, run_in_executor, abort_all_on_exception)
 
-from solarforecastarbiter.io.nwp import DOMAIN
+from solarforecastarbiter.io.nwp import (
+    DOMAIN, extract_points, point_store_path)
 
 
 logger = logging.getLogger(__name__)
@@ -481,93 +487,163 @@ async def fetch_grib_files(session, params, basepath, init_time, chunksize):
 
 
 @abort_all_on_exception
-async def process_grib_to_netcdf(folder, model):
-    logger.info('Converting GRIB files to NetCDF with wgrib2 %s',
-                model.get('member', ''))
-    _handle, nctmp = tempfile.mkstemp()
-    os.close(_handle)
-    nctmp = Path(nctmp)
+async def process_grib_file(grbfile, model):
+    """
+    Convert a grib file to a NetCDF file next to it with wgrib2, adding
+    wind speed if the model does not include it. Run as soon as a file is
+    retrieved so the files of a model run are converted concurrently.
+
+    Parameters
+    ----------
+    grbfile : Path
+    model : dict
+
+    Returns
+    -------
+    nc_path : Path
+        The NetCDF file of grbfile
+    """
+    logger.debug('Converting %s to NetCDF with wgrib2', grbfile)
+    nc_path = grbfile.with_name('.' + grbfile.name + '.nc')
+    wind_in_model = 'var_WIND' not in model
+    subhourly = 'subhourly' in model['filename']
     # possible that this holds up processing on file io
     # so run in separate process
-    grib_prefix = model['file'].split('.')[0]
-    wind_in_model = 'var_WIND' not in model
     try:
-        await run_in_executor(_process_grib, folder, nctmp, grib_prefix,
-                              wind_in_model)
+        await run_in_executor(_process_grib_file, grbfile, nc_path,
+                              wind_in_model, subhourly)
     except Exception:
-        nctmp.unlink()
+        if nc_path.exists():
+            nc_path.unlink()
         raise
-    return nctmp
+    return nc_path
 
 
-def _process_grib(folder, nctmp, grib_prefix, wind_in_model):
+def _process_grib_file(grbfile, nc_path, wind_in_model, subhourly):
+    path = str(grbfile.resolve())
     if wind_in_model:
-        # need to add wind to the grib files
-        for grbfile in folder.glob(f'{grib_prefix}*.grib2'):
-            path = str(grbfile.resolve())
-            try:
-                subprocess.run(
-                    f'wgrib2 {path} -wind_speed - -match "(UGRD|VGRD)" | '
-                    f'wgrib2 - -append -grib_out {path}',
-                    shell=True, check=True, capture_output=True)
-            except subprocess.CalledProcessError as e:
-                logger.error('Error converting wind in file %s\n%s',
-                             grbfile, e.stderr)
-                raise OSError
-
-    if 'subhourly' in str(folder):
+        # need to add wind to the grib file
+        try:
+            subprocess.run(
+                f'wgrib2 {path} -wind_speed - -match "(UGRD|VGRD)" | '
+                f'wgrib2 - -append -grib_out {path}',
+                shell=True, check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            logger.error('Error converting wind in file %s\n%s',
+                         grbfile, e.stderr)
+            raise OSError
+
+    if subhourly:
         # for hrrr subhourly, assume TMP and VDDSF have no average but others
         fmt = "-match 'ave|TMP|VDDSF'"
     else:
         fmt = ''
 
+    # start from an empty file since wgrib2 appends to it
+    open(nc_path, 'w').close()
     with tempfile.NamedTemporaryFile(mode='w') as tmp_nc_tbl:
         tmp_nc_tbl.write(NC_TBL)
         tmp_nc_tbl.flush()
 
         try:
             subprocess.run(
-                f'cat {str(folder)}/{grib_prefix}*.grib2 | '
-                f'wgrib2 - -nc4 -nc_table {tmp_nc_tbl.name} {fmt} -append -netcdf {str(nctmp)}',  # NOQA
+                f'wgrib2 {path} -nc4 -nc_table {tmp_nc_tbl.name} {fmt} -append -netcdf {str(nc_path)}',  # NOQA
                 shell=True, check=True, capture_output=True)
         except subprocess.CalledProcessError as e:
-            logger.error('Error converting grib files %s*.grib2 to netCDF\n%s',
-                         grib_prefix, e.stderr)
+            logger.error('Error converting grib file %s to netCDF\n%s',
+                         grbfile, e.stderr)
             raise OSError
-    return nctmp
+    return nc_path
 
 
-def _optimize_netcdf(nctmpfile, out_path):
-    """Optmizes the netcdf file for accessing by time slice."""
-    ds = xr.open_dataset(nctmpfile, engine='netcdf4',
-                         backend_kwargs={'mode': 'r'})
-    # time is likely unlimited
-    if 'unlimited_dims' in ds.encoding:
-        ds.encoding = {}
+@abort_all_on_exception
+async def fetch_and_process_grib_file(session, params, basepath, init_time,
+                                      chunksize, model):
+    """Fetch a grib file with :py:func:`fetch_grib_files` and convert it
+    to NetCDF with :py:func:`process_grib_file`.
 
-    chunksizes = []
-    for dim, size in ds.dims.items():
-        if dim == 'time':
-            chunksizes.append(size)
-        else:
-            chunksizes.append(50)
-
-    encoding = DEFAULT_ENCODING.copy()
-    encoding.update(
-        {key: {'dtype': 'float32',
-               'least_significant_digit': LEAST_SIGNIFICANT_DIGITS[key],
-               'chunksizes': chunksizes,
-               **COMPRESSION}
-         for key in ds.keys()})
-    ds.to_netcdf(out_path, format='NETCDF4',
-                 mode='w', unlimited_dims=None,
-                 encoding=encoding)
-    ds.close()
-
-
-async def optimize_netcdf(nctmpfile, final_path):
-    """Compress the netcdf file and adjust the chunking for fast time-series
-    access"""
+    Returns
+    -------
+    filename : Path
+        Path of the grib file
+    nc_path : Path
+        Path of the NetCDF file
+    """
+    filename = await fetch_grib_files(session, params, basepath, init_time,
+                                      chunksize)
+    nc_path = await process_grib_file(filename, model)
+    return filename, nc_path
+
+
+def _optimize_netcdf(nc_paths, out_path):
+    """Combines the netcdf files of a model run along time and optimizes
+    the result for accessing by time slice. The files are opened lazily
+    and the variables are written one at a time so that only one variable
+    of the whole model run is in memory."""
+    pieces = [xr.open_dataset(path, engine='netcdf4',
+                              backend_kwargs={'mode': 'r'})
+              for path in nc_paths]
+    try:
+        _write_combined_netcdf(pieces, out_path)
+    finally:
+        for ds in pieces:
+            ds.close()
+
+
+def _write_combined_netcdf(pieces, out_path):
+    times = np.concatenate([ds.time.values for ds in pieces])
+    order = np.argsort(times, kind='stable')
+    # variables, e.g. averages, may be missing from some forecast hours
+    templates = {}
+    for ds in pieces:
+        for key, var in ds.data_vars.items():
+            templates.setdefault(key, var.variable)
+
+    coords = xr.Dataset(
+        coords={key: coord.variable for key, coord in pieces[0].coords.items()
+                if 'time' not in coord.dims},
+        attrs=pieces[0].attrs)
+    coords['time'] = ('time', times[order], pieces[0].time.attrs)
+    aux_coords = [key for key in coords.coords if key not in coords.dims]
+    # time is fixed rather than unlimited in the output
+    coords.to_netcdf(out_path, format='NETCDF4', mode='w',
+                     unlimited_dims=None,
+                     encoding={key: enc for key, enc in
+                               DEFAULT_ENCODING.items() if key in coords})
+
+    def chunksizes(var):
+        return tuple(size if dim == 'time' else min(size, 50)
+                     for dim, size in zip(var.dims, var.shape))
+
+    for key, template in templates.items():
+        parts = []
+        for ds in pieces:
+            if key in ds:
+                parts.append(ds[key].values)
+            else:
+                shape = (ds.dims['time'],) + template.shape[1:]
+                parts.append(np.full(shape, np.nan, template.dtype))
+        data = np.concatenate(parts)[order]
+        del parts
+        attrs = dict(template.attrs)
+        var_coords = [c for c in aux_coords
+                      if set(coords[c].dims) <= set(template.dims)]
+        if var_coords:
+            attrs['coordinates'] = ' '.join(var_coords)
+        var = xr.Variable(template.dims, data, attrs)
+        encoding = {key: {'dtype': 'float32',
+                          'least_significant_digit':
+                          LEAST_SIGNIFICANT_DIGITS[key],
+                          'chunksizes': chunksizes(var),
+                          **COMPRESSION}}
+        xr.Dataset({key: var}).to_netcdf(out_path, format='NETCDF4',
+                                         mode='a', encoding=encoding)
+        del data, var
+
+
+async def optimize_netcdf(nc_paths, final_path):
+    """Combine the netcdf files of each forecast hour, compress the result,
+    and adjust the chunking for fast time-series access"""
     logger.info('Optimizing NetCDF file to save at %s', final_path)
     parent = Path(final_path.parent)
     if not parent.is_dir():
@@ -578,7 +654,7 @@ async def optimize_netcdf(nctmpfile, final_path):
     # possible that this leaks memory, so run in separate process
     # that is restarted after a number of jobs
     try:
-        await run_in_executor(_optimize_netcdf, nctmpfile, tmp_path)
+        await run_in_executor(_optimize_netcdf, nc_paths, tmp_path)
     except Exception:
         tmp_path.unlink()
         raise
@@ -588,7 +664,51 @@ async def optimize_netcdf(nctmpfile, final_path):
                          stat.S_IWUSR)
         logger.info('Done optimizing NetCDF at %s', final_path)
     finally:
-        nctmpfile.unlink()
+        for nc_path in nc_paths:
+            nc_path.unlink()
+
+
+def _extract_sites(nc_path, out_path, sites):
+    """Save the time-series of the closest grid points to sites"""
+    latitude, longitude = np.asarray(sites, dtype=float).reshape(-1, 2).T
+    with xr.open_dataset(nc_path) as ds:
+        pnts = extract_points(ds, latitude, longitude).load()
+    encoding = {key: {'dtype': 'float32', **COMPRESSION}
+                for key in pnts.keys()}
+    pnts.to_netcdf(out_path, format='NETCDF4', mode='w', encoding=encoding)
+
+
+async def extract_sites(nc_path, sites):
+    """Extract the time-series for each site from the optimized netcdf file
+    to the point store next to it. Failures are only logged since forecasts
+    can still be made from the full model file. sites may also be a
+    function that returns the sites, which is called for every model run
+    so that sites added while fetching are included."""
+    if callable(sites):
+        loop = asyncio.get_event_loop()
+        try:
+            sites = await loop.run_in_executor(None, sites)
+        except Exception:
+            logger.exception('Failed to get the sites to extract from %s',
+                             nc_path)
+            return
+        if not sites:
+            return
+    final_path = point_store_path(nc_path)
+    logger.info('Extracting time-series for %s sites to %s', len(sites),
+                final_path)
+    _handle, tmp_path = tempfile.mkstemp(dir=final_path.parent)
+    os.close(_handle)
+    tmp_path = Path(tmp_path)
+    try:
+        await run_in_executor(_extract_sites, nc_path, tmp_path, sites)
+    except Exception:
+        logger.exception('Failed to extract sites from %s', nc_path)
+        tmp_path.unlink()
+    else:
+        tmp_path.rename(final_path)
+        final_path.chmod(stat.S_IRGRP | stat.S_IRUSR | stat.S_IROTH |
+                         stat.S_IWUSR)
 
 
 async def sleep_until_inittime(inittime, model):
@@ -651,7 +771,8 @@ async def next_run_time(inittime, modelpath, model):
     return inittime
 
 
-async def _run_loop(session, model, modelpath, chunksize, once, use_tmp):
+async def _run_loop(session, model, modelpath, chunksize, once, use_tmp,
+                    sites=None):
     inittime = await startup_find_next_runtime(modelpath, session, model)
     while True:
         fetch_tasks = set()
@@ -662,21 +783,20 @@ async def _run_loop(session, model, modelpath, chunksize, once, use_tmp):
             gribdir = Path(_tmpdir.name)
         else:
             gribdir = modelpath
+        # each file is converted to NetCDF as soon as it is retrieved
         async for params in files_to_retrieve(session, model, gribdir,
                                               inittime):
             logger.debug('Processing parameters %s', params)
             fetch_tasks.add(asyncio.create_task(
-                fetch_grib_files(session, params, gribdir, inittime,
-                                 chunksize)))
-        files = await asyncio.gather(*fetch_tasks)
+                fetch_and_process_grib_file(session, params, gribdir,
+                                            inittime, chunksize, model)))
+        fetched = await asyncio.gather(*fetch_tasks)
+        files = [filename for filename, _ in fetched]
         if len(files) != 0:  # skip to next inittime
-            path_to_files = files[0].parent
-            try:
-                nctmpfile = await process_grib_to_netcdf(path_to_files,
-                                                         model)
-                await optimize_netcdf(nctmpfile, finalpath)
-            except Exception:
-                raise
+            await optimize_netcdf([nc_path for _, nc_path in fetched],
+                                  finalpath)
+            if sites:
+                await extract_sites(finalpath, sites)
         if use_tmp:
             _tmpdir.cleanup()
         else:
@@ -690,12 +810,14 @@ async def _run_loop(session, model, modelpath, chunksize, once, use_tmp):
             inittime = await next_run_time(inittime, modelpath, model)
 
 
-async def run(basepath, model_name, chunksize, once=False, use_tmp=False):
+async def run(basepath, model_name, chunksize, once=False, use_tmp=False,
+              sites=None):
     session = make_session()
     modelpath = basepath / model_name
     if model_name != 'gefs':
         model = model_map[model_name]
-        await _run_loop(session, model, modelpath, chunksize, once, use_tmp)
+        await _run_loop(session, model, modelpath, chunksize, once, use_tmp,
+                        sites)
     else:
         base_model = model_map[model_name].copy()
         members = base_model.pop('members')
@@ -707,23 +829,32 @@ async def run(basepath, model_name, chunksize, once=False, use_tmp=False):
             model['filename'] = model['filename'].format(stat_or_member=member)
             member_loops.add(asyncio.create_task(
                 _run_loop(session, model, modelpath, chunksize, once,
-                          use_tmp)))
+                          use_tmp, sites)))
         await asyncio.wait(member_loops)
     await session.close()
 
 
-async def optimize_only(path_to_files, model_name):
+async def optimize_only(path_to_files, model_name, sites=None):
     model = model_map[model_name]
-    nctmpfile = await process_grib_to_netcdf(path_to_files, model)
-    try:
-        await optimize_netcdf(
-            nctmpfile, path_to_files / f'{model_name}.nc')
-    except Exception:
-        raise
-    else:
-        # remove grib files
-        for f in path_to_files.glob(f'{model["file"].split(".")[0]}*.grib2'):
-            f.unlink()
+    files = sorted(
+        path_to_files.glob(f'{model["file"].split(".")[0]}*.grib2'))
+    nc_paths = await asyncio.gather(
+        *(process_grib_file(f, model) for f in files))
+    finalpath = path_to_files / f'{model_name}.nc'
+    await optimize_netcdf(nc_paths, finalpath)
+    if sites:
+        await extract_sites(finalpath, sites)
+    # remove grib files
+    for f in files:
+        f.unlink()
+
+
+def load_sites(site_file):
+    """Read the latitude and longitude columns of a CSV file, such as
+    the reference sites file, into a list of (latitude, longitude)"""
+    df = pd.read_csv(site_file)
+    return list(df[['latitude', 'longitude']].dropna().itertuples(
+        index=False, name=None))
 
 
 def check_wgrib2():
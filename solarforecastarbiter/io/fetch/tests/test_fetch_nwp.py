@@ -9,6 +9,7 @@ import aiohttp
 from asynctest import CoroutineMock, MagicMock
 import pandas as pd
 from pkg_resources import resource_filename, Requirement
+import xarray as xr
 
 from solarforecastarbiter.io.fetch import nwp
 
@@ -290,3 +291,152 @@ async def test_optimize_only(mocker, tmp_path):
                  new=run)
     await nwp.optimize_only(grib_dir, 'rap')
     assert [x.name for x in grib_dir.iterdir()] == ['rap.nc']
+
+
+@pytest.fixture()
+def rap_nc_pieces(tmp_path):
+    nc_path = Path(resource_filename(
+        Requirement.parse('solarforecastarbiter'),
+        'solarforecastarbiter/io/tests/data/rap/2019/05/15/00/rap.nc'))
+    with xr.open_dataset(nc_path) as ds:
+        ds = ds.load()
+    paths = []
+    for i in range(ds.dims['time']):
+        piece = ds.isel(time=[i])
+        if i == 0:
+            # e.g. averages are missing from the first forecast hour
+            piece = piece.drop_vars('tcdc')
+        path = tmp_path / f'.rap.f{i:02d}.grib2.nc'
+        piece.to_netcdf(path)
+        paths.append(path)
+    # order of completion is arbitrary
+    return ds, paths[::-1]
+
+
+def test_optimize_netcdf(rap_nc_pieces, tmp_path):
+    ds, paths = rap_nc_pieces
+    out_path = tmp_path / 'rap.nc'
+    nwp._optimize_netcdf(paths, out_path)
+    with xr.open_dataset(out_path) as out:
+        assert set(out.data_vars) == {'t2m', 'si10', 'tcdc'}
+        assert (out.time.values == ds.time.values).all()
+        assert out.tcdc[0].isnull().all()
+        xr.testing.assert_allclose(out.tcdc[1:], ds.tcdc[1:], atol=0.1)
+        xr.testing.assert_allclose(out.t2m, ds.t2m, atol=0.01)
+        assert out.t2m.encoding['chunksizes'] == (ds.dims['time'], 4, 4)
+        assert out.t2m.encoding['zlib']
+
+
+@pytest.mark.asyncio
+async def test_optimize_netcdf_removes_pieces(mocker, rap_nc_pieces,
+                                             tmp_path):
+    async def run(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    mocker.patch('solarforecastarbiter.io.fetch.nwp.run_in_executor',
+                 new=run)
+    _, paths = rap_nc_pieces
+    final_path = tmp_path / 'out' / 'rap.nc'
+    await nwp.optimize_netcdf(paths, final_path)
+    assert [x.name for x in tmp_path.iterdir()] == ['out']
+    assert [x.name for x in final_path.parent.iterdir()] == ['rap.nc']
+
+
+@pytest.mark.parametrize('model,ncommands,match', [
+    ('rap', 2, ''),
+    ('hrrr_subhourly', 1, "-match 'ave|TMP|VDDSF'"),
+])
+def test_process_grib_file(mocker, tmp_path, model, ncommands, match):
+    run = mocker.patch('solarforecastarbiter.io.fetch.nwp.subprocess.run')
+    grbfile = tmp_path / 'file.grib2'
+    grbfile.touch()
+    nc_path = tmp_path / '.file.grib2.nc'
+    nc_path.write_text('old')
+    nwp._process_grib_file(grbfile, nc_path,
+                           'var_WIND' not in nwp.model_map[model],
+                           'subhourly' in model)
+    assert run.call_count == ncommands
+    if ncommands == 2:
+        assert '-wind_speed' in run.call_args_list[0][0][0]
+    command = run.call_args_list[-1][0][0]
+    assert command.startswith(f'wgrib2 {grbfile} -nc4')
+    assert command.endswith(f'{match} -append -netcdf {nc_path}')
+    assert nc_path.read_text() == ''
+
+
+@pytest.mark.asyncio
+async def test_process_grib_file_fails(mocker, tmp_path):
+    async def run(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    mocker.patch('solarforecastarbiter.io.fetch.nwp.run_in_executor',
+                 new=run)
+    kill = mocker.patch('solarforecastarbiter.io.fetch.signal.pthread_kill')
+    mocker.patch('solarforecastarbiter.io.fetch.nwp.subprocess.run',
+                 side_effect=nwp.subprocess.CalledProcessError(1, 'wgrib2'))
+    grbfile = tmp_path / 'file.grib2'
+    grbfile.touch()
+    await nwp.process_grib_file(grbfile, nwp.model_map['rap'])
+    assert kill.called
+    assert [x.name for x in tmp_path.iterdir()] == ['file.grib2']
+
+
+def test_extract_sites(tmp_path):
+    nc_path = Path(resource_filename(
+        Requirement.parse('solarforecastarbiter'),
+        'solarforecastarbiter/io/tests/data/rap/2019/05/15/00/rap.nc'))
+    out_path = tmp_path / 'rap_points.nc'
+    nwp._extract_sites(nc_path, out_path, [(32.2, -110.9), (32.4, -110.1)])
+    with xr.open_dataset(out_path) as pnts:
+        assert pnts.dims['point'] == 2
+        assert list(pnts.site_latitude.values) == [32.2, 32.4]
+        assert set(pnts.data_vars) == {'t2m', 'tcdc', 'si10'}
+
+
+@pytest.mark.asyncio
+async def test_extract_sites_fails(mocker, tmp_path):
+    async def run(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    mocker.patch('solarforecastarbiter.io.fetch.nwp.run_in_executor',
+                 new=run)
+    nc_path = tmp_path / 'rap.nc'
+    nc_path.touch()
+    await nwp.extract_sites(nc_path, [(32.2, -110.9)])
+    assert [x.name for x in tmp_path.iterdir()] == ['rap.nc']
+
+
+@pytest.mark.asyncio
+async def test_extract_sites_callable(mocker, tmp_path):
+    extract = mocker.patch(
+        'solarforecastarbiter.io.fetch.nwp.run_in_executor',
+        new=CoroutineMock())
+    get_sites = MagicMock(side_effect=[[(32.2, -110.9)],
+                                       [(32.2, -110.9), (40.0, -105.0)]])
+    nc_path = tmp_path / 'rap.nc'
+    await nwp.extract_sites(nc_path, get_sites)
+    await nwp.extract_sites(nc_path, get_sites)
+    assert get_sites.call_count == 2
+    assert extract.call_args_list[0][0][-1] == [(32.2, -110.9)]
+    assert extract.call_args_list[1][0][-1] == [(32.2, -110.9),
+                                                (40.0, -105.0)]
+
+
+@pytest.mark.asyncio
+async def test_extract_sites_callable_fails(mocker, tmp_path):
+    extract = mocker.patch(
+        'solarforecastarbiter.io.fetch.nwp.run_in_executor',
+        new=CoroutineMock())
+    get_sites = MagicMock(side_effect=ValueError('no sites'))
+    nc_path = tmp_path / 'rap.nc'
+    nc_path.touch()
+    await nwp.extract_sites(nc_path, get_sites)
+    assert not extract.called
+    assert [x.name for x in tmp_path.iterdir()] == ['rap.nc']
+
+
+def test_load_sites(tmp_path):
+    site_file = tmp_path / 'sites.csv'
+    site_file.write_text('name,latitude,longitude\na,32.2,-110.9\n'
+                         'b,40.0,-105.0\nc,,\n')
+    assert nwp.load_sites(site_file) == [(32.2, -110.9), (40.0, -105.0)]
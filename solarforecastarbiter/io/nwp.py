@@ -1,7 +1,11 @@
+from collections import OrderedDict
+import itertools
 from pathlib import Path
+import threading
 
 
 import numpy as np
+from scipy.spatial import cKDTree
 import xarray as xr
 
 
@@ -30,17 +34,152 @@ DOMAIN = {'subregion': '',
           'bottomlat': 24}
 
 
+EARTH_RADIUS = 6378.1  # km
+# maximum distance from point to closest grid point in km
+DISTANCE_LIMIT = 500
+
+# the netCDF/HDF5 libraries are not thread safe, so only one thread
+# reads model files at a time
+_NETCDF_LOCK = threading.Lock()
+
+# maximum number of grid indexes kept by get_grid_index
+GRID_INDEX_CACHE_SIZE = 8
+_GRID_INDEXES = OrderedDict()
+_GRID_INDEX_LOCK = threading.Lock()
+
+
+def _unit_vectors(latitude, longitude):
+    """Cartesian coordinates of points on the unit sphere"""
+    rad_factor = np.pi/180.0
+    latvals = np.asarray(latitude, dtype=float) * rad_factor
+    lonvals = np.asarray(longitude, dtype=float) * rad_factor
+    clat = np.cos(latvals)
+    return np.stack([clat * np.cos(lonvals), clat * np.sin(lonvals),
+                     np.sin(latvals)], axis=-1)
+
+
+class GridIndex:
+    """
+    Nearest grid point lookup for a model grid.
+
+    The grid points are stored as unit vectors in a KD-tree so that the
+    closest points by tunnel distance, as in :py:func:`tunnel_fast`, can
+    be found for many query points without recomputing the grid
+    coordinates.
+
+    Parameters
+    ----------
+    latvar : numpy.array
+        Model latitudes. 1D latitudes and longitudes define a regular grid.
+    lonvar : numpy.array
+        Model longitudes.
+    """
+    def __init__(self, latvar, lonvar):
+        # copies so that get_grid_index can confirm a grid is the same
+        self._latvar = np.array(latvar)
+        self._lonvar = np.array(lonvar)
+        if np.ndim(latvar) == 1:
+            lonvar, latvar = np.meshgrid(lonvar, latvar)
+        self.shape = np.shape(latvar)
+        self._tree = cKDTree(
+            _unit_vectors(latvar, lonvar).reshape(-1, 3),
+            balanced_tree=False, compact_nodes=False)
+
+    def query(self, latitude, longitude, limit=None, return_distance=False):
+        """
+        Find the closest grid points to the specified points.
+
+        Parameters
+        ----------
+        latitude : float or array-like
+            Latitudes of desired points.
+        longitude : float or array-like
+            Longitudes of desired points.
+        limit : None or float
+            Maximum distance allowed in units of km.
+        return_distance : bool, default False
+            Also return the distances to the closest grid points.
+
+        Returns
+        -------
+        iy : int or numpy.array
+            Indices of the points along the latitude (y) axis of the grid.
+        ix : int or numpy.array
+            Indices of the points along the longitude (x) axis of the grid.
+        dist : float or numpy.array
+            Distances to the closest grid points in km. Only returned if
+            return_distance is True.
+
+        Raises
+        ------
+        ValueError
+            If a closest point exceeds maximum distance requirement.
+        """
+        dist, index = self._tree.query(_unit_vectors(latitude, longitude))
+        dist = EARTH_RADIUS * dist
+        if limit is not None and np.any(dist > limit):
+            raise ValueError('Maximum distance limit exceeded')
+        iy, ix = np.unravel_index(index, self.shape)
+        if return_distance:
+            return iy, ix, dist
+        return iy, ix
+
+
+def _grid_key(latvar, lonvar):
+    """Cheap cache key of a grid from the shapes and dtypes and the
+    coordinates at the corners, edge midpoints and centre"""
+    key = []
+    for var in (latvar, lonvar):
+        var = np.asarray(var)
+        key += [var.shape, var.dtype.str]
+        if var.size:
+            points = itertools.product(*((0, n // 2, n - 1)
+                                         for n in var.shape))
+            key.append(tuple(var[tuple(zip(*points))].tolist()))
+    return tuple(key)
+
+
+def get_grid_index(latvar, lonvar):
+    """
+    Get the :py:class:`GridIndex` of a model grid. Indexes are built once
+    per process and reused for grids with the same coordinates.
+
+    Parameters
+    ----------
+    latvar : numpy.array
+    lonvar : numpy.array
+
+    Returns
+    -------
+    GridIndex
+    """
+    key = _grid_key(latvar, lonvar)
+    # grids with the same key may still differ away from the sampled
+    # points, so the full coordinates are compared without copying or
+    # hashing them
+    with _GRID_INDEX_LOCK:
+        for index in _GRID_INDEXES.get(key, []):
+            if (
+                    np.array_equal(index._latvar, latvar) and
+                    np.array_equal(index._lonvar, lonvar)
+            ):
+                _GRID_INDEXES.move_to_end(key)
+                return index
+    index = GridIndex(latvar, lonvar)
+    with _GRID_INDEX_LOCK:
+        _GRID_INDEXES.setdefault(key, []).append(index)
+        _GRID_INDEXES.move_to_end(key)
+        while len(_GRID_INDEXES) > GRID_INDEX_CACHE_SIZE:
+            _GRID_INDEXES.popitem(last=False)
+    return index
+
+
 def _load_pnt(ds, latitude, longitude, limit):
-    lats = ds.latitude.values
-    lons = ds.longitude.values
-    if lats.ndim == 1:
-        # ds uses lat and lon as primary coordinates. We still want to use
-        # tunnel_fast to determine distance so that we can check that
-        # the query point is not too far out of the domain.
-        # tunnel_fast requires 2D grid
-        lons, lats = np.meshgrid(lons, lats)
-    iy_min, ix_min = tunnel_fast(lats, lons, latitude, longitude,
-                                 limit=limit)
+    # ds may use lat and lon as primary coordinates. We still want to
+    # compute the distance so that we can check that the query point is
+    # not too far out of the domain.
+    index = get_grid_index(ds.latitude.values, ds.longitude.values)
+    iy_min, ix_min = index.query(latitude, longitude, limit=limit)
     # could avoid this if statement if we only use positional indexing
     # like ds[iy_min, ix_min] but this seems safer
     if ds.latitude.ndim == 1:
@@ -50,12 +189,77 @@ def _load_pnt(ds, latitude, longitude, limit):
     return pnt
 
 
+def extract_points(ds, latitude, longitude):
+    """
+    Select the time series of the closest grid points to many points
+    with one vectorized selection.
+
+    Parameters
+    ----------
+    ds : xarray.Dataset
+        NWP model data with latitude and longitude coordinates.
+    latitude : array-like
+        Latitudes of desired points.
+    longitude : array-like
+        Longitudes of desired points.
+
+    Returns
+    -------
+    xarray.Dataset
+        The data of the closest grid points along a *point* dimension with
+        the *site_latitude* and *site_longitude* of the desired points and
+        the *distance* in km to the closest grid points as coordinates.
+    """
+    latitude = np.atleast_1d(np.asarray(latitude, dtype=float))
+    longitude = np.atleast_1d(np.asarray(longitude, dtype=float))
+    index = get_grid_index(ds.latitude.values, ds.longitude.values)
+    iy, ix, dist = index.query(latitude, longitude, return_distance=True)
+    iy = xr.DataArray(iy, dims='point')
+    ix = xr.DataArray(ix, dims='point')
+    if ds.latitude.ndim == 1:
+        pnts = ds.isel(latitude=iy, longitude=ix)
+    else:
+        pnts = ds.isel(y=iy, x=ix)
+    return pnts.assign_coords(site_latitude=('point', latitude),
+                              site_longitude=('point', longitude),
+                              distance=('point', dist))
+
+
+def point_store_path(filepath):
+    """
+    Path of the file with the time series extracted for sites from the
+    NWP model file at filepath by :py:mod:`solarforecastarbiter.io.fetch.nwp`.
+    """
+    filepath = Path(filepath)
+    return filepath.with_name(filepath.stem + '_points.nc')
+
+
+def _find_points(pnts, latitude, longitude):
+    """Positions of the points in the point store, -1 if not present"""
+    stored = dict(zip(zip(pnts.site_latitude.values.tolist(),
+                          pnts.site_longitude.values.tolist()),
+                      range(pnts.dims['point'])))
+    return np.array([stored.get((float(lat), float(lon)), -1)
+                     for lat, lon in zip(np.atleast_1d(latitude),
+                                         np.atleast_1d(longitude))],
+                    dtype=int)
+
+
+def _check_distance(pnt):
+    if pnt.distance > DISTANCE_LIMIT:
+        raise ValueError('Maximum distance limit exceeded')
+
+
 def load_forecast(
         latitude, longitude, init_time, start, end, model,
         variables=('ghi', 'dni', 'dhi', 'air_temperature', 'wind_speed'),
         base_path=None):
     """Load NWP model data.
 
+    If the point store of the model file (see :py:func:`point_store_path`)
+    has the time series of the point, it is read from the store instead of
+    the model grid.
+
     Parameters
     ----------
     latitude : float
@@ -97,33 +301,156 @@ def load_forecast(
     ------
     ValueError : Raised if the requested variable is not found.
     """
+    filepath = _model_filepath(init_time, model, base_path)
+    if not filepath.is_file():
+        raise FileNotFoundError(f'{filepath} does not exist')
+
+    store_path = point_store_path(filepath)
+    if store_path.is_file():
+        # use the time series extracted for the site when fetched
+        with _NETCDF_LOCK, xr.open_dataset(store_path) as pnts:
+            i = _find_points(pnts, latitude, longitude)[0]
+            if i >= 0:
+                pnt = pnts.isel(point=i)
+                _check_distance(pnt)
+                return _pnt_to_series(pnt, start, end, variables)
+    with _NETCDF_LOCK, xr.open_dataset(filepath) as ds:
+        pnt = _load_pnt(ds, latitude, longitude, DISTANCE_LIMIT)
+        return _pnt_to_series(pnt, start, end, variables)
+
+
+def _pnt_to_series(pnt, start, end, variables):
+    mapping_subset = {k: v for k, v in CF_MAPPING.items() if v in variables}
+    pnt = pnt.sel(time=slice(_naive_utc(start), _naive_utc(end)))
+    pnt = pnt.rename(mapping_subset)
+    pnt['air_temperature'] -= 273.15  # convert Kelvin to deg C
+    series = [pnt[variable].to_series().tz_localize('UTC')
+              for variable in variables]
+    return series
+
+
+def _model_filepath(init_time, model, base_path=None):
     base_path = base_path if base_path is not None else BASE_PATH
     if 'gefs' in model:
         # account for slightly different file layout for gefs
         model_path = 'gefs'
     else:
         model_path = model
-    filepath = (Path(base_path) / model_path /
-                init_time.strftime('%Y/%m/%d/%H') / (model + '.nc'))
-    if not filepath.is_file():
-        raise FileNotFoundError(f'{filepath} does not exist')
-    mapping_subset = {k: v for k, v in CF_MAPPING.items() if v in variables}
+    return (Path(base_path) / model_path /
+            init_time.strftime('%Y/%m/%d/%H') / (model + '.nc'))
 
-    limit = 500  # maximum distance from point to closest grid point
+
+def _naive_utc(time):
     # Time in file are stored unlocalized but are UTC
     # so convert localized start/end to UTC then drop tz
-    if start.tzinfo is not None:
-        start = start.tz_convert('UTC').tz_localize(None)
-    if end.tzinfo is not None:
-        end = end.tz_convert('UTC').tz_localize(None)
-    with xr.open_dataset(filepath) as ds:
-        pnt = _load_pnt(ds, latitude, longitude, limit)
-        pnt = pnt.sel(time=slice(start, end))
-        pnt = pnt.rename(mapping_subset)
-        pnt['air_temperature'] -= 273.15  # convert Kelvin to deg C
-        series = [pnt[variable].to_series().tz_localize('UTC')
-                  for variable in variables]
-        return series
+    if time.tzinfo is not None:
+        time = time.tz_convert('UTC').tz_localize(None)
+    return time
+
+
+class BatchLoader:
+    """
+    Load NWP model data for many sites, opening each model file once.
+
+    The first time data is requested from a model file, the closest
+    grid points to all of the sites are extracted from the file with a
+    single vectorized selection and kept in memory. Sites already in the
+    point store of the file (see :py:func:`point_store_path`) are read
+    from the store instead.
+    :py:meth:`BatchLoader.load_forecast` has the same signature as
+    :py:func:`load_forecast` and may be passed as the ``load_forecast``
+    argument of the functions in
+    :py:mod:`solarforecastarbiter.reference_forecasts.models`.
+
+    Parameters
+    ----------
+    points : iterable of (float, float)
+        Latitude and longitude of the sites. Data for other points is
+        loaded with :py:func:`load_forecast`.
+    base_path : str or None
+        Directory of the model files. If None, use the path set by
+        :py:func:`set_base_path` at the time the files are loaded.
+    max_files : int
+        Maximum number of model files to keep the extracted data of.
+    """
+    def __init__(self, points, base_path=None, max_files=32):
+        self.points = list(dict.fromkeys(
+            (float(lat), float(lon)) for lat, lon in points))
+        self._points = set(self.points)
+        self.base_path = base_path
+        self.max_files = max_files
+        self._files = OrderedDict()
+        self._file_locks = {}
+        self._lock = threading.Lock()
+
+    def _extract(self, filepath):
+        lats, lons = np.array(self.points, dtype=float).reshape(-1, 2).T
+        parts = []
+        store_path = point_store_path(filepath)
+        if store_path.is_file():
+            with _NETCDF_LOCK, xr.open_dataset(store_path) as stored:
+                found = _find_points(stored, lats, lons)
+                parts.append(stored.isel(point=found[found >= 0]).load())
+            lats, lons = lats[found < 0], lons[found < 0]
+        if len(lats) > 0:
+            with _NETCDF_LOCK, xr.open_dataset(filepath) as ds:
+                parts.append(extract_points(ds, lats, lons).load())
+        keep = ('time', 'site_latitude', 'site_longitude', 'distance')
+        pnts = xr.concat(
+            [part.drop_vars([c for c in part.coords if c not in keep])
+             for part in parts], dim='point')
+        mapping = {k: v for k, v in CF_MAPPING.items() if k in pnts}
+        pnts = pnts[list(mapping)].rename(mapping)
+        if 'air_temperature' in pnts:
+            pnts['air_temperature'] -= 273.15  # convert Kelvin to deg C
+        index = dict(zip(zip(pnts.site_latitude.values.tolist(),
+                             pnts.site_longitude.values.tolist()),
+                         range(pnts.dims['point'])))
+        return pnts, index
+
+    def _get_points(self, filepath):
+        with self._lock:
+            if filepath in self._files:
+                self._files.move_to_end(filepath)
+                return self._files[filepath]
+            file_lock = self._file_locks.setdefault(
+                filepath, threading.Lock())
+        # only one thread extracts the points of each file
+        with file_lock:
+            with self._lock:
+                if filepath in self._files:
+                    return self._files[filepath]
+            if not filepath.is_file():
+                raise FileNotFoundError(f'{filepath} does not exist')
+            out = self._extract(filepath)
+            with self._lock:
+                self._files[filepath] = out
+                while len(self._files) > self.max_files:
+                    self._files.popitem(last=False)
+                self._file_locks.pop(filepath, None)
+        return out
+
+    def load_forecast(
+            self, latitude, longitude, init_time, start, end, model,
+            variables=('ghi', 'dni', 'dhi', 'air_temperature', 'wind_speed'),
+            base_path=None):
+        """Load NWP model data. See :py:func:`load_forecast`."""
+        base_path = base_path if base_path is not None else self.base_path
+        point = (float(latitude), float(longitude))
+        if point not in self._points:
+            return load_forecast(latitude, longitude, init_time, start, end,
+                                 model, variables=variables,
+                                 base_path=base_path)
+        pnts, index = self._get_points(
+            _model_filepath(init_time, model, base_path))
+        missing = set(variables) - set(pnts.data_vars)
+        if missing:
+            raise ValueError(f'{sorted(missing)} not found in {model}')
+        pnt = pnts.isel(point=index[point])
+        _check_distance(pnt)
+        pnt = pnt.sel(time=slice(_naive_utc(start), _naive_utc(end)))
+        return [pnt[variable].to_series().tz_localize('UTC')
+                for variable in variables]
 
 
 def tunnel_fast(latvar, lonvar, lat0, lon0, limit=None):
@@ -177,7 +504,7 @@ def tunnel_fast(latvar, lonvar, lat0, lon0, limit=None):
     delZ = np.sin(lat0_rad) - slat
     dist_sq = delX**2 + delY**2 + delZ**2
     if limit is not None:
-        dist = 6378.1 * np.sqrt(dist_sq.min())
+        dist = EARTH_RADIUS * np.sqrt(dist_sq.min())
         if dist > limit:
             raise ValueError('Maximum distance limit exceeded')
     minindex_1d = dist_sq.argmin()  # 1D index of minimum element
@@ -28,7 +28,7 @@ from requests.exceptions import HTTPError
 
 
 from solarforecastarbiter.datamodel import Site
-from solarforecastarbiter.io.api import APISession
+from solarforecastarbiter.io.api import APISession, TASK_METADATA_TTL
 from solarforecastarbiter.io.reference_observations import (
     surfrad,
     solrad,
@@ -109,7 +109,8 @@ https://bsrn.awi.de
 
 
 def get_apisession(token, base_url=None):
-    return APISession(token, base_url=base_url)
+    return APISession(token, base_url=base_url,
+                      metadata_ttl=TASK_METADATA_TTL)
 
 
 def create_site(api, site):
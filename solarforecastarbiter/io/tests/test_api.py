@@ -194,6 +194,76 @@ def test_apisession_create_site(requests_mock, single_site, site_text):
     assert new_site == single_site
 
 
+def test_apisession_metadata_cache_list_sites(requests_mock, many_sites,
+                                              many_sites_text):
+    session = api.APISession('', metadata_ttl=60)
+    matcher = re.compile(f'{session.base_url}/sites/.*')
+    mocked = requests_mock.register_uri('GET', matcher,
+                                        content=many_sites_text)
+    assert session.list_sites() == many_sites
+    assert session.list_sites() == many_sites
+    # objects in the list are also available by id
+    assert session.get_site(many_sites[0].site_id) == many_sites[0]
+    assert mocked.call_count == 1
+    session.metadata_cache.invalidate('sites')
+    assert session.list_sites() == many_sites
+    assert mocked.call_count == 2
+
+
+def test_apisession_metadata_cache_get_site(mock_get_site, get_site,
+                                            requests_mock):
+    session = api.APISession('', metadata_ttl=60)
+    site_id = '123e4567-e89b-12d3-a456-426655440002'
+    for _ in range(3):
+        site = session.get_site(site_id)
+    assert site == get_site(site_id)
+    assert requests_mock.call_count == 1
+
+
+def test_apisession_metadata_cache_ttl(mocker, requests_mock, many_sites,
+                                       many_sites_text):
+    monotonic = mocker.patch('solarforecastarbiter.io.api.time.monotonic',
+                             return_value=100.)
+    session = api.APISession('', metadata_ttl=10)
+    matcher = re.compile(f'{session.base_url}/sites/.*')
+    mocked = requests_mock.register_uri('GET', matcher,
+                                        content=many_sites_text)
+    session.list_sites()
+    monotonic.return_value = 109.
+    session.list_sites()
+    assert mocked.call_count == 1
+    monotonic.return_value = 111.
+    session.list_sites()
+    assert mocked.call_count == 2
+
+
+def test_apisession_metadata_cache_disabled(requests_mock, many_sites_text):
+    session = api.APISession('')
+    assert session.metadata_cache is None
+    matcher = re.compile(f'{session.base_url}/sites/.*')
+    mocked = requests_mock.register_uri('GET', matcher,
+                                        content=many_sites_text)
+    session.list_sites()
+    session.list_sites()
+    assert mocked.call_count == 2
+
+
+def test_apisession_metadata_cache_create_site(
+        requests_mock, single_site, site_text):
+    session = api.APISession('', metadata_ttl=60)
+    matcher = re.compile(f'{session.base_url}/sites/.*')
+    requests_mock.register_uri('POST', matcher, text=single_site.site_id)
+    requests_mock.register_uri('GET', matcher, content=b'[]')
+    assert session.list_sites() == []
+    requests_mock.register_uri('GET', matcher, content=site_text)
+    new_site = session.create_site(single_site)
+    assert session.list_sites() == [new_site]
+    assert session.get_site(new_site.site_id) == new_site
+    # one GET for each of the list and the created site
+    assert len([r for r in requests_mock.request_history
+                if r.method == 'GET']) == 2
+
+
 def test_apisession_get_observation(requests_mock, single_observation,
                                     single_observation_text, mock_get_site):
     session = api.APISession('')
@@ -673,6 +743,95 @@ def test_apisession_post_prob_forecast_constant_value_values(
     assert mocked.request_history[0].text == '{"values":[{"timestamp":"2019-01-01T13:00:00Z","value":0.0},{"timestamp":"2019-01-01T14:00:00Z","value":1.0},{"timestamp":"2019-01-01T15:00:00Z","value":2.0},{"timestamp":"2019-01-01T16:00:00Z","value":3.0},{"timestamp":"2019-01-01T17:00:00Z","value":4.0},{"timestamp":"2019-01-01T18:00:00Z","value":5.0}]}'  # NOQA
 
 
+def test_apisession_post_observation_values_packed(
+        requests_mock, observation_values):
+    session = api.APISession('', packed_values=True)
+    matcher = re.compile(f'{session.base_url}/observations/.*/values')
+    mocked = requests_mock.register_uri('POST', matcher)
+    session.post_observation_values('obsid', observation_values)
+    req = mocked.request_history[0]
+    assert req.headers['Content-Type'] == utils.PACKED_VALUES_MIMETYPE
+    out = utils.json_payload_to_observation_df(
+        utils.packed_payload_to_dict(req.body))
+    pdt.assert_frame_equal(out, observation_values)
+
+
+def test_apisession_post_forecast_values_packed_fallback(
+        requests_mock, forecast_values):
+    session = api.APISession('', packed_values=True)
+    matcher = re.compile(f'{session.base_url}/forecasts/single/.*/values')
+
+    def callback(request, context):
+        if request.headers['Content-Type'] == 'application/json':
+            context.status_code = 201
+        else:
+            context.status_code = 415
+        return ''
+
+    mocked = requests_mock.register_uri('POST', matcher, text=callback)
+    session.post_forecast_values('fxid', forecast_values)
+    assert mocked.call_count == 2
+    assert mocked.request_history[1].text.startswith('{"values":')
+    # packed payloads are not attempted again
+    session.post_forecast_values('fxid', forecast_values)
+    assert mocked.call_count == 3
+    assert mocked.request_history[2].text.startswith('{"values":')
+
+
+def test_apisession_post_forecast_values_packed_error(
+        requests_mock, forecast_values):
+    session = api.APISession('', packed_values=True)
+    matcher = re.compile(f'{session.base_url}/forecasts/single/.*/values')
+    requests_mock.register_uri('POST', matcher, status_code=400)
+    with pytest.raises(requests.exceptions.HTTPError):
+        session.post_forecast_values('fxid', forecast_values)
+
+
+@pytest.mark.parametrize('content_type', [
+    utils.PACKED_VALUES_MIMETYPE, 'application/json'])
+def test_apisession_get_observation_values_packed(
+        requests_mock, observation_values, observation_values_text,
+        content_type):
+    session = api.APISession('', packed_values=True)
+    matcher = re.compile(f'{session.base_url}/observations/.*/values')
+    if content_type == 'application/json':
+        content = observation_values_text
+    else:
+        content = utils.observation_df_to_packed_payload(observation_values)
+    mocked = requests_mock.register_uri(
+        'GET', matcher, content=content,
+        headers={'Content-Type': content_type})
+    out = session.get_observation_values(
+        'obsid', '2019-01-01T12:00:00-0700', '2019-01-01T12:25:00-0700')
+    assert mocked.last_request.headers['Accept'].startswith(
+        utils.PACKED_VALUES_MIMETYPE)
+    pdt.assert_frame_equal(out, observation_values)
+
+
+@pytest.mark.parametrize('batch_size', [1, 4, 1000])
+def test_apisession_get_observation_values_streamed(
+        requests_mock, observation_values, observation_values_text,
+        batch_size):
+    session = api.APISession('', stream_batch_size=batch_size)
+    matcher = re.compile(f'{session.base_url}/observations/.*/values')
+    requests_mock.register_uri('GET', matcher,
+                               content=observation_values_text)
+    out = session.get_observation_values(
+        'obsid', '2019-01-01T12:00:00-0700', '2019-01-01T12:25:00-0700')
+    pdt.assert_frame_equal(out, observation_values)
+
+
+def test_apisession_get_forecast_values_streamed_empty(requests_mock):
+    session = api.APISession('', stream_batch_size=10)
+    matcher = re.compile(f'{session.base_url}/forecasts/single/.*/values')
+    requests_mock.register_uri('GET', matcher,
+                               content=b'{"forecast_id": "", "values": []}')
+    out = session.get_forecast_values(
+        'fxid', '2019-01-01T12:00:00-0700', '2019-01-01T12:25:00-0700')
+    assert out.empty
+    assert isinstance(out.index, pd.DatetimeIndex)
+
+
 @pytest.mark.parametrize('match, meth', [
     ('observations', 'get_observation_values'),
     ('forecasts/single', 'get_forecast_values'),
@@ -703,6 +862,73 @@ def test_apisession_get_values(
     assert status.called
 
 
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_apisession_get_values_bulk(
+        requests_mock, single_observation, single_forecast, aggregate,
+        observation_values_text, forecast_values_text, fx_start_end,
+        max_workers):
+    session = api.APISession('', max_workers=max_workers)
+    obs_mock = requests_mock.register_uri(
+        'GET', re.compile(f'{session.base_url}/observations/.*/values'),
+        content=observation_values_text)
+    fx_mock = requests_mock.register_uri(
+        'GET', re.compile(f'{session.base_url}/forecasts/single/.*/values'),
+        content=forecast_values_text)
+    agg_mock = requests_mock.register_uri(
+        'GET', re.compile(f'{session.base_url}/aggregates/.*/values'),
+        content=observation_values_text)
+    objects = [single_observation, single_forecast, aggregate,
+               single_observation]
+    out = session.get_values_bulk(objects, *fx_start_end)
+    assert list(out.keys()) == [single_observation, single_forecast,
+                                aggregate]
+    assert obs_mock.call_count == 1
+    assert fx_mock.call_count == 1
+    assert agg_mock.call_count == 1
+    pdt.assert_frame_equal(
+        out[single_observation],
+        session.get_values(single_observation, *fx_start_end))
+    pdt.assert_series_equal(
+        out[single_forecast],
+        session.get_values(single_forecast, *fx_start_end))
+
+
+def test_apisession_get_values_bulk_windows_serial(
+        requests_mock, mocker, single_observation, single_forecast,
+        observation_values_text, forecast_values_text, fx_start_end):
+    session = api.APISession('', max_workers=4)
+    obs_mock = requests_mock.register_uri(
+        'GET', re.compile(f'{session.base_url}/observations/.*/values'),
+        content=observation_values_text)
+    requests_mock.register_uri(
+        'GET', re.compile(f'{session.base_url}/forecasts/single/.*/values'),
+        content=forecast_values_text)
+    executor = mocker.spy(api, 'ThreadPoolExecutor')
+    session.get_values_bulk([single_observation, single_forecast],
+                            *fx_start_end, request_limit='1h')
+    assert obs_mock.call_count > 1
+    # only the pool over objects, the windows of each are serial
+    assert executor.call_count == 1
+    # windows are still concurrent outside of get_values_bulk
+    session.get_values(single_observation, *fx_start_end,
+                       request_limit='1h')
+    assert executor.call_count == 2
+
+
+def test_apisession_get_values_bulk_error(
+        requests_mock, single_observation, single_forecast, fx_start_end):
+    session = api.APISession('', max_workers=2)
+    requests_mock.register_uri(
+        'GET', re.compile(f'{session.base_url}/observations/.*/values'),
+        content=b'{"values":[]}')
+    requests_mock.register_uri(
+        'GET', re.compile(f'{session.base_url}/forecasts/single/.*/values'),
+        status_code=404)
+    with pytest.raises(requests.exceptions.HTTPError):
+        session.get_values_bulk([single_observation, single_forecast],
+                                *fx_start_end)
+
+
 @pytest.fixture()
 def mock_request_fxobs(report_objects, mocker):
     report, obs, fx0, fx1, agg, fxagg = report_objects
@@ -1701,20 +1927,14 @@ def test_apisession_chunk_value_requests_fx_series(requests_mock):
     '180D',
     '90D',
 ])
-def test_apisession_chunk_value_requests_recursion(
-        mocker, requests_mock, limit):
+def test_apisession_chunk_value_requests_split(requests_mock, limit):
     session = api.APISession('')
-    mocked_get = mocker.patch.object(
-        session,
-        'chunk_value_requests',
-        side_effect=session.chunk_value_requests
-    )
     callback = value_callback(True)
     start = pd.Timestamp('2017-01-01T12:00:00-0700')
     end = pd.Timestamp('2020-01-01T12:25:00-0700')
     matcher = re.compile(
         f'{session.base_url}/forecasts/.*/values')
-    requests_mock.register_uri('GET', matcher, content=callback)
+    mocked = requests_mock.register_uri('GET', matcher, content=callback)
     session.chunk_value_requests(
         '/forecasts/single/fxid/values',
         start,
@@ -1722,10 +1942,72 @@ def test_apisession_chunk_value_requests_recursion(
         utils.json_payload_to_forecast_series,
         request_limit=limit,
     )
-    # assert number of recursive calls is the period / limit plus the
-    # original call
+    # assert number of requests is the period / limit plus the remainder
     expected_n_calls = int((end - start) / pd.Timedelta(limit)) + 1
-    assert mocked_get.call_count == expected_n_calls
+    assert mocked.call_count == expected_n_calls
+
+
+@pytest.mark.parametrize('max_workers', [None, 1, 4, 100])
+def test_apisession_chunk_value_requests_concurrent(
+        requests_mock, max_workers):
+    session = api.APISession('', max_workers=2)
+    callback = value_callback(True)
+    start = pd.Timestamp('2017-01-01T12:00:00-0700')
+    end = pd.Timestamp('2020-01-01T12:25:00-0700')
+    expected = pd.DataFrame(
+        index=pd.date_range(start, end, freq='1H', name='timestamp'),
+        data={'value': 1.0, 'quality_flag': 0},
+    )
+    expected.index.freq = None
+    matcher = re.compile(
+        f'{session.base_url}/observations/.*/values')
+    mocked = requests_mock.register_uri('GET', matcher, content=callback)
+    out = session.chunk_value_requests(
+        '/observations/obsid/values',
+        start,
+        end,
+        utils.json_payload_to_observation_df,
+        request_limit='90D',
+        max_workers=max_workers,
+    )
+    pdt.assert_frame_equal(out, expected.tz_convert('UTC'))
+    assert mocked.call_count == 13
+
+
+def test_apisession_chunk_value_requests_concurrent_error(requests_mock):
+    session = api.APISession('', max_workers=4)
+    start = pd.Timestamp('2017-01-01T12:00:00Z')
+    end = pd.Timestamp('2020-01-01T12:25:00Z')
+    matcher = re.compile(
+        f'{session.base_url}/observations/.*/values')
+    requests_mock.register_uri('GET', matcher, status_code=404)
+    with pytest.raises(requests.exceptions.HTTPError):
+        session.chunk_value_requests(
+            '/observations/obsid/values',
+            start,
+            end,
+            utils.json_payload_to_observation_df,
+            request_limit='90D',
+        )
+
+
+@pytest.mark.parametrize('start,end,limit,expected', [
+    ('2020-01-01T00:00Z', '2020-01-05T00:00Z', '365D',
+     [('2020-01-01T00:00Z', '2020-01-05T00:00Z')]),
+    ('2020-01-01T00:00Z', '2020-01-05T00:00Z', '4D',
+     [('2020-01-01T00:00Z', '2020-01-05T00:00Z')]),
+    ('2020-01-01T00:00Z', '2020-01-05T12:00Z', '2D',
+     [('2020-01-01T00:00Z', '2020-01-01T12:00Z'),
+      ('2020-01-01T12:00Z', '2020-01-03T12:00Z'),
+      ('2020-01-03T12:00Z', '2020-01-05T12:00Z')]),
+    ('2020-01-01T00:00-0700', '2020-01-05T00:00Z', '2D',
+     [('2020-01-01T00:00-0700', '2020-01-03T00:00Z'),
+      ('2020-01-03T00:00Z', '2020-01-05T00:00Z')]),
+])
+def test__split_request_range(start, end, limit, expected):
+    out = api._split_request_range(
+        pd.Timestamp(start), pd.Timestamp(end), limit)
+    assert out == [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in expected]
 
 
 @pytest.mark.parametrize('trange,gaps,exp', [
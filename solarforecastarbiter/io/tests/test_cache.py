@@ -0,0 +1,209 @@
+import re
+
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+
+from solarforecastarbiter.io import api, cache, utils
+
+
+def ts(s):
+    return pd.Timestamp(s, tz='UTC')
+
+
+@pytest.mark.parametrize('ranges,start,end,expected', [
+    ([], '2020-01-01', '2020-01-02', []),
+    ([('2020-01-01', '2020-01-05')], '2020-01-06', '2020-01-07',
+     [('2020-01-01', '2020-01-05')]),
+    ([('2020-01-01', '2020-01-05')], '2019-12-01', '2020-02-01', []),
+    ([('2020-01-01', '2020-01-05')], '2020-01-02', '2020-01-03',
+     [('2020-01-01', '2020-01-01T23:59:59.999999999'),
+      ('2020-01-03T00:00:00.000000001', '2020-01-05')]),
+    ([('2020-01-01', '2020-01-05'), ('2020-01-07', '2020-01-09')],
+     '2020-01-04', '2020-01-08',
+     [('2020-01-01', '2020-01-03T23:59:59.999999999'),
+      ('2020-01-08T00:00:00.000000001', '2020-01-09')]),
+])
+def test_subtract_range(ranges, start, end, expected):
+    out = cache.subtract_range([(ts(s), ts(e)) for s, e in ranges],
+                               ts(start), ts(end))
+    assert out == [(ts(s), ts(e)) for s, e in expected]
+
+
+def make_obs(start, end, freq='1H'):
+    index = pd.date_range(start, end, freq=freq, tz='UTC', name='timestamp')
+    index.freq = None
+    return pd.DataFrame({'value': range(len(index)), 'quality_flag': 0},
+                        index=index).astype({'value': float})
+
+
+class Fetcher:
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        return self.data.loc[start:end]
+
+
+@pytest.fixture()
+def valcache(tmp_path):
+    return cache.ValueCache(tmp_path / 'cache')
+
+
+def test_value_cache_get_values(valcache):
+    data = make_obs('2020-01-01T00:00', '2020-01-10T00:00')
+    fetch = Fetcher(data)
+    key = '/observations/obsid/values'
+    out = valcache.get_values(key, ts('2020-01-02T06:00'),
+                              ts('2020-01-04T06:00'), fetch,
+                              utils.json_payload_to_observation_df)
+    pdt.assert_frame_equal(out, data.loc['2020-01-02T06:00':
+                                         '2020-01-04T06:00'])
+    assert fetch.calls == [(ts('2020-01-02T06:00'), ts('2020-01-04T06:00'))]
+    assert valcache.coverage(key) == [
+        (ts('2020-01-02T06:00'), ts('2020-01-04T06:00'))]
+
+    # fully cached
+    out = valcache.get_values(key, ts('2020-01-03T00:00'),
+                              ts('2020-01-04T00:00'), fetch,
+                              utils.json_payload_to_observation_df)
+    pdt.assert_frame_equal(out, data.loc['2020-01-03T00:00':
+                                         '2020-01-04T00:00'])
+    assert len(fetch.calls) == 1
+
+    # only missing ranges requested
+    out = valcache.get_values(key, ts('2020-01-01T00:00'),
+                              ts('2020-01-05T00:00'), fetch,
+                              utils.json_payload_to_observation_df)
+    pdt.assert_frame_equal(out, data.loc['2020-01-01T00:00':
+                                         '2020-01-05T00:00'])
+    assert fetch.calls[1:] == [
+        (ts('2020-01-01T00:00'), ts('2020-01-02T05:59:59.999999999')),
+        (ts('2020-01-04T06:00:00.000000001'), ts('2020-01-05T00:00'))]
+    assert valcache.coverage(key) == [
+        (ts('2020-01-01T00:00'), ts('2020-01-05T00:00'))]
+
+
+def test_value_cache_get_values_series(valcache):
+    data = make_obs('2020-01-01T00:00', '2020-01-03T00:00')['value']
+    fetch = Fetcher(data)
+    key = '/forecasts/single/fxid/values'
+    for _ in range(2):
+        out = valcache.get_values(key, ts('2020-01-01T00:00'),
+                                  ts('2020-01-03T00:00'), fetch,
+                                  utils.json_payload_to_forecast_series)
+        pdt.assert_series_equal(out, data)
+    assert len(fetch.calls) == 1
+
+
+def test_value_cache_coverage_ends_with_data(valcache):
+    data = make_obs('2020-01-01T00:00', '2020-01-02T00:00')
+    fetch = Fetcher(data)
+    key = 'key'
+    valcache.get_values(key, ts('2020-01-01T00:00'), ts('2020-01-03T00:00'),
+                        fetch, utils.json_payload_to_observation_df)
+    assert valcache.coverage(key) == [
+        (ts('2020-01-01T00:00'), ts('2020-01-02T00:00'))]
+    valcache.get_values(key, ts('2020-01-01T00:00'), ts('2020-01-03T00:00'),
+                        fetch, utils.json_payload_to_observation_df)
+    assert fetch.calls[1] == (ts('2020-01-02T00:00:00.000000001'),
+                              ts('2020-01-03T00:00'))
+
+
+def test_value_cache_empty(valcache):
+    fetch = Fetcher(make_obs('2020-01-01T00:00', '2020-01-02T00:00'))
+    out = valcache.get_values('key', ts('2020-02-01T00:00'),
+                              ts('2020-02-03T00:00'), fetch,
+                              utils.json_payload_to_observation_df)
+    assert out.empty
+    assert list(out.columns) == ['value', 'quality_flag']
+    assert valcache.coverage('key') == []
+    assert valcache.size == 0
+
+
+def test_value_cache_write_replaces(valcache):
+    data = make_obs('2020-01-01T00:00', '2020-01-02T00:00')
+    valcache.write('key', data, ts('2020-01-01T00:00'),
+                   ts('2020-01-02T00:00'))
+    new = data.loc['2020-01-01T10:00':'2020-01-01T12:00'] * 2
+    valcache.write('key', new, ts('2020-01-01T10:00'),
+                   ts('2020-01-01T12:00'))
+    expected = data.copy()
+    expected.loc[new.index] = new
+    out = utils.json_payload_to_observation_df(
+        valcache.read('key', ts('2020-01-01T00:00'), ts('2020-01-02T00:00')))
+    pdt.assert_frame_equal(out, expected)
+
+
+def test_value_cache_invalidate(valcache):
+    data = make_obs('2020-01-01T00:00', '2020-01-05T00:00')
+    valcache.write('key', data, ts('2020-01-01T00:00'),
+                   ts('2020-01-05T00:00'))
+    valcache.write('other', data, ts('2020-01-01T00:00'),
+                   ts('2020-01-05T00:00'))
+    valcache.invalidate('key', ts('2020-01-02T12:00'), ts('2020-01-03T12:00'))
+    assert valcache.coverage('key') == [
+        (ts('2020-01-01T00:00'), ts('2020-01-01T23:59:59.999999999')),
+        (ts('2020-01-04T00:00'), ts('2020-01-05T00:00'))]
+    out = utils.json_payload_to_observation_df(
+        valcache.read('key', ts('2020-01-01T00:00'), ts('2020-01-05T00:00')))
+    assert out.index.floor('1D').nunique() == 3
+    valcache.invalidate('key')
+    assert valcache.coverage('key') == []
+    assert valcache.read('key', ts('2020-01-01T00:00'),
+                         ts('2020-01-05T00:00'))['values'].empty
+    assert len(valcache.coverage('other')) == 1
+
+
+def test_value_cache_evict(tmp_path):
+    data = make_obs('2020-01-01T00:00', '2020-01-04T23:00')
+    valcache = cache.ValueCache(tmp_path, max_size=10**6)
+    valcache.write('key', data, ts('2020-01-01T00:00'),
+                   ts('2020-01-04T23:00'))
+    day_size = valcache.size // 4
+    # use the first day so that it is most recently used
+    valcache.read('key', ts('2020-01-01T00:00'), ts('2020-01-01T12:00'))
+    valcache.max_size = 2 * day_size
+    valcache.evict()
+    assert valcache.size == 2 * day_size
+    assert valcache.coverage('key') == [
+        (ts('2020-01-01T00:00'), ts('2020-01-01T23:59:59.999999999')),
+        (ts('2020-01-04T00:00'), ts('2020-01-04T23:00'))]
+    assert len(list(tmp_path.glob('*/*.sfav'))) == 2
+
+
+def test_value_cache_persists(tmp_path):
+    data = make_obs('2020-01-01T00:00', '2020-01-02T00:00')
+    valcache = cache.ValueCache(tmp_path)
+    valcache.write('key', data, ts('2020-01-01T00:00'),
+                   ts('2020-01-02T00:00'))
+    new_cache = cache.ValueCache(tmp_path)
+    assert new_cache.size == valcache.size
+    assert new_cache.coverage('key') == valcache.coverage('key')
+    out = utils.json_payload_to_observation_df(new_cache.read(
+        'key', ts('2020-01-01T00:00'), ts('2020-01-02T00:00')))
+    pdt.assert_frame_equal(out, data)
+
+
+def test_apisession_value_cache(requests_mock, tmp_path, observation_values,
+                                observation_values_text):
+    session = api.APISession('', value_cache=cache.ValueCache(tmp_path))
+    matcher = re.compile(f'{session.base_url}/observations/.*/values')
+    get = requests_mock.register_uri('GET', matcher,
+                                     content=observation_values_text)
+    post = requests_mock.register_uri('POST', matcher)
+    start = '2019-01-01T12:00:00-0700'
+    end = '2019-01-01T12:25:00-0700'
+    for _ in range(2):
+        out = session.get_observation_values('obsid', start, end)
+        pdt.assert_frame_equal(out, observation_values)
+    assert get.call_count == 1
+    session.post_observation_values('obsid', observation_values)
+    assert post.call_count == 1
+    out = session.get_observation_values('obsid', start, end)
+    pdt.assert_frame_equal(out, observation_values)
+    assert get.call_count == 2
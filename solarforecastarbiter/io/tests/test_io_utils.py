@@ -103,6 +103,88 @@ def test_empty_payload_to_forecast_series():
     assert isinstance(out.index, pd.DatetimeIndex)
 
 
+@pytest.mark.parametrize('timestamps', [
+    ['2019-01-01T12:00:00Z', '2019-01-01T12:05:00Z', '2020-02-29T23:59:59Z'],
+    ['1970-01-01T00:00:00Z'],
+])
+def test__parse_fixed_utc_timestamps(timestamps):
+    out = utils._parse_fixed_utc_timestamps(timestamps)
+    expected = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True),
+                                name='timestamp')
+    pdt.assert_index_equal(out, expected)
+
+
+@pytest.mark.parametrize('timestamps', [
+    ['2019-01-01T12:00:00Z', '2019-01-01T12:05:00-0700'],
+    ['2019-01-01T12:00:00+00:00'],
+    ['2019-01-01 12:00:00Z'],
+    ['2019-02-30T12:00:00Z'],
+    ['2019-01-01T25:00:00Z'],
+    ['2019-01-0aT12:00:00Z'],
+    ['2019-01-01T12:00:00Z', None],
+    ['2019-01-01T12:00:00Z', '2019-01-01T12:00:00\u00e9'],
+])
+def test__parse_fixed_utc_timestamps_fallback(timestamps):
+    assert utils._parse_fixed_utc_timestamps(timestamps) is None
+
+
+def test_json_payload_to_observation_df_fixed_timestamps(
+        observation_values):
+    payload = json.loads(utils.observation_df_to_json_payload(
+        observation_values))
+    assert payload['values'][0]['timestamp'].endswith('Z')
+    out = utils.json_payload_to_observation_df(payload)
+    pdt.assert_frame_equal(out, observation_values)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 10000])
+@pytest.mark.parametrize('batch_size,lengths', [
+    (1, [1] * 6),
+    (4, [4, 2]),
+    (6, [6]),
+    (100, [6]),
+])
+def test_iter_json_payload_batches(observation_values_text, chunk_size,
+                                   batch_size, lengths):
+    text = observation_values_text.decode()
+    chunks = [text[i:i + chunk_size]
+              for i in range(0, len(text), chunk_size)]
+    out = list(utils.iter_json_payload_batches(chunks, batch_size))
+    assert [len(p['values']) for p in out] == lengths
+    expected = json.loads(text)['values']
+    assert [v for p in out for v in p['values']] == expected
+
+
+@pytest.mark.parametrize('text', [
+    '{"values": []}',
+    ' { } ',
+    '{"values": [], "after": {"values": [1, 2]}}',
+    '{"before": [1, 2.5, null, "]"], "values": []}',
+])
+def test_iter_json_payload_batches_empty(text):
+    out = list(utils.iter_json_payload_batches(iter(text), 2))
+    assert out == [{'values': []}]
+
+
+def test_iter_json_payload_batches_numbers():
+    text = '{"values": [10.25, 1e3, 123456], "other": 98765}'
+    out = list(utils.iter_json_payload_batches(iter(text), 2))
+    assert out == [{'values': [10.25, 1e3]}, {'values': [123456]}]
+
+
+@pytest.mark.parametrize('text', [
+    '',
+    '[]',
+    '{"values": [{"value": 1}',
+    '{"values": [{"value": 1} {"value": 2}]}',
+    '{"values" [1]}',
+    '{"values": [1], "a": }',
+])
+def test_iter_json_payload_batches_invalid(text):
+    with pytest.raises(ValueError):
+        list(utils.iter_json_payload_batches(iter(text), 2))
+
+
 def test_null_json_payload_to_observation_df():
     observation_values_text = b"""
 {
@@ -165,6 +247,78 @@ def test_null_json_payload_to_forecast_series():
     pdt.assert_series_equal(out, forecast_values)
 
 
+@pytest.mark.parametrize('dump_quality,default_flag,flag_value', [
+    (False, None, [1, 1, 9, 5, 2]),
+    (True, 2, [2] * 5)
+])
+def test_obs_df_to_packed_roundtrip(dump_quality, default_flag, flag_value):
+    td = TEST_DATA.copy()
+    if dump_quality:
+        del td['quality_flag']
+    converted = utils.observation_df_to_packed_payload(td, default_flag)
+    assert isinstance(converted, bytes)
+    out = utils.json_payload_to_observation_df(
+        utils.packed_payload_to_dict(converted))
+    expected = TEST_DATA.copy()
+    expected['quality_flag'] = flag_value
+    pdt.assert_frame_equal(out, expected)
+
+
+def test_obs_df_to_packed_no_quality():
+    td = TEST_DATA.copy()
+    del td['quality_flag']
+    with pytest.raises(KeyError):
+        utils.observation_df_to_packed_payload(td)
+
+
+def test_packed_payload_to_observation_df_no_flags():
+    packed = utils.forecast_object_to_packed_payload(TEST_DATA['value'])
+    with pytest.raises(ValueError, match='must include quality flags'):
+        utils.json_payload_to_observation_df(
+            utils.packed_payload_to_dict(packed))
+
+
+def test_empty_packed_payload_to_observation_df_no_flags():
+    packed = utils.forecast_object_to_packed_payload(EMPTY_TIMESERIES)
+    out = utils.json_payload_to_observation_df(
+        utils.packed_payload_to_dict(packed))
+    assert out.empty
+    assert list(out.columns) == ['value', 'quality_flag']
+    assert out.dtypes['quality_flag'] == int
+
+
+def test_forecast_series_to_packed_roundtrip():
+    series = pd.Series([0, 1, np.nan, 3, 4], index=pd.date_range(
+        start='2019-01-01T05:00-0700', freq='5min', periods=5))
+    packed = utils.forecast_object_to_packed_payload(series)
+    out = utils.json_payload_to_forecast_series(
+        utils.packed_payload_to_dict(packed))
+    expected = series.astype(float).tz_convert('UTC').rename('value')
+    expected.index.name = 'timestamp'
+    expected.index.freq = None
+    pdt.assert_series_equal(out, expected)
+
+
+def test_empty_packed_payload_to_forecast_series():
+    packed = utils.forecast_object_to_packed_payload(EMPTY_TIMESERIES)
+    out = utils.json_payload_to_forecast_series(
+        utils.packed_payload_to_dict(packed))
+    assert out.empty
+    assert isinstance(out.index, pd.DatetimeIndex)
+
+
+@pytest.mark.parametrize('content', [
+    b'',
+    b'SFAV',
+    b'JUNK' + bytes(12),
+    utils.forecast_object_to_packed_payload(
+        TEST_DATA['value'])[:-1],
+])
+def test_packed_payload_to_dict_invalid(content):
+    with pytest.raises(ValueError):
+        utils.packed_payload_to_dict(content)
+
+
 @pytest.mark.parametrize('label,exp,start,end', [
     ('instant', TEST_DATA, None, None),
     (None, TEST_DATA, None, None),
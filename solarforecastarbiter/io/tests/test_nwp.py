@@ -1,7 +1,11 @@
 from pathlib import Path
+import shutil
 
 
 import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
 import xarray as xr
 
 
@@ -54,3 +58,176 @@ def test_load_pnt_xy():
     pnt = nwp._load_pnt(ds, 32.05, -110.4, 500)
     assert (pnt.latitude - 32.049805) < 1e-6
     assert (pnt.longitude - 249.60938) < 1e-6
+
+
+def test_grid_index_query():
+    lats = np.linspace(24, 50, 53)
+    lons = np.linspace(-126, -66, 121)
+    lon2d, lat2d = np.meshgrid(lons, lats)
+    index = nwp.GridIndex(lats, lons)
+    site_lats = np.array([32.22, 40.01, 24.1, 49.9])
+    site_lons = np.array([-110.9, -105.2, -80.0, -66.3])
+    iy, ix = index.query(site_lats, site_lons, limit=500)
+    for i, (lat, lon) in enumerate(zip(site_lats, site_lons)):
+        assert (iy[i], ix[i]) == nwp.tunnel_fast(lat2d, lon2d, lat, lon)
+    assert nwp.GridIndex(lat2d, lon2d).query(32.22, -110.9) == (
+        nwp.tunnel_fast(lat2d, lon2d, 32.22, -110.9))
+
+
+def test_grid_index_query_limit():
+    index = nwp.GridIndex(np.array([32.0, 32.25]), np.array([-111.0, -110.75]))
+    with pytest.raises(ValueError):
+        index.query([32.0, 40.0], [-111.0, -111.0], limit=500)
+    iy, ix = index.query([32.0, 40.0], [-111.0, -111.0])
+    assert list(iy) == [0, 1]
+
+
+def test_get_grid_index():
+    lats = np.array([32.0, 32.25, 32.5])
+    lons = np.array([-111.0, -110.75])
+    index = nwp.get_grid_index(lats, lons)
+    assert nwp.get_grid_index(lats.copy(), lons.copy()) is index
+    assert nwp.get_grid_index(lats + 1, lons) is not index
+
+
+def test_get_grid_index_differs_in_one_point():
+    lats, lons = np.meshgrid(np.linspace(30, 40, 60),
+                             np.linspace(-120, -100, 50), indexing='ij')
+    index = nwp.get_grid_index(lats, lons)
+    other_lats = lats.copy()
+    other_lats[0, 1] += 0.5
+    other = nwp.get_grid_index(other_lats, lons)
+    assert other is not index
+    assert other.query(other_lats[0, 1], lons[0, 1]) == (0, 1)
+
+
+def test_get_grid_index_repeated_lookup(mocker):
+    lats, lons = np.meshgrid(np.linspace(20, 30, 60),
+                             np.linspace(-90, -70, 50), indexing='ij')
+    build = mocker.spy(nwp, 'GridIndex')
+    sha1 = mocker.patch('hashlib.sha1')
+    index = nwp.get_grid_index(lats, lons)
+    for _ in range(3):
+        assert nwp.get_grid_index(lats, lons) is index
+        assert nwp.get_grid_index(lats.copy(), lons.copy()) is index
+    assert build.call_count == 1
+    assert not sha1.called
+
+
+@pytest.mark.parametrize('model', [
+    'hrrr_subhourly', 'hrrr_hourly', 'rap', 'nam_12km', 'gefs_c00'])
+def test_batch_loader_load_forecast(model):
+    init_time = pd.Timestamp('20190515T0000Z')
+    start = pd.Timestamp('20190515T0100Z')
+    end = pd.Timestamp('20190515T1200Z')
+    variables = ('air_temperature', 'wind_speed')
+    points = [(32.2, -110.9), (32.3, -110.7), (32.4, -110.1)]
+    loader = nwp.BatchLoader(points, base_path=BASE_PATH)
+    for lat, lon in points:
+        expected = nwp.load_forecast(lat, lon, init_time, start, end, model,
+                                     variables=variables, base_path=BASE_PATH)
+        out = loader.load_forecast(lat, lon, init_time, start, end, model,
+                                   variables=variables)
+        for exp, ser in zip(expected, out):
+            pdt.assert_series_equal(ser, exp)
+    assert len(loader._files) == 1
+
+
+def test_batch_loader_fallback(mocker):
+    load = mocker.patch.object(nwp, 'load_forecast')
+    loader = nwp.BatchLoader([(32.2, -110.9)], base_path=BASE_PATH)
+    init_time = pd.Timestamp('20190515T0000Z')
+    loader.load_forecast(36.0, -100.0, init_time, init_time, init_time,
+                         'rap')
+    load.assert_called_once()
+    assert len(loader._files) == 0
+
+
+def test_batch_loader_errors():
+    loader = nwp.BatchLoader([(32.2, -110.9), (45.0, -80.0)],
+                             base_path=BASE_PATH, max_files=1)
+    init_time = pd.Timestamp('20190515T0000Z')
+    with pytest.raises(FileNotFoundError):
+        loader.load_forecast(32.2, -110.9, init_time, init_time, init_time,
+                             'hrrr_subhourly_nope')
+    with pytest.raises(ValueError):
+        loader.load_forecast(45.0, -80.0, init_time, init_time, init_time,
+                             'rap')
+    with pytest.raises(ValueError):
+        loader.load_forecast(32.2, -110.9, init_time, init_time, init_time,
+                             'rap', variables=('ghi',))
+    loader.load_forecast(32.2, -110.9, init_time, init_time, init_time,
+                         'nam_12km', variables=('wind_speed',))
+    assert len(loader._files) == 1
+
+
+@pytest.fixture()
+def rap_with_point_store(tmp_path):
+    init_time = pd.Timestamp('20190515T0000Z')
+    src = nwp._model_filepath(init_time, 'rap', BASE_PATH)
+    dst = nwp._model_filepath(init_time, 'rap', tmp_path)
+    dst.parent.mkdir(parents=True)
+    shutil.copy(src, dst)
+    with xr.open_dataset(dst) as ds:
+        pnts = nwp.extract_points(ds, [32.2, 40.0], [-110.9, -80.0])
+        pnts.to_netcdf(nwp.point_store_path(dst))
+    return tmp_path
+
+
+def test_extract_points():
+    with xr.open_dataset(BASE_PATH / 'rap/2019/05/15/00/rap.nc') as ds:
+        pnts = nwp.extract_points(ds, [32.2, 32.4], [-110.9, -110.1])
+        for i, (lat, lon) in enumerate([(32.2, -110.9), (32.4, -110.1)]):
+            pnt = nwp._load_pnt(ds, lat, lon, 500)
+            xr.testing.assert_equal(
+                pnts.isel(point=i).t2m.reset_coords(drop=True),
+                pnt.t2m.reset_coords(drop=True))
+    assert list(pnts.site_longitude.values) == [-110.9, -110.1]
+    assert (pnts.distance < 50).all()
+
+
+def test_load_forecast_point_store(rap_with_point_store, mocker):
+    init_time = pd.Timestamp('20190515T0000Z')
+    start = pd.Timestamp('20190515T0100Z')
+    end = pd.Timestamp('20190515T1200Z')
+    variables = ('air_temperature', 'wind_speed')
+    expected = nwp.load_forecast(32.2, -110.9, init_time, start, end, 'rap',
+                                 variables=variables, base_path=BASE_PATH)
+    load_pnt = mocker.spy(nwp, '_load_pnt')
+    out = nwp.load_forecast(32.2, -110.9, init_time, start, end, 'rap',
+                            variables=variables,
+                            base_path=rap_with_point_store)
+    for exp, ser in zip(expected, out):
+        pdt.assert_series_equal(ser, exp)
+    assert load_pnt.call_count == 0
+    with pytest.raises(ValueError):
+        nwp.load_forecast(40.0, -80.0, init_time, start, end, 'rap',
+                          variables=variables,
+                          base_path=rap_with_point_store)
+    # not in the store
+    nwp.load_forecast(32.4, -110.1, init_time, start, end, 'rap',
+                      variables=variables, base_path=rap_with_point_store)
+    assert load_pnt.call_count == 1
+
+
+def test_batch_loader_point_store(rap_with_point_store, mocker):
+    init_time = pd.Timestamp('20190515T0000Z')
+    start = pd.Timestamp('20190515T0100Z')
+    end = pd.Timestamp('20190515T1200Z')
+    variables = ('air_temperature', 'wind_speed')
+    points = [(32.2, -110.9), (32.4, -110.1), (40.0, -80.0)]
+    extract = mocker.spy(nwp, 'extract_points')
+    loader = nwp.BatchLoader(points, base_path=rap_with_point_store)
+    for lat, lon in points[:2]:
+        expected = nwp.load_forecast(lat, lon, init_time, start, end, 'rap',
+                                     variables=variables, base_path=BASE_PATH)
+        out = loader.load_forecast(lat, lon, init_time, start, end, 'rap',
+                                   variables=variables)
+        for exp, ser in zip(expected, out):
+            pdt.assert_series_equal(ser, exp)
+    with pytest.raises(ValueError):
+        loader.load_forecast(40.0, -80.0, init_time, start, end, 'rap',
+                             variables=variables)
+    # only the point missing from the store is extracted from the grid
+    assert extract.call_count == 1
+    assert list(extract.call_args[0][1]) == [32.4]
@@ -6,11 +6,25 @@ from functools import wraps
 from inspect import signature
 import json
 import re
+import struct
 
 
+import numpy as np
 import pandas as pd
 
 
+# Content type of the packed binary format for time series values. The
+# payload is a fixed header followed by little-endian columnar arrays of
+# int64 nanosecond UTC timestamps, float64 values, and optionally int32
+# quality flags.
+PACKED_VALUES_MIMETYPE = (
+    'application/vnd.solarforecastarbiter.values+octet-stream')
+# magic, version, has quality_flag column, 2 pad bytes, number of values
+_PACKED_HEADER = struct.Struct('<4sBBxxQ')
+_PACKED_MAGIC = b'SFAV'
+_PACKED_VERSION = 1
+
+
 def _dataframe_to_json(payload_df):
     payload_df.index.name = 'timestamp'
     json_vals = payload_df.tz_convert("UTC").reset_index().to_json(
@@ -61,12 +75,17 @@ def observation_df_to_json_payload(
        When 'value' is missing from the columns or 'quality_flag'
        is missing and default_quality_flag is None
     """
+    payload_df = _observation_payload_df(observation_df, default_quality_flag)
+    return _dataframe_to_json(payload_df)
+
+
+def _observation_payload_df(observation_df, default_quality_flag):
     if default_quality_flag is None:
         payload_df = observation_df[['value', 'quality_flag']]
     else:
         payload_df = observation_df[['value']]
         payload_df['quality_flag'] = int(default_quality_flag)
-    return _dataframe_to_json(payload_df)
+    return payload_df
 
 
 def forecast_object_to_json(forecast_series):
@@ -89,23 +108,311 @@ def forecast_object_to_json(forecast_series):
     return _dataframe_to_json(payload_df)
 
 
+def _dataframe_to_packed(payload_df):
+    has_flag = 'quality_flag' in payload_df.columns
+    timestamps = payload_df.index.tz_convert('UTC').asi8
+    header = _PACKED_HEADER.pack(
+        _PACKED_MAGIC, _PACKED_VERSION, has_flag, len(payload_df))
+    parts = [header,
+             timestamps.astype('<i8').tobytes(),
+             payload_df['value'].to_numpy(dtype='<f8').tobytes()]
+    if has_flag:
+        parts.append(
+            payload_df['quality_flag'].to_numpy(dtype='<i4').tobytes())
+    return b''.join(parts)
+
+
+def observation_df_to_packed_payload(
+        observation_df, default_quality_flag=None):
+    """Formats an observation DataFrame into the packed binary payload for
+    posting to the Solar Forecast Arbiter API. The packed payload is an
+    alternative to the JSON payload of
+    :py:func:`observation_df_to_json_payload` with content type
+    ``PACKED_VALUES_MIMETYPE``.
+
+    Parameters
+    ----------
+    observation_df : DataFrame
+        Dataframe of observation data. Must contain a tz-aware DateTimeIndex
+        and a 'value' column. May contain a column of data quality
+        flags labeled 'quality_flag'.
+    default_quality_flag : int
+        If 'quality_flag' is not a column, the quality flag for each row is
+        set to this value.
+
+    Returns
+    -------
+    bytes
+
+    Raises
+    ------
+    KeyError
+       When 'value' is missing from the columns or 'quality_flag'
+       is missing and default_quality_flag is None
+    """
+    payload_df = _observation_payload_df(observation_df, default_quality_flag)
+    return _dataframe_to_packed(payload_df)
+
+
+def forecast_object_to_packed_payload(forecast_series):
+    """
+    Converts a forecast Series to the packed binary payload to post to the
+    SolarForecastArbiter API.
+
+    Parameters
+    ----------
+    forecast_series : pandas.Series
+        The series that contains the forecast values with a
+        datetime index.
+
+    Returns
+    -------
+    bytes
+    """
+    payload_df = forecast_series.to_frame('value')
+    return _dataframe_to_packed(payload_df)
+
+
+def packed_payload_to_dict(content):
+    """
+    Convert a packed binary payload, as returned by the API when values
+    are requested with content type ``PACKED_VALUES_MIMETYPE``, into a
+    payload dict that may be passed to
+    :py:func:`json_payload_to_observation_df` or
+    :py:func:`json_payload_to_forecast_series`.
+
+    Parameters
+    ----------
+    content : bytes
+
+    Returns
+    -------
+    dict
+        With a "values" key that is a DataFrame with a tz-aware
+        DatetimeIndex and 'value' and possibly 'quality_flag' columns.
+
+    Raises
+    ------
+    ValueError
+        If content is not a valid packed payload
+    """
+    if len(content) < _PACKED_HEADER.size:
+        raise ValueError('Packed payload is too short')
+    magic, version, has_flag, length = _PACKED_HEADER.unpack_from(content)
+    if magic != _PACKED_MAGIC or version != _PACKED_VERSION:
+        raise ValueError('Unrecognized packed payload format')
+    expected_size = _PACKED_HEADER.size + length * (16 + 4 * has_flag)
+    if len(content) != expected_size:
+        raise ValueError('Packed payload length does not match header')
+    offset = _PACKED_HEADER.size
+    timestamps = np.frombuffer(content, dtype='<i8', count=length,
+                               offset=offset)
+    offset += 8 * length
+    data = {'value': np.frombuffer(content, dtype='<f8', count=length,
+                                   offset=offset).astype(float)}
+    offset += 8 * length
+    if has_flag:
+        data['quality_flag'] = np.frombuffer(
+            content, dtype='<i4', count=length, offset=offset).astype(int)
+    index = pd.DatetimeIndex(timestamps.astype('datetime64[ns]'),
+                             name='timestamp').tz_localize('UTC')
+    return {'values': pd.DataFrame(data, index=index)}
+
+
+# layout of timestamps like 2019-01-01T12:00:00Z as returned by the API
+_FIXED_TIMESTAMP_LEN = 20
+_FIXED_TIMESTAMP_SEPARATORS = np.frombuffer(b'--T::Z', dtype=np.uint8)
+_FIXED_TIMESTAMP_SEPARATOR_POS = [4, 7, 10, 13, 16, 19]
+_FIXED_TIMESTAMP_DIGIT_POS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+_DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def _parse_fixed_utc_timestamps(timestamps):
+    """Vectorized parsing of timestamps that all have the form
+    YYYY-MM-DDTHH:MM:SSZ, as returned by the API, into a UTC
+    DatetimeIndex. Returns None if any timestamp has another form
+    or is invalid so that the caller may fall back to
+    pandas.to_datetime."""
+    try:
+        buf = ''.join(timestamps).encode('ascii')
+    except (TypeError, UnicodeEncodeError):
+        return None
+    nts = len(timestamps)
+    if len(buf) != nts * _FIXED_TIMESTAMP_LEN:
+        return None
+    chars = np.frombuffer(buf, dtype=np.uint8).reshape(
+        nts, _FIXED_TIMESTAMP_LEN)
+    if not (chars[:, _FIXED_TIMESTAMP_SEPARATOR_POS] ==
+            _FIXED_TIMESTAMP_SEPARATORS).all():
+        return None
+    digits = chars[:, _FIXED_TIMESTAMP_DIGIT_POS].astype(np.int64) - ord('0')
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+    year = digits[:, :4] @ np.array([1000, 100, 10, 1])
+    month, day, hour, minute, second = (
+        digits[:, 4::2] * 10 + digits[:, 5::2]).T
+    if ((month < 1) | (month > 12) | (hour > 23) | (minute > 59) |
+            (second > 59)).any():
+        return None
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = _DAYS_IN_MONTH[month - 1] + (leap & (month == 2))
+    if ((day < 1) | (day > days_in_month)).any():
+        return None
+    days = (
+        (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') +
+        (month - 1)).astype('datetime64[D]') + (day - 1)
+    seconds = (days.astype('datetime64[s]').view('int64') +
+               hour * 3600 + minute * 60 + second)
+    return pd.DatetimeIndex((seconds * 10**9).view('datetime64[ns]'),
+                            name='timestamp').tz_localize('UTC')
+
+
 def _json_to_dataframe(json_payload):
     # in the future, might worry about reading the response in chunks
     # to stream the data and avoid having it all in memory at once,
-    # but 30 days of 1 minute data is probably ~4 MB of text. A better
-    # approach would probably be to switch to a binary format.
+    # but 30 days of 1 minute data is probably ~4 MB of text.
     vals = json_payload['values']
-    if len(vals) == 0:
+    if isinstance(vals, pd.DataFrame):
+        # already columnar, e.g. from packed_payload_to_dict
+        df = vals
+    elif len(vals) == 0:
         df = pd.DataFrame([], columns=['value', 'quality_flag'],
                           index=pd.DatetimeIndex([], name='timestamp',
                                                  tz='UTC'))
     else:
-        df = pd.DataFrame.from_dict(json_payload['values'])
-        df.index = pd.to_datetime(df['timestamp'], utc=True,
-                                  infer_datetime_format=True)
+        # build columns directly instead of a DataFrame of records
+        columns = {key: [v.get(key) for v in vals]
+                   for key in vals[0].keys()}
+        timestamps = columns.pop('timestamp')
+        index = _parse_fixed_utc_timestamps(timestamps)
+        if index is None:
+            index = pd.DatetimeIndex(
+                pd.to_datetime(timestamps, utc=True,
+                               infer_datetime_format=True),
+                name='timestamp')
+        df = pd.DataFrame(columns, index=index)
     return df
 
 
+_JSON_WHITESPACE = ' \t\n\r'
+_JSON_DELIMITERS = _JSON_WHITESPACE + ',:]}'
+
+
+def iter_json_payload_batches(chunks, batch_size):
+    """
+    Incrementally parse a JSON payload with a "values" list, as returned
+    by the API values endpoints, from an iterable of text chunks. Payloads
+    with at most batch_size of the values are yielded as the values are
+    parsed so that the whole response never needs to be held in memory.
+
+    Parameters
+    ----------
+    chunks : iterable of str
+        Consecutive pieces of the JSON text, e.g. from
+        requests.Response.iter_content
+    batch_size : int
+        Maximum number of values in each yielded payload
+
+    Yields
+    ------
+    dict
+        With a "values" key that is a list of at most batch_size dicts.
+        Other keys of the payload are ignored. At least one payload,
+        which may have empty values, is always yielded.
+
+    Raises
+    ------
+    ValueError
+        If the text is not a valid JSON object
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buf = ''
+    pos = 0
+    exhausted = False
+
+    def _fill():
+        # read another chunk, dropping the parsed part of the buffer
+        nonlocal buf, pos, exhausted
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            exhausted = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def _next_char():
+        # skip whitespace and return next char without consuming it
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _JSON_WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not _fill():
+                raise ValueError('Unexpected end of JSON payload')
+
+    def _decode():
+        # decode the next complete JSON value. A value that is not
+        # followed by a delimiter may be a truncated number like 1 of
+        # 1e3, so wait for more text in that case
+        nonlocal pos
+        _next_char()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not _fill():
+                    raise ValueError('Invalid JSON payload')
+                continue
+            if ((end == len(buf) or buf[end] not in _JSON_DELIMITERS) and
+                    not exhausted and _fill()):
+                continue
+            pos = end
+            return obj
+
+    def _expect(char):
+        nonlocal pos
+        if _next_char() != char:
+            raise ValueError(f'Invalid JSON payload, expected {char}')
+        pos += 1
+
+    _expect('{')
+    yielded = False
+    batch = []
+    if _next_char() == '}':
+        pos += 1
+    else:
+        while True:
+            key = _decode()
+            _expect(':')
+            if key == 'values':
+                _expect('[')
+                if _next_char() == ']':
+                    pos += 1
+                else:
+                    while True:
+                        batch.append(_decode())
+                        if len(batch) >= batch_size:
+                            yield {'values': batch}
+                            yielded = True
+                            batch = []
+                        if _next_char() == ']':
+                            pos += 1
+                            break
+                        _expect(',')
+            else:
+                _decode()
+            if _next_char() == '}':
+                pos += 1
+                break
+            _expect(',')
+    if batch or not yielded:
+        yield {'values': batch}
+
+
 def json_payload_to_observation_df(json_payload):
     """
     Convert the JSON payload dict as returned by the SolarForecastArbiter API
@@ -123,8 +430,20 @@ def json_payload_to_observation_df(json_payload):
     pandas.DataFrame
        With a tz-aware DatetimeIndex and ['value', 'quality_flag'] columns
        and dtypes {'value': float, 'quality_flag': int}
+
+    Raises
+    ------
+    ValueError
+       If the payload has values without quality flags, e.g. a packed
+       payload from :py:func:`packed_payload_to_dict` without flags
     """
     df = _json_to_dataframe(json_payload)
+    if 'quality_flag' not in df.columns:
+        if len(df) != 0:
+            raise ValueError(
+                'Observation payloads must include quality flags')
+        df = df.assign(quality_flag=pd.Series([], index=df.index,
+                                              dtype=int))
     return df[['value', 'quality_flag']].astype(
         {'value': float, 'quality_flag': int})
 
@@ -201,32 +201,45 @@ def calculate_deterministic_metrics(processed_fx_obs, categories, metrics):
     if processed_fx_obs.interval_label == "ending":
         df.index -= pd.Timedelta("1ns")
 
+    # metrics that can be computed from sums over each group are
+    # evaluated for all groups at once, others are called per group
+    grouped_metrics = [m for m in metrics if m in _GROUPED_DETERMINISTIC]
+    other_metrics = [m for m in metrics if m not in _GROUPED_DETERMINISTIC]
+
     metric_vals = []
     # Calculate metrics
     for category in set(categories):
-        index_category = _index_category(category, df)
-
-        # Calculate each metric
-        for metric_ in metrics:
-
+        codes, labels = _group_codes(category, df)
+
+        # Change category label of the groups from numbers
+        # to e.g. January or Monday
+        if category == 'month':
+            labels = [calendar.month_abbr[cat] for cat in labels]
+        elif category == 'weekday':
+            labels = [calendar.day_abbr[cat] for cat in labels]
+
+        if grouped_metrics:
+            grouped_vals = _calculate_grouped_deterministic_metrics(
+                grouped_metrics, codes, len(labels), df.forecast.values,
+                df.observation.values, df.reference.values,
+                normalization=normalization, deadband=deadband)
+            for metric_ in grouped_metrics:
+                for cat, res in zip(labels, grouped_vals[metric_]):
+                    metric_vals.append(datamodel.MetricValue(
+                        category, metric_, str(cat), res))
+
+        if other_metrics:
             # Group by category
-            for cat, group in df.groupby(index_category):
-
-                # Calculate
-                res = _apply_deterministic_metric_func(
-                    metric_, group.forecast, group.observation,
-                    ref_fx=group.reference, normalization=normalization,
-                    deadband=deadband, cost_params=cost_params)
-
-                # Change category label of the group from numbers
-                # to e.g. January or Monday
-                if category == 'month':
-                    cat = calendar.month_abbr[cat]
-                elif category == 'weekday':
-                    cat = calendar.day_abbr[cat]
-
-                metric_vals.append(datamodel.MetricValue(
-                    category, metric_, str(cat), res))
+            for code, group in df.groupby(codes):
+                cat = labels[code]
+                for metric_ in other_metrics:
+                    # Calculate
+                    res = _apply_deterministic_metric_func(
+                        metric_, group.forecast, group.observation,
+                        ref_fx=group.reference, normalization=normalization,
+                        deadband=deadband, cost_params=cost_params)
+                    metric_vals.append(datamodel.MetricValue(
+                        category, metric_, str(cat), res))
 
     out['values'] = _sort_metrics_vals(
         metric_vals, datamodel.ALLOWED_DETERMINISTIC_METRICS)
@@ -234,6 +247,107 @@ def calculate_deterministic_metrics(processed_fx_obs, categories, metrics):
     return calc_metrics
 
 
+def _group_codes(category, df):
+    """Integer codes of the group of each row of df for category and the
+    sorted labels of the groups, in the order used by groupby."""
+    if category == 'total':
+        return np.zeros(len(df), dtype=np.intp), [0]
+    codes, uniques = pd.factorize(
+        pd.Index(_index_category(category, df)), sort=True)
+    return codes, list(uniques)
+
+
+# metrics computed by _calculate_grouped_deterministic_metrics
+_GROUPED_DETERMINISTIC = (
+    'mae', 'mbe', 'rmse', 'mape', 'nmae', 'nmbe', 'nrmse', 's', 'r^2',
+    'crmse')
+
+
+def _calculate_grouped_deterministic_metrics(metrics, codes, ngroups, fx,
+                                             obs, ref, normalization=None,
+                                             deadband=None):
+    """Calculate deterministic metrics for every group from sums over the
+    groups.
+
+    Equivalent to calling :py:func:`_apply_deterministic_metric_func`
+    for each group, but each sum is computed for all groups in a single
+    pass.
+
+    Parameters
+    ----------
+    metrics : list of str
+        Metrics in ``_GROUPED_DETERMINISTIC``
+    codes : (n,) array of int
+        Group of each value, from 0 to ngroups - 1
+    ngroups : int
+    fx : (n,) array
+    obs : (n,) array
+    ref : (n,) array
+    normalization : float
+    deadband : float
+
+    Returns
+    -------
+    dict
+        Keys are the metrics and values are arrays with the metric for
+        each group.
+    """
+    fx = np.asarray(fx, dtype=float)
+    obs = np.asarray(obs, dtype=float)
+
+    def gsum(values):
+        return np.bincount(codes, weights=values, minlength=ngroups)
+
+    def gmean(values):
+        return gsum(values) / count
+
+    if deadband:
+        # metrics assumes fractional deadband, datamodel assumes %, so / 100
+        error_fnc = partial(
+            deterministic.error_deadband, deadband=deadband / 100)
+    else:
+        error_fnc = deterministic.error
+
+    count = np.bincount(codes, minlength=ngroups).astype(float)
+    error = error_fnc(obs, fx)
+    out = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if {'mae', 'nmae'} & set(metrics):
+            mae = gmean(np.abs(error))
+            out['mae'] = mae
+            if 'nmae' in metrics:
+                out['nmae'] = mae / normalization * 100.0
+        if {'mbe', 'nmbe'} & set(metrics):
+            mbe = gmean(error)
+            out['mbe'] = mbe
+            if 'nmbe' in metrics:
+                out['nmbe'] = mbe / normalization * 100.0
+        if {'rmse', 'nrmse', 's'} & set(metrics):
+            rmse = np.sqrt(gmean(error * error))
+            out['rmse'] = rmse
+            if 'nrmse' in metrics:
+                out['nrmse'] = rmse / normalization * 100.0
+        if 'mape' in metrics:
+            out['mape'] = gmean(np.abs(error / obs)) * 100.0
+        if 's' in metrics:
+            ref_error = error_fnc(obs, np.asarray(ref, dtype=float))
+            rmse_ref = np.sqrt(gmean(ref_error * ref_error))
+            # see deterministic.forecast_skill for the special cases
+            out['s'] = np.select(
+                [rmse == rmse_ref, rmse_ref == 0.],
+                [0., np.NINF], 1.0 - rmse / rmse_ref)
+        if {'r^2', 'crmse'} & set(metrics):
+            obs_anom = obs - gmean(obs)[codes]
+        if 'r^2' in metrics:
+            ss_res = gsum((obs - fx) ** 2)
+            ss_tot = gsum(obs_anom ** 2)
+            out['r^2'] = 1.0 - ss_res / ss_tot
+        if 'crmse' in metrics:
+            fx_anom = fx - gmean(fx)[codes]
+            out['crmse'] = np.sqrt(gmean((fx_anom - obs_anom) ** 2))
+    return {m: out[m] for m in metrics}
+
+
 def _sort_metrics_vals(metrics_vals, mapping):
     """
     Parameters
@@ -314,32 +428,30 @@ def calculate_probabilistic_metrics(processed_fx_obs, categories, metrics):
                     processed_fx_obs.original.aggregate.aggregate_id}
     out.update(obs_dict)
 
-    # Determine forecast physical and probability values by axis
-    fx_fx_prob = _transform_prob_forecast_value_and_prob(processed_fx_obs)
+    fx = processed_fx_obs.original.forecast
     obs = processed_fx_obs.observation_values
+    frames = {
+        'observation': obs.to_frame(),
+        'forecast': _prob_forecast_frame(processed_fx_obs)}
 
-    if processed_fx_obs.reference_forecast_values is None:
-        ref_fx_fx_prob = [(np.nan, np.nan)]*len(fx_fx_prob)
-    else:
+    if processed_fx_obs.reference_forecast_values is not None:
         if (processed_fx_obs.original.forecast.axis !=
                 processed_fx_obs.original.reference_forecast.axis):
             # could put this check in datamodel (and others from preprocessing)
             raise ValueError("Mismatched `axis` between "
                              "forecast and reference forecast.")
-        ref_fx_fx_prob = _transform_prob_forecast_value_and_prob(
+        frames['reference_forecast'] = _prob_forecast_frame(
             processed_fx_obs, attr='reference_forecast_values')
         out.update({'reference_forecast_id': processed_fx_obs.original.reference_forecast.forecast_id})  # NOQA: E501
 
     # No data or metrics
-    if (not fx_fx_prob or
-            any([fx[0].empty or fx[1].empty for fx in fx_fx_prob])):
+    if frames['forecast'].empty:
         raise RuntimeError("Missing probabilistic forecast timeseries data.")
     elif obs.empty:
         raise RuntimeError("No observation timeseries data.")
     elif len(metrics) == 0:
         raise RuntimeError("No metrics specified.")
 
-    fx = processed_fx_obs.original.forecast
     out['forecast_id'] = fx.forecast_id
 
     # Determine proper metrics by instance type
@@ -348,9 +460,22 @@ def calculate_probabilistic_metrics(processed_fx_obs, categories, metrics):
     elif isinstance(fx, datamodel.ProbabilisticForecast):
         _metrics = list(set(metrics) & set(probabilistic._REQ_DIST))
 
+    # Align all values on one index and determine forecast physical and
+    # probability values by axis
+    data_df = pd.concat(frames, axis=1)
+    fx_vals, fx_prob_vals = _transform_prob_forecast_value_and_prob(
+        data_df['forecast'], fx.axis)
+    if 'reference_forecast' in frames:
+        ref_fx_vals, ref_fx_prob_vals = \
+            _transform_prob_forecast_value_and_prob(
+                data_df['reference_forecast'], fx.axis)
+    else:
+        ref_fx_vals = ref_fx_prob_vals = None
+
     # Compute metrics and create MetricResult
-    results = _calculate_probabilistic_metrics_from_df(
-        _create_prob_dataframe(obs, fx_fx_prob, ref_fx_fx_prob),
+    results = _calculate_probabilistic_metrics_from_arrays(
+        data_df.index, data_df['observation'].to_numpy()[:, 0],
+        fx_vals, fx_prob_vals, ref_fx_vals, ref_fx_prob_vals,
         categories,
         _metrics,
         processed_fx_obs.original.forecast.interval_label)
@@ -360,16 +485,27 @@ def calculate_probabilistic_metrics(processed_fx_obs, categories, metrics):
     return result
 
 
-def _calculate_probabilistic_metrics_from_df(data_df, categories, metrics,
-                                             interval_label):
+def _calculate_probabilistic_metrics_from_arrays(
+        index, obs, fx, fx_prob, ref_fx, ref_fx_prob, categories, metrics,
+        interval_label):
     """
     Calculate probabilistic metrics for the processed data using the provided
     categories and metric types.
 
     Parameters
     ----------
-    data_df : pandas.DataFrame
-        DataFrame that contains all timeseries values on the same index.
+    index : pandas.DatetimeIndex
+        The (n,) times of the values.
+    obs : (n,) array_like
+        Observations.
+    fx : (n, d) array_like
+        Forecast physical values of the d constant values.
+    fx_prob : (n, d) array_like
+        Forecast probabilities [%] of the d constant values.
+    ref_fx : (n, d) array_like or None
+        Reference forecast physical values.
+    ref_fx_prob : (n, d) array_like or None
+        Reference forecast probabilities [%].
     categories : list of str
         List of categories to compute metrics over.
     metrics : list of str
@@ -378,136 +514,214 @@ def _calculate_probabilistic_metrics_from_df(data_df, categories, metrics,
 
     Returns
     -------
-    list of tuples of datamodel.MetricValue
-        Contains all the computed metrics by categories. Each tuple is
-        associated with a datamodel.ProbabilisticForecastConstantValue.
+    list of datamodel.MetricValue
+        Contains all the computed metrics by categories.
     """
     metric_values = []
 
-    # Force `groupby` to be consistent with `interval_label`, i.e., if
+    # Force grouping to be consistent with `interval_label`, i.e., if
     # `interval_label == ending`, then the last interval should be in the
     # bin
     if interval_label == "ending":
-        data_df.index -= pd.Timedelta("1ns")
+        index = index - pd.Timedelta("1ns")
+    index_df = pd.DataFrame(index=index)
 
     # Calculate metrics
     for category in set(categories):
-        index_category = _index_category(category, data_df)
-
-        # Calculate each metric
-        for metric_ in set(metrics):
-            # Group by category
-            for cat, group in data_df.groupby(index_category):
-
-                try:
-                    ref_fx_vals = group.xs('reference_forecast', level=1, axis=1).to_numpy()  # NOQA: E501
-                    ref_fx_prob_vals = group.xs('reference_probability', level=1, axis=1).to_numpy()  # NOQA E501
-                    if ref_fx_vals.size == ref_fx_vals.shape[0]:
-                        ref_fx_vals = ref_fx_vals.T[0]
-                        ref_fx_prob_vals = ref_fx_prob_vals.T[0]
-                except KeyError:
-                    ref_fx_vals = np.nan
-                    ref_fx_prob_vals = np.nan
-
-                fx_vals = group.xs('forecast', level=1, axis=1).to_numpy()
-                fx_prob_vals = group.xs('probability', level=1, axis=1).to_numpy()  # NOQA: E501
-                if fx_vals.size == fx_vals.shape[0]:
-                    fx_vals = fx_vals.T[0]
-                    fx_prob_vals = fx_prob_vals.T[0]
-                obs_vals = group[(None, 'observation')].to_numpy()
-
-                # Calculate
-                res = _apply_probabilistic_metric_func(
-                    metric_, fx_vals, fx_prob_vals, obs_vals,
-                    ref_fx=ref_fx_vals, ref_fx_prob=ref_fx_prob_vals)
-
-                # Change category label of the group from numbers
-                # to e.g. January or Monday
-                if category == 'month':
-                    cat = calendar.month_abbr[cat]
-                elif category == 'weekday':
-                    cat = calendar.day_abbr[cat]
-
+        codes, labels = _group_codes(category, index_df)
+
+        # Change category label of the groups from numbers
+        # to e.g. January or Monday
+        if category == 'month':
+            labels = [calendar.month_abbr[cat] for cat in labels]
+        elif category == 'weekday':
+            labels = [calendar.day_abbr[cat] for cat in labels]
+
+        grouped_vals = _calculate_grouped_probabilistic_metrics(
+            list(set(metrics)), codes, len(labels), obs, fx, fx_prob,
+            ref_fx, ref_fx_prob)
+        for metric_, vals in grouped_vals.items():
+            for cat, res in zip(labels, vals):
                 metric_values.append(datamodel.MetricValue(
                     category, metric_, str(cat), res))
 
     return metric_values
 
 
-def _create_prob_dataframe(obs, fx_fx_prob, ref_fx_fx_prob):
-    """
-    Creates a DataFrame for grouping for the probabilistic forecasts.
+def _calculate_grouped_probabilistic_metrics(metrics, codes, ngroups, obs,
+                                             fx, fx_prob, ref_fx=None,
+                                             ref_fx_prob=None):
+    """Calculate probabilistic metrics for every group at once.
+
+    Equivalent to calling :py:func:`_apply_probabilistic_metric_func`
+    for each group, with 1D arrays for single constant values and 2D arrays
+    for distribution metrics.
 
     Parameters
     ----------
-    obs : pandas.Series
-    fx_fx_prob : list of tuple of pandas.Series
-    ref_fx_fx_prob : list of tuple of pandas.Series
+    metrics : list of str
+    codes : (n,) array of int
+        Group of each value, from 0 to ngroups - 1
+    ngroups : int
+    obs : (n,) array
+    fx : (n, d) array
+    fx_prob : (n, d) array
+    ref_fx : (n, d) array or None
+    ref_fx_prob : (n, d) array or None
 
     Returns
     -------
-    pandas.DataFrame
-        DataFrame combining all data with column names being tuples of
-        constant_value and one of 'observation', 'forecast', 'probability',
-        'reference_forecast' or 'reference_probability'. For 'observation' the
-        constant_value is None.
-    """
-    data_dict = {(None, 'observation'): obs}
+    dict
+        Keys are the metrics and values are arrays with the metric for
+        each group.
 
-    for orig, ref in zip(fx_fx_prob, ref_fx_fx_prob):
-        fx, fx_prob = orig
-        ref_fx, ref_fx_prob = ref
-        data_dict[(fx.name, 'forecast')] = fx
-        data_dict[(fx_prob.name, 'probability')] = fx_prob
-        try:
-            data_dict[(ref_fx.name, 'reference_forecast')] = ref_fx
-            data_dict[(ref_fx_prob.name, 'reference_probability')] = ref_fx_prob  # NOQA: E501
-        except AttributeError:
-            pass
-
-    return pd.DataFrame(data_dict)
+    Raises
+    ------
+    ValueError
+        If distribution metrics are requested for d < 2 or single value
+        metrics for d != 1.
+    """
+    obs = np.asarray(obs, dtype=float)
+    nvalues = np.shape(fx)[1]
+    has_ref = ref_fx is not None
+    if not has_ref:
+        ref_fx = ref_fx_prob = np.full(np.shape(fx), np.nan)
+
+    def gsum(values):
+        return np.bincount(codes, weights=values, minlength=ngroups)
+
+    count = np.bincount(codes, minlength=ngroups).astype(float)
+
+    def gmean(values):
+        return gsum(values) / count
+
+    def skill(score, ref_score):
+        # avoid 0 / 0 --> nan and divide by 0
+        return np.select([score == ref_score, ref_score == 0.0],
+                         [0.0, np.NINF], 1.0 - score / ref_score)
+
+    dist_metrics = set(metrics) & set(probabilistic._REQ_DIST)
+    if dist_metrics and nvalues < 2:
+        raise ValueError("forecasts must have d >= 2 CDF intervals "
+                         f"(expected >= 2, got {nvalues})")
+    elif set(metrics) - dist_metrics and nvalues != 1:
+        raise ValueError("single value metrics require d = 1 constant "
+                         f"value (got {nvalues})")
+
+    def crps(fx, fx_prob):
+        # event: 0=did not happen, 1=did happen
+        o = np.where(obs[:, np.newaxis] <= fx, 1.0, 0.0)
+        integrand = (fx_prob / 100.0 - o) ** 2
+        # integrate along each sample, then average the samples of groups
+        return gmean(np.sum(integrand[:, :-1] * np.diff(fx, axis=1), axis=1))
+
+    def brier(fx, fx_prob):
+        o = np.where(obs <= fx[:, 0], 1.0, 0.0)
+        return gmean((fx_prob[:, 0] / 100.0 - o) ** 2)
+
+    def quantile(fx, fx_prob):
+        fx = fx[:, 0]
+        p = fx_prob[:, 0] / 100.0
+        return gmean((fx - obs) * (p - np.where(obs > fx, 1.0, 0.0)))
+
+    out = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if {'crps', 'crpss'} & set(metrics):
+            crps_fx = crps(fx, fx_prob)
+            out['crps'] = crps_fx
+            if not has_ref:
+                out['crpss'] = np.full(ngroups, np.nan)
+            else:
+                out['crpss'] = skill(crps_fx, crps(ref_fx, ref_fx_prob))
+        if {'bs', 'bss'} & set(metrics):
+            bs_fx = brier(fx, fx_prob)
+            out['bs'] = bs_fx
+            out['bss'] = 1.0 - bs_fx / brier(ref_fx, ref_fx_prob)
+        if {'qs', 'qss'} & set(metrics):
+            qs_fx = quantile(fx, fx_prob)
+            out['qs'] = qs_fx
+            out['qss'] = skill(qs_fx, quantile(ref_fx, ref_fx_prob))
+        if {'rel', 'res', 'unc'} & set(metrics):
+            (out['rel'], out['res'], out['unc']) = \
+                _grouped_brier_decomposition(
+                    codes, ngroups, count, obs, fx[:, 0], fx_prob[:, 0])
+    return {m: out[m] for m in metrics}
+
+
+def _grouped_brier_decomposition(codes, ngroups, count, obs, fx, fx_prob):
+    """The reliability, resolution and uncertainty of each group as
+    computed by :py:func:`probabilistic.brier_decomposition`."""
+    o = np.where(obs <= fx, 1.0, 0.0)
+    f = fx_prob / 100.0
+    # get unique forecast probabilities by binning, with a precision that
+    # depends on the size of the group as in probabilistic._unique_forecasts.
+    # adding 0 makes -0.0 equal to 0.0 when factorizing
+    f = np.where(count[codes] >= 1000, np.around(f, decimals=2),
+                 np.around(f, decimals=1)) + 0.0
+    o_avg = np.bincount(codes, weights=o, minlength=ngroups) / count
+
+    # sets of values with the same group and unique forecast. the
+    # forecast code is offset by 1 so that 0 is a missing forecast
+    fcodes, funiq = pd.factorize(f)
+    nf = len(funiq) + 1
+    set_codes, set_keys = pd.factorize(
+        codes.astype(np.int64) * nf + fcodes + 1)
+    set_group = set_keys // nf
+    set_f = np.append(np.nan, funiq)[set_keys % nf]
+    set_n = np.bincount(set_codes)
+    # mean event value per set
+    set_o = np.bincount(set_codes, weights=o) / set_n
+    set_o[np.isnan(set_f)] = np.nan
+    rel = np.bincount(set_group, weights=set_n * (set_f - set_o) ** 2,
+                      minlength=ngroups) / count
+    res = np.bincount(set_group,
+                      weights=set_n * (set_o - o_avg[set_group]) ** 2,
+                      minlength=ngroups) / count
+    # uncertainty
+    unc = o_avg * (1.0 - o_avg)
+    return rel, res, unc
+
+
+def _prob_forecast_frame(proc_fx_obs, attr='forecast_values'):
+    """DataFrame of the values of a probabilistic forecast with a column
+    for each constant value."""
+    data = getattr(proc_fx_obs, attr)
+    # Need to convert to DataFrame of ProbabilisticForecastConstantValue
+    # for consistency with ProbabilisticForecast that provides a DataFrame
+    if isinstance(data, pd.Series):
+        # set the name to a float because it will default to 'value'
+        data = data.to_frame(
+            name=proc_fx_obs.original.forecast.constant_value)
+    return data
 
 
-def _transform_prob_forecast_value_and_prob(proc_fx_obs,
-                                            attr='forecast_values'):
+def _transform_prob_forecast_value_and_prob(data, axis):
     """
-    Helper function that returns ordered list of series of physical values and
-    probabilities for a datamodel.ProcessedForecastObservation
+    Helper function that returns arrays of physical values and
+    probabilities of a probabilistic forecast.
 
     Parameters
     ----------
-    proc_fx_obs : datamodel.ProcessedForecastObservation
-    attr : str
-        The attribute of proc_fx_obs that contains the forecast value of
-        interest. Typically forecast_values or
-        reference_forecast_values.
+    data : pandas.DataFrame
+        Forecast values with a column for each constant value.
+    axis : str
+        The axis of the forecast.
 
     Returns
     -------
-    fx_fx_prob : list of tuples of (n,) array_like
-        Forecast physical values and forecast probabilities.
+    fx : (n, d) numpy.ndarray
+        Forecast physical values.
+    fx_prob : (n, d) numpy.ndarray
+        Forecast probabilities.
     """
-    fx_fx_prob = []
-    data = getattr(proc_fx_obs, attr)
-
-    # Need to convert to DataFrame of ProbabilisticForecastConstantValue
-    # for consistency with ProbabilisticForecas that provides a DataFrame
-    if isinstance(data, pd.Series):
-        # set the name to a float because it will default to 'value'
-        data = data.to_frame(
-            name=proc_fx_obs.original.forecast.constant_value)
-
-    for col in data.columns:
-        if proc_fx_obs.original.forecast.axis == 'x':
-            fx_prob = data[col]
-            fx = pd.Series([float(col)]*fx_prob.size, index=fx_prob.index,
-                           name=col)
-        else:  # 'y'
-            fx = data[col]
-            fx_prob = pd.Series([float(col)]*fx.size, index=fx.index,
-                                name=col)
-        fx_fx_prob.append((fx, fx_prob))
-    return fx_fx_prob
+    values = data.to_numpy(dtype=float)
+    # broadcast instead of materializing the constant values
+    constants = np.broadcast_to(
+        np.array([float(col) for col in data.columns]), values.shape)
+    if axis == 'x':
+        return constants, values
+    else:  # 'y'
+        return values, constants
 
 
 def calculate_event_metrics(proc_fx_obs, categories, metrics):
@@ -613,7 +613,8 @@ def check_reference_forecast_consistency(fx_obs, ref_data):
 
 def process_forecast_observations(forecast_observations, filters,
                                   forecast_fill_method, start, end,
-                                  data, timezone, costs=tuple()):
+                                  data, timezone, costs=tuple(),
+                                  executor=None):
     """
     Convert ForecastObservations into ProcessedForecastObservations
     applying any filters and resampling to align forecast and observation.
@@ -642,6 +643,12 @@ def process_forecast_observations(forecast_observations, filters,
     costs : tuple of :py:class:`solarforecastarbiter.datamodel.Cost`
         Costs that are referenced by any pairs. Pairs and costs are matched
         by the Cost name.
+    executor : concurrent.futures.Executor, optional
+        If provided, pairs are filled, resampled, and aligned in parallel
+        by submitting them to the executor, e.g. a
+        :py:class:`concurrent.futures.ProcessPoolExecutor`. The processed
+        pairs, their names, and the logged messages are the same as when
+        processing serially.
 
     Returns
     -------
@@ -690,103 +697,51 @@ def process_forecast_observations(forecast_observations, filters,
         FORECAST_FILL_CONST_STRING.format(forecast_fill_method)
     )
     costs_dict = {c.name: c for c in costs}
-    # accumulate ProcessedForecastObservations in a dict.
-    # use a dict so we can keep track of existing names and avoid repeats.
-    processed_fxobs = {}
-    for fxobs in forecast_observations:
-        # accumulate PreprocessingResults from various stages in a list
-        preproc_results = []
 
+    # start processing of each pair, keeping the results in pair order
+    # so that names and log messages do not depend on the executor
+    pending = []
+    for fxobs in forecast_observations:
         # extract fx and obs data from data dict
         try:
             fx_data = data[fxobs.forecast]
         except KeyError as e:
-            logger.error(
-                'Failed to find data for forecast %s: %s',
-                fxobs.forecast.name, e)
+            pending.append((None, [(
+                'error', 'Failed to find data for forecast %s: %s',
+                (fxobs.forecast.name, str(e)))]))
             continue
 
         try:
             obs_data = data[fxobs.data_object]
         except KeyError as e:
-            logger.error(
-                'Failed to find data for observation %s: %s',
-                fxobs.data_object.name, e)
+            pending.append((None, [(
+                'error', 'Failed to find data for observation %s: %s',
+                (fxobs.data_object.name, str(e)))]))
             continue
 
-        # Apply fill to forecast and reference forecast
-        fx_data, count = apply_fill(fx_data, fxobs.forecast,
-                                    forecast_fill_method, start, end)
-        preproc_results.append(datamodel.PreprocessingResult(
-            name=FILL_RESULT_TOTAL_STRING.format('', forecast_fill_str),
-            count=int(count)))
-
         ref_data = data.get(fxobs.reference_forecast, None)
-        try:
-            check_reference_forecast_consistency(fxobs, ref_data)
-        except ValueError as e:
-            logger.error('Incompatible reference forecast and data: %s', e)
-            continue
-
-        if fxobs.reference_forecast is not None:
-            ref_data, count = apply_fill(ref_data, fxobs.reference_forecast,
-                                         forecast_fill_method, start, end)
-            preproc_results.append(datamodel.PreprocessingResult(
-                name=FILL_RESULT_TOTAL_STRING.format(
-                    "Reference ", forecast_fill_str),
-                count=int(count)))
-
-        # filter and resample observation/aggregate data
-        try:
-            forecast_values, observation_values, val_results = filter_resample(
-                fxobs, fx_data, obs_data, filters)
-        except Exception as e:
-            # should figure out the specific exception types to catch
-            logger.error(
-                'Failed to filter and resample data for pair (%s, %s): %s',
-                fxobs.forecast.name, fxobs.data_object.name, e)
-            continue
-
-        # the total count ultimately shows up in both the validation
-        # results table and the preprocessing summary table.
-        total_discard_before_resample = _search_validation_results(
-            val_results, 'TOTAL DISCARD BEFORE RESAMPLE')
-        if total_discard_before_resample is None:
-            logger.warning(
-                'TOTAL DISCARD BEFORE RESAMPLE not available for pair '
-                '(%s, %s)', fxobs.forecast.name, fxobs.data_object.name)
-        else:
-            preproc_results.append(datamodel.PreprocessingResult(
-                name='Observation Values Discarded Before Resampling',
-                count=int(total_discard_before_resample)))
-
-        total_discard_after_resample = _search_validation_results(
-            val_results, 'TOTAL DISCARD AFTER RESAMPLE')
-        if total_discard_after_resample is None:
-            logger.warning(
-                'TOTAL DISCARD AFTER RESAMPLE not available for pair (%s, %s)',
-                fxobs.forecast.name, fxobs.data_object.name)
+        args = (fxobs, fx_data, obs_data, ref_data, filters,
+                forecast_fill_method, forecast_fill_str, start, end,
+                timezone)
+        if executor is None:
+            pending.append(_process_pair(*args))
         else:
-            preproc_results.append(datamodel.PreprocessingResult(
-                name='Resampled Observation Values Discarded',
-                count=int(total_discard_after_resample)))
+            pending.append(executor.submit(_process_pair, *args))
 
-        # Align and create processed pair
-        try:
-            forecast_values, observation_values, ref_fx_values, results = \
-                align(fxobs, forecast_values, observation_values, ref_data,
-                      timezone)
-            preproc_results.extend(
-                [datamodel.PreprocessingResult(name=k, count=int(v))
-                 for k, v in results.items()])
-        except Exception as e:
-            logger.error(
-                'Failed to align data for pair (%s, %s): %s',
-                fxobs.forecast.name, fxobs.data_object.name, e)
+    # accumulate ProcessedForecastObservations in a dict.
+    # use a dict so we can keep track of existing names and avoid repeats.
+    processed_fxobs = {}
+    for out in pending:
+        if not isinstance(out, tuple):
+            out = out.result()
+        result, messages = out
+        for level, msg, args in messages:
+            getattr(logger, level)(msg, *args)
+        if result is None:
             continue
 
-        logger.info('Processed data successfully for pair (%s, %s)',
-                    fxobs.forecast.name, fxobs.data_object.name)
+        (fxobs, forecast_values, observation_values, ref_fx_values,
+         val_results, preproc_results) = result
         name = _name_pfxobs(processed_fxobs.keys(), fxobs.forecast)
         cost_name = fxobs.cost
         cost = costs_dict.get(cost_name)
@@ -814,6 +769,110 @@ def process_forecast_observations(forecast_observations, filters,
     return tuple(processed_fxobs.values())
 
 
+def _process_pair(fxobs, fx_data, obs_data, ref_data, filters,
+                  forecast_fill_method, forecast_fill_str, start, end,
+                  timezone):
+    """Fill, filter, resample, and align the data of a single pair.
+
+    Log messages are returned instead of emitted so that they may be
+    logged in order by the caller, even if the pair was processed in
+    another thread or process.
+
+    Returns
+    -------
+    result : tuple or None
+        (fxobs, forecast_values, observation_values, ref_fx_values,
+        val_results, preproc_results) or None if the pair could not be
+        processed.
+    messages : list
+        Of (logger method name, message, args) tuples.
+    """
+    messages = []
+    # accumulate PreprocessingResults from various stages in a list
+    preproc_results = []
+
+    # Apply fill to forecast and reference forecast
+    fx_data, count = apply_fill(fx_data, fxobs.forecast,
+                                forecast_fill_method, start, end)
+    preproc_results.append(datamodel.PreprocessingResult(
+        name=FILL_RESULT_TOTAL_STRING.format('', forecast_fill_str),
+        count=int(count)))
+
+    try:
+        check_reference_forecast_consistency(fxobs, ref_data)
+    except ValueError as e:
+        messages.append((
+            'error', 'Incompatible reference forecast and data: %s',
+            (str(e),)))
+        return None, messages
+
+    if fxobs.reference_forecast is not None:
+        ref_data, count = apply_fill(ref_data, fxobs.reference_forecast,
+                                     forecast_fill_method, start, end)
+        preproc_results.append(datamodel.PreprocessingResult(
+            name=FILL_RESULT_TOTAL_STRING.format(
+                "Reference ", forecast_fill_str),
+            count=int(count)))
+
+    # filter and resample observation/aggregate data
+    try:
+        forecast_values, observation_values, val_results = filter_resample(
+            fxobs, fx_data, obs_data, filters)
+    except Exception as e:
+        # should figure out the specific exception types to catch
+        messages.append((
+            'error',
+            'Failed to filter and resample data for pair (%s, %s): %s',
+            (fxobs.forecast.name, fxobs.data_object.name, str(e))))
+        return None, messages
+
+    # the total count ultimately shows up in both the validation
+    # results table and the preprocessing summary table.
+    total_discard_before_resample = _search_validation_results(
+        val_results, 'TOTAL DISCARD BEFORE RESAMPLE')
+    if total_discard_before_resample is None:
+        messages.append((
+            'warning',
+            'TOTAL DISCARD BEFORE RESAMPLE not available for pair '
+            '(%s, %s)', (fxobs.forecast.name, fxobs.data_object.name)))
+    else:
+        preproc_results.append(datamodel.PreprocessingResult(
+            name='Observation Values Discarded Before Resampling',
+            count=int(total_discard_before_resample)))
+
+    total_discard_after_resample = _search_validation_results(
+        val_results, 'TOTAL DISCARD AFTER RESAMPLE')
+    if total_discard_after_resample is None:
+        messages.append((
+            'warning',
+            'TOTAL DISCARD AFTER RESAMPLE not available for pair (%s, %s)',
+            (fxobs.forecast.name, fxobs.data_object.name)))
+    else:
+        preproc_results.append(datamodel.PreprocessingResult(
+            name='Resampled Observation Values Discarded',
+            count=int(total_discard_after_resample)))
+
+    # Align data
+    try:
+        forecast_values, observation_values, ref_fx_values, results = \
+            align(fxobs, forecast_values, observation_values, ref_data,
+                  timezone)
+        preproc_results.extend(
+            [datamodel.PreprocessingResult(name=k, count=int(v))
+             for k, v in results.items()])
+    except Exception as e:
+        messages.append((
+            'error', 'Failed to align data for pair (%s, %s): %s',
+            (fxobs.forecast.name, fxobs.data_object.name, str(e))))
+        return None, messages
+
+    messages.append((
+        'info', 'Processed data successfully for pair (%s, %s)',
+        (fxobs.forecast.name, fxobs.data_object.name)))
+    return (fxobs, forecast_values, observation_values, ref_fx_values,
+            val_results, preproc_results), messages
+
+
 def _name_pfxobs(current_names, forecast, i=1):
     """Create unique, descriptive name for forecast.
 
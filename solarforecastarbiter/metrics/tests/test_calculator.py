@@ -601,6 +601,37 @@ def test_calculate_deterministic_metrics(categories, metrics,
     verify_metric_result(result, pair, categories, metrics)
 
 
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('deadband', [None, 5.])
+@pytest.mark.parametrize('category', LIST_OF_CATEGORIES)
+def test__calculate_grouped_deterministic_metrics(category, deadband):
+    index = pd.date_range('2019-12-30T00:00Z', '2020-01-03T23:00Z',
+                          freq='1h')
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'forecast': rng.random(len(index)) + 1,
+                       'observation': rng.random(len(index)) + 1,
+                       'reference': rng.random(len(index)) + 1},
+                      index=index)
+    # exactly matching forecast and observation in some groups
+    df.iloc[:3, 0] = df.iloc[:3, 1]
+    df.iloc[:3, 2] = df.iloc[:3, 1]
+    metrics = list(calculator._GROUPED_DETERMINISTIC)
+    codes, labels = calculator._group_codes(category, df)
+    out = calculator._calculate_grouped_deterministic_metrics(
+        metrics, codes, len(labels), df.forecast, df.observation,
+        df.reference, normalization=2., deadband=deadband)
+    for metric in metrics:
+        expected = [
+            calculator._apply_deterministic_metric_func(
+                metric, group.forecast, group.observation,
+                ref_fx=group.reference, normalization=2., deadband=deadband)
+            for _, group in df.groupby(codes)]
+        assert_allclose(out[metric], expected)
+    if category != 'total':
+        assert labels == sorted(
+            df.groupby(calculator._index_category(category, df)).groups)
+
+
 def test_calculate_probabilistic_metrics_no_metrics(
         single_prob_forecast_observation, create_processed_fxobs):
     proc_fxobs = create_processed_fxobs(single_prob_forecast_observation,
@@ -856,55 +887,89 @@ def test_calculate_probabilistic_metrics(categories, metrics,
     LIST_OF_CATEGORIES
 ])
 @pytest.mark.parametrize('interval_label', ['beginning', 'ending'])
-@pytest.mark.parametrize('df,metrics', [
-    (pd.DataFrame({
-        ('50', 'forecast'): np.random.randn(10),
-        ('50', 'probability'): np.random.randn(10),
-        ('50', 'reference_forecast'): np.random.randn(10),
-        ('50', 'reference_probability'): np.random.randn(10),
-        (None, 'observation'): np.random.randn(10)
-        }),
-     PROB_NO_DIST),
-    (pd.DataFrame({
-        ('50', 'forecast'): np.random.randn(10),
-        ('50', 'probability'): np.random.randn(10),
-        (None, 'observation'): np.random.randn(10)
-        }),
-     PROB_NO_REF_NO_DIST),
-    (pd.DataFrame({
-        ('25', 'forecast'): np.random.randn(10),
-        ('50', 'forecast'): np.random.randn(10),
-        ('75', 'forecast'): np.random.randn(10),
-        ('25', 'probability'): np.random.randn(10),
-        ('50', 'probability'): np.random.randn(10),
-        ('75', 'probability'): np.random.randn(10),
-        ('25', 'reference_forecast'): np.random.randn(10),
-        ('50', 'reference_forecast'): np.random.randn(10),
-        ('75', 'reference_forecast'): np.random.randn(10),
-        ('25', 'reference_probability'): np.random.randn(10),
-        ('50', 'reference_probability'): np.random.randn(10),
-        ('75', 'reference_probability'): np.random.randn(10),
-        (None, 'observation'): np.random.randn(10)
-        }),
-     probabilistic._REQ_DIST),
-    (pd.DataFrame({
-        ('25', 'forecast'): np.random.randn(10),
-        ('50', 'forecast'): np.random.randn(10),
-        ('75', 'forecast'): np.random.randn(10),
-        ('25', 'probability'): np.random.randn(10),
-        ('50', 'probability'): np.random.randn(10),
-        ('75', 'probability'): np.random.randn(10),
-        (None, 'observation'): np.random.randn(10)
-        }),
-     probabilistic._REQ_DIST)
+@pytest.mark.parametrize('nvalues,ref,metrics', [
+    (1, True, PROB_NO_DIST),
+    (1, False, PROB_NO_REF_NO_DIST),
+    (3, True, probabilistic._REQ_DIST),
+    (3, False, probabilistic._REQ_DIST),
 ])
-def test_calculate_probabilistic_metrics_from_df(categories, df, metrics,
-                                                 interval_label,
-                                                 create_dt_index):
-    df.index = create_dt_index(len(df))
-    results = calculator._calculate_probabilistic_metrics_from_df(
-        df, categories, metrics, interval_label)
+def test_calculate_probabilistic_metrics_from_arrays(
+        categories, nvalues, ref, metrics, interval_label, create_dt_index):
+    index = create_dt_index(10)
+    fx = np.random.randn(10, nvalues)
+    fx_prob = np.random.randn(10, nvalues)
+    if ref:
+        ref_fx = np.random.randn(10, nvalues)
+        ref_fx_prob = np.random.randn(10, nvalues)
+    else:
+        ref_fx = ref_fx_prob = None
+    results = calculator._calculate_probabilistic_metrics_from_arrays(
+        index, np.random.randn(10), fx, fx_prob, ref_fx, ref_fx_prob,
+        categories, metrics, interval_label)
     assert all(isinstance(r, datamodel.MetricValue) for r in results)
+    assert len({r.metric for r in results}) == (
+        len(set(metrics)) if categories else 0)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('nobs', [10, 2000])
+@pytest.mark.parametrize('category', LIST_OF_CATEGORIES)
+def test__calculate_grouped_probabilistic_metrics(category, nobs):
+    index = pd.date_range('2019-12-30T00:00Z', '2020-01-03T23:00Z',
+                          periods=nobs)
+    rng = np.random.default_rng(0)
+    obs = rng.random(nobs) * 10
+    # x axis CDF and constant value
+    cdf_fx = np.broadcast_to([2., 5., 8.], (nobs, 3))
+    cdf_prob = np.sort(rng.random((nobs, 3)) * 100, axis=1)
+    ref_prob = np.sort(rng.random((nobs, 3)) * 100, axis=1)
+    codes, labels = calculator._group_codes(category, pd.DataFrame(
+        index=index))
+
+    def expected(metric, fx, fx_prob, ref, ref_prob):
+        return [
+            calculator._apply_probabilistic_metric_func(
+                metric, fx[codes == i], fx_prob[codes == i],
+                obs[codes == i], ref_fx=ref[codes == i],
+                ref_fx_prob=ref_prob[codes == i])
+            for i in range(len(labels))]
+
+    out = calculator._calculate_grouped_probabilistic_metrics(
+        probabilistic._REQ_DIST, codes, len(labels), obs, cdf_fx, cdf_prob,
+        cdf_fx, ref_prob)
+    for metric in probabilistic._REQ_DIST:
+        assert_allclose(out[metric], expected(
+            metric, cdf_fx, cdf_prob, cdf_fx, ref_prob))
+
+    metrics = list(PROB_NO_DIST)
+    out = calculator._calculate_grouped_probabilistic_metrics(
+        metrics, codes, len(labels), obs, cdf_fx[:, 1:2], cdf_prob[:, 1:2],
+        cdf_fx[:, 1:2], ref_prob[:, 1:2])
+    for metric in metrics:
+        assert_allclose(out[metric], expected(
+            metric, cdf_fx[:, 1], cdf_prob[:, 1], cdf_fx[:, 1],
+            ref_prob[:, 1]))
+
+
+def test__calculate_grouped_probabilistic_metrics_no_ref():
+    codes = np.array([0, 0, 1])
+    fx = np.array([[1., 2.], [1., 2.], [1., 2.]])
+    fx_prob = np.array([[10., 90.], [20., 80.], [50., 60.]])
+    obs = np.array([0.5, 1.5, 2.5])
+    out = calculator._calculate_grouped_probabilistic_metrics(
+        ['crps', 'crpss'], codes, 2, obs, fx, fx_prob)
+    assert_allclose(out['crps'], [
+        probabilistic.continuous_ranked_probability_score(
+            obs[:2], fx[:2], fx_prob[:2]),
+        probabilistic.continuous_ranked_probability_score(
+            obs[2:], fx[2:], fx_prob[2:])])
+    assert np.isnan(out['crpss']).all()
+    with pytest.raises(ValueError):
+        calculator._calculate_grouped_probabilistic_metrics(
+            ['crps'], codes, 2, obs, fx[:, :1], fx_prob[:, :1])
+    with pytest.raises(ValueError):
+        calculator._calculate_grouped_probabilistic_metrics(
+            ['bs'], codes, 2, obs, fx, fx_prob)
 
 
 @pytest.mark.filterwarnings('ignore::RuntimeWarning')
@@ -1147,57 +1212,19 @@ def test_interval_label(ts, tz, interval_label, category, result,
     assert {(v.index, v.value) for v in res.values} == result
 
 
-@pytest.mark.parametrize('prob_fx_df,axis,exp_fx_fx_prob', [
-    (pd.DataFrame({'25': [1.]*5, '50': [2.]*5, '75': [3.]*5}),
-     'y',
-     [(pd.Series([1.]*5, name='25'), pd.Series([25.]*5, name='25')),
-      (pd.Series([2.]*5, name='50'), pd.Series([50.]*5, name='50')),
-      (pd.Series([3.]*5, name='75'), pd.Series([75.]*5, name='75'))]),
-])
-def test_transform_prob_forecast_value_and_prob(prob_forecasts,
-                                                single_observation,
-                                                prob_fx_df, axis,
-                                                exp_fx_fx_prob,
-                                                copy_prob_forecast_with_axis,
-                                                create_processed_fxobs):
-    conv_prob_fx = copy_prob_forecast_with_axis(prob_forecasts, axis)
-    fxobs = datamodel.ForecastObservation(conv_prob_fx, single_observation)
-    proc_fxobs = create_processed_fxobs(fxobs, prob_fx_df,
-                                        pd.Series([0.]*prob_fx_df.shape[0]))
-    result = calculator._transform_prob_forecast_value_and_prob(proc_fxobs)
-    assert len(result) == len(exp_fx_fx_prob)
-    for res, exp in zip(result, exp_fx_fx_prob):
-        assert len(res) == len(exp)
-        pd.testing.assert_series_equal(res[0], exp[0])
-        pd.testing.assert_series_equal(res[1], exp[1])
-
-
-@pytest.mark.parametrize('obs,fx_fx_prob,ref_fx_fx_prob,exp_df', [
-    (pd.Series([0.]*5),
-     [(pd.Series([1.]*5, name='25'), pd.Series([25.]*5, name='25')),
-      (pd.Series([2.]*5, name='50'), pd.Series([50.]*5, name='50')),
-      (pd.Series([3.]*5, name='75'), pd.Series([75.]*5, name='75'))],
-     [(pd.Series([4.]*5, name='25'), pd.Series([25.]*5, name='25')),
-      (pd.Series([5.]*5, name='50'), pd.Series([50.]*5, name='50')),
-      (pd.Series([6.]*5, name='75'), pd.Series([75.]*5, name='75'))],
-     pd.DataFrame({
-        (None, 'observation'): pd.Series([0.]*5),
-        ('25', 'forecast'): pd.Series([1.]*5),
-        ('25', 'probability'): pd.Series([25.]*5),
-        ('25', 'reference_forecast'): pd.Series([4.]*5),
-        ('25', 'reference_probability'): pd.Series([25.]*5),
-        ('50', 'forecast'): pd.Series([2.]*5),
-        ('50', 'probability'): pd.Series([50.]*5),
-        ('50', 'reference_forecast'): pd.Series([5.]*5),
-        ('50', 'reference_probability'): pd.Series([50.]*5),
-        ('75', 'forecast'): pd.Series([3.]*5),
-        ('75', 'probability'): pd.Series([75.]*5),
-        ('75', 'reference_forecast'): pd.Series([6.]*5),
-        ('75', 'reference_probability'): pd.Series([75.]*5)}))
-])
-def test_create_prob_dataframe(obs, fx_fx_prob, ref_fx_fx_prob, exp_df):
-    result = calculator._create_prob_dataframe(obs, fx_fx_prob, ref_fx_fx_prob)
-    pd.testing.assert_frame_equal(result, exp_df)
+@pytest.mark.parametrize('axis', ['x', 'y'])
+def test_transform_prob_forecast_value_and_prob(axis):
+    data = pd.DataFrame({'25': [1.]*5, '50': [2.]*5, '75': [3.]*5})
+    values = np.array([[1., 2., 3.]]*5)
+    constants = np.array([[25., 50., 75.]]*5)
+    fx, fx_prob = calculator._transform_prob_forecast_value_and_prob(
+        data, axis)
+    if axis == 'x':
+        np.testing.assert_array_equal(fx, constants)
+        np.testing.assert_array_equal(fx_prob, values)
+    else:
+        np.testing.assert_array_equal(fx, values)
+        np.testing.assert_array_equal(fx_prob, constants)
 
 
 @pytest.mark.parametrize('categories', [
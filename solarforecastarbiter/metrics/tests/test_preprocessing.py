@@ -1,3 +1,4 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import json
 import datetime as dt
 import numpy as np
@@ -597,6 +598,54 @@ def test_process_forecast_observations(report_objects, quality_filter,
                                       proc_fxobs.observation_values.index)
 
 
+@pytest.mark.parametrize('executor_class', [
+    ThreadPoolExecutor, ProcessPoolExecutor])
+def test_process_forecast_observations_executor(
+        report_objects, quality_filter, mocker, executor_class):
+    report, observation, forecast_0, forecast_1, aggregate, forecast_agg = report_objects  # NOQA
+    forecast_ref = report.report_parameters.object_pairs[1].reference_forecast
+    obs_ser = pd.Series(np.arange(8),
+                        index=pd.date_range(start='2019-04-01T00:00:00',
+                                            periods=8,
+                                            freq='15min',
+                                            tz='MST',
+                                            name='timestamp'))
+    obs_df = obs_ser.to_frame('value')
+    obs_df['quality_flag'] = OK
+    data = {
+        observation: obs_df,
+        forecast_0: THREE_HOUR_SERIES,
+        forecast_1: THREE_HOUR_SERIES,
+        forecast_ref: THREE_HOUR_SERIES,
+    }
+    # the aggregate pair is missing data and is skipped
+    pairs = report.report_parameters.object_pairs
+    pairs = pairs + pairs[:2]
+    args = (pairs, [quality_filter],
+            report.report_parameters.forecast_fill_method,
+            report.report_parameters.start, report.report_parameters.end,
+            data, 'MST')
+    logger = mocker.patch('solarforecastarbiter.metrics.preprocessing.logger')
+    expected = preprocessing.process_forecast_observations(*args)
+    expected_calls = logger.mock_calls
+    logger.reset_mock()
+    with executor_class(max_workers=2) as executor:
+        out = preprocessing.process_forecast_observations(
+            *args, executor=executor)
+    assert logger.mock_calls == expected_calls
+    assert logger.error.call_count == 1
+    assert len(out) == 4
+    assert [o.name for o in out] == [e.name for e in expected]
+    assert [o.name for o in out][2:] == [
+        f'{o.name}-01' for o in out[:2]]
+    for o, e in zip(out, expected):
+        assert o.original.forecast == e.original.forecast
+        assert o.preprocessing_results == e.preprocessing_results
+        assert o.validation_results == e.validation_results
+        assert_series_equal(o.forecast_values, e.forecast_values)
+        assert_series_equal(o.observation_values, e.observation_values)
+
+
 def test_process_probabilistic_forecast_observations(
         cdf_and_cv_report_objects, cdf_and_cv_report_data, quality_filter,
         timeofdayfilter, mocker):
@@ -13,16 +13,35 @@ Steps are:
 Steps 3 and 4 are bundled in :py:func:`irradiance_to_power`
 """
 
+import calendar
+from collections import OrderedDict
 from functools import partial
-
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
 import pvlib
 
 from solarforecastarbiter import datamodel
 
 
-def calculate_solar_position(latitude, longitude, elevation, times):
+logger = logging.getLogger(__name__)
+
+DAY_NS = 86400 * 10**9
+SOLAR_POSITION_METHODS = ('nrel_numpy', 'ephemeris')
+
+
+def calculate_solar_position(latitude, longitude, elevation, times,
+                             method='nrel_numpy'):
     """
-    Calculates solar position using pvlib's implementation of NREL SPA.
+    Calculates solar position using pvlib's implementation of NREL SPA
+    or, optionally, a faster low precision algorithm.
 
     Parameters
     ----------
@@ -30,19 +49,30 @@ def calculate_solar_position(latitude, longitude, elevation, times):
     longitude : float
     elevation : float
     times : pd.DatetimeIndex
+    method : str, default 'nrel_numpy'
+        'nrel_numpy' for NREL SPA or 'ephemeris' for the 3 to 7 times
+        faster ``pvlib.solarposition.ephemeris``. Compared to SPA, the
+        zenith and azimuth of 'ephemeris' are within 0.01 and 0.04
+        degrees. Its refraction model differs near and below the
+        horizon, where apparent zenith is within 0.4 degrees. Suitable
+        for e.g. day/night flags and interval average solar position.
 
     Returns
     -------
     solar_position : pd.DataFrame
         The DataFrame will have the following columns: apparent_zenith
         (degrees), zenith (degrees), apparent_elevation (degrees),
-        elevation (degrees), azimuth (degrees),
-        equation_of_time (minutes).
+        elevation (degrees), azimuth (degrees), and
+        equation_of_time (minutes) for 'nrel_numpy' or solar_time
+        (hours) for 'ephemeris'.
     """
+    if method not in SOLAR_POSITION_METHODS:
+        raise ValueError(
+            f'method must be one of {SOLAR_POSITION_METHODS}, not {method}')
     solpos = pvlib.solarposition.get_solarposition(times, latitude,
                                                    longitude,
                                                    altitude=elevation,
-                                                   method='nrel_numpy')
+                                                   method=method)
     return solpos
 
 
@@ -52,18 +82,155 @@ def complete_irradiance_components(ghi, zenith):
 
     Parameters
     ----------
-    ghi : pd.Series
+    ghi : pd.Series or pd.DataFrame
+        The columns of a DataFrame, e.g. the members of an ensemble,
+        are computed together.
     zenith : pd.Series
         Solar zenith (not-refraction corrected)
 
     Returns
     -------
-    dni : pd.Series, dhi : pd.Series
+    dni, dhi : pd.Series or pd.DataFrame
+        Same type as ghi.
     """
+    if isinstance(ghi, pd.DataFrame):
+        # the Erbs model is elementwise, so broadcast zenith and day of
+        # year along the columns
+        dni_dhi = pvlib.irradiance.erbs(
+            ghi.values, np.asarray(zenith)[:, np.newaxis],
+            ghi.index.dayofyear.values[:, np.newaxis])
+        return tuple(
+            pd.DataFrame(dni_dhi[key], index=ghi.index, columns=ghi.columns)
+            for key in ('dni', 'dhi'))
     dni_dhi = pvlib.irradiance.erbs(ghi, zenith, ghi.index)
     return dni_dhi['dni'], dni_dhi['dhi']
 
 
+def _month_middles(year):
+    """Day of year of the middle of each month, with the previous December
+    and next January"""
+    mdays = np.array(calendar.mdays[1:])
+    if calendar.isleap(year):
+        mdays[1] += 1
+    return np.concatenate([[-calendar.mdays[12] / 2.],
+                           np.cumsum(mdays) - mdays / 2.,
+                           [mdays.sum() + calendar.mdays[1] / 2.]])
+
+
+_MONTH_MIDDLES_LEAP = _month_middles(2016)
+_MONTH_MIDDLES_NO_LEAP = _month_middles(2015)
+
+
+class LinkeTurbidityTable:
+    """
+    Monthly Linke turbidity of sites from the pvlib
+    ``LinkeTurbidities.h5`` file. The HDF5 file is only read the first time
+    a site is looked up.
+
+    Parameters
+    ----------
+    path : str, path-like, or None, default None
+        If not None, a JSON file that the monthly values of sites are
+        loaded from, if it exists, and stored to.
+    """
+    def __init__(self, path=None):
+        self.path = None if path is None else Path(path)
+        self._lock = threading.Lock()
+        self._monthly = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path) as f:
+                self._monthly = {
+                    tuple(json.loads(k)): np.array(v, dtype=float)
+                    for k, v in json.load(f).items()}
+
+    def _store(self):
+        try:
+            with tempfile.NamedTemporaryFile(
+                    'w', dir=self.path.parent, suffix='.tmp',
+                    delete=False) as f:
+                json.dump({json.dumps(k): v.tolist()
+                           for k, v in self._monthly.items()}, f)
+            os.replace(f.name, self.path)
+        except OSError as e:
+            logger.warning('Failed to store Linke turbidity table: %s', e)
+
+    def monthly(self, latitude, longitude):
+        """
+        Get the monthly values of a site.
+
+        Parameters
+        ----------
+        latitude : float
+        longitude : float
+
+        Returns
+        -------
+        np.array
+            Values for January through December multiplied by 20, as
+            stored in the pvlib file.
+        """
+        key = (latitude, longitude)
+        with self._lock:
+            if key in self._monthly:
+                return self._monthly[key]
+        months = pd.date_range('2015-01-01', freq='MS', periods=12)
+        monthly = np.round(pvlib.clearsky.lookup_linke_turbidity(
+            months, latitude, longitude, interp_turbidity=False).values * 20)
+        with self._lock:
+            self._monthly[key] = monthly
+            if self.path is not None:
+                self._store()
+        return monthly
+
+    def lookup(self, time, latitude, longitude):
+        """
+        Get the Linke turbidity of a site like
+        ``pvlib.clearsky.lookup_linke_turbidity``, interpolating the
+        monthly values to the day of year of time.
+
+        Parameters
+        ----------
+        time : pd.DatetimeIndex
+        latitude : float
+        longitude : float
+
+        Returns
+        -------
+        turbidity : pd.Series
+        """
+        monthly = self.monthly(latitude, longitude)
+        # values are at the middle of each month
+        lts = np.concatenate([monthly[-1:], monthly, monthly[:1]])
+        dayofyear = time.dayofyear
+        linke_turbidity = np.where(
+            time.is_leap_year,
+            np.interp(dayofyear, _MONTH_MIDDLES_LEAP, lts),
+            np.interp(dayofyear, _MONTH_MIDDLES_NO_LEAP, lts))
+        return pd.Series(linke_turbidity / 20., index=time)
+
+
+LINKE_TURBIDITY_TABLE = LinkeTurbidityTable()
+
+
+def lookup_linke_turbidity(time, latitude, longitude):
+    """
+    Get the Linke turbidity of a site from the
+    :py:class:`LinkeTurbidityTable` at ``pvmodel.LINKE_TURBIDITY_TABLE``.
+    Replace ``LINKE_TURBIDITY_TABLE`` to e.g. persist the table.
+
+    Parameters
+    ----------
+    time : pd.DatetimeIndex
+    latitude : float
+    longitude : float
+
+    Returns
+    -------
+    turbidity : pd.Series
+    """
+    return LINKE_TURBIDITY_TABLE.lookup(time, latitude, longitude)
+
+
 def calculate_clearsky(latitude, longitude, elevation, apparent_zenith):
     """
     Calculates clear sky irradiance using the Ineichen model and the
@@ -85,9 +252,7 @@ def calculate_clearsky(latitude, longitude, elevation, apparent_zenith):
     airmass = pvlib.atmosphere.get_relative_airmass(apparent_zenith)
     pressure = pvlib.atmosphere.alt2pres(elevation)
     am_abs = pvlib.atmosphere.get_absolute_airmass(airmass, pressure)
-    tl = pvlib.clearsky.lookup_linke_turbidity(apparent_zenith.index,
-                                               latitude,
-                                               longitude)
+    tl = lookup_linke_turbidity(apparent_zenith.index, latitude, longitude)
     dni_extra = pvlib.irradiance.get_extra_radiation(apparent_zenith.index)
     cs = pvlib.clearsky.ineichen(apparent_zenith, am_abs, tl,
                                  dni_extra=dni_extra,
@@ -95,6 +260,273 @@ def calculate_clearsky(latitude, longitude, elevation, apparent_zenith):
     return cs
 
 
+def _time_grid(times):
+    """Step and offset in ns of regularly spaced times whose spacing evenly
+    divides a day, or None if times are not on such a grid."""
+    if not isinstance(times, pd.DatetimeIndex) or len(times) < 2:
+        return None
+    steps = np.diff(times.asi8)
+    step = steps[0]
+    if step <= 0 or DAY_NS % step or (steps != step).any():
+        return None
+    return int(step), int(times.asi8[0] % step)
+
+
+def _day_grid(days, step, phase, tz):
+    """All times of the grid defined by step and phase within days"""
+    asi8 = (np.asarray(days)[:, np.newaxis] * DAY_NS + phase +
+            np.arange(DAY_NS // step) * step).ravel()
+    times = pd.DatetimeIndex(asi8, tz='UTC')
+    if tz is None:
+        return times.tz_localize(None)
+    return times.tz_convert(tz)
+
+
+class SolarPositionCache:
+    """
+    Memoize solar position and clear sky irradiance for regularly spaced
+    times, e.g. pd.date_range output, at a site.
+
+    Values are computed for whole UTC days of the time grid of the
+    requested times and stored per site, grid, and day so that
+    overlapping requests, e.g. for consecutive issue times of a forecast,
+    only compute the days that are not yet known. The least recently
+    used days are evicted when the size of the values exceeds max_size.
+    Times that are not regularly spaced, or whose spacing does not evenly
+    divide a day, are computed without the cache. The results are
+    identical to :py:func:`calculate_solar_position` and
+    :py:func:`calculate_clearsky`.
+
+    Parameters
+    ----------
+    max_size : int, default 128 MiB
+        Maximum size of the values kept in memory in bytes.
+    cache_dir : str, path-like, or None, default None
+        If not None, days are also stored in this directory and read
+        from it when not in memory, e.g. to share values between
+        processes or runs. The directory is not limited in size.
+    """
+    def __init__(self, max_size=2**27, cache_dir=None):
+        self.max_size = max_size
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.size = 0
+        self._lock = threading.RLock()
+        # key -> (columns, values), least recently used first
+        self._chunks = OrderedDict()
+
+    def clear(self):
+        """Remove all values from memory"""
+        with self._lock:
+            self._chunks.clear()
+            self.size = 0
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return self.cache_dir / f'{digest}.npz'
+
+    def _read_disk(self, key):
+        if self.cache_dir is None:
+            return None
+        try:
+            with np.load(self._path(key)) as npz:
+                return [str(c) for c in npz['columns']], npz['values']
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _write_disk(self, key, chunk):
+        try:
+            with tempfile.NamedTemporaryFile(
+                    dir=self.cache_dir, suffix='.tmp', delete=False) as f:
+                np.savez(f, columns=np.array(chunk[0]), values=chunk[1])
+            os.replace(f.name, self._path(key))
+        except OSError as e:
+            logger.warning('Failed to store solar position cache file: %s',
+                           e)
+
+    def _insert(self, key, chunk):
+        with self._lock:
+            self.size += chunk[1].nbytes
+            old = self._chunks.pop(key, None)
+            if old is not None:
+                self.size -= old[1].nbytes
+            self._chunks[key] = chunk
+            while self.size > self.max_size and self._chunks:
+                _, (_, values) = self._chunks.popitem(last=False)
+                self.size -= values.nbytes
+
+    def _get_days(self, key, days, compute):
+        chunks = {}
+        with self._lock:
+            for day in days:
+                chunk = self._chunks.get(key + (day,))
+                if chunk is not None:
+                    self._chunks.move_to_end(key + (day,))
+                    chunks[day] = chunk
+        for day in days:
+            if day not in chunks:
+                chunk = self._read_disk(key + (day,))
+                if chunk is not None:
+                    self._insert(key + (day,), chunk)
+                    chunks[day] = chunk
+        missing = [day for day in days if day not in chunks]
+        if missing:
+            if compute is None:
+                return None
+            out = compute(missing)
+            columns = list(out.columns)
+            for day, values in zip(missing, np.split(out.values,
+                                                     len(missing))):
+                chunk = (columns, values.copy())
+                self._insert(key + (day,), chunk)
+                if self.cache_dir is not None:
+                    self._write_disk(key + (day,), chunk)
+                chunks[day] = chunk
+        return [chunks[day] for day in days]
+
+    def _lookup(self, key, times, grid, compute):
+        step, phase = grid
+        asi8 = times.asi8
+        first, last = asi8[0] // DAY_NS, asi8[-1] // DAY_NS
+        days = [int(d) for d in range(first, last + 1)]
+        chunks = self._get_days(key + grid, days, compute and partial(
+            compute, step=step, phase=phase))
+        if chunks is None:
+            return None
+        values = np.concatenate([c[1] for c in chunks])
+        positions = (asi8 - first * DAY_NS - phase) // step
+        return pd.DataFrame(values[positions], index=times,
+                            columns=chunks[0][0])
+
+    def solar_position(self, latitude, longitude, elevation, times,
+                       method='nrel_numpy'):
+        """
+        Get the solar position like :py:func:`calculate_solar_position`.
+
+        Parameters
+        ----------
+        latitude : float
+        longitude : float
+        elevation : float
+        times : pd.DatetimeIndex
+        method : str, default 'nrel_numpy'
+            See :py:func:`calculate_solar_position`.
+
+        Returns
+        -------
+        solar_position : pd.DataFrame
+        """
+        grid = _time_grid(times)
+        if grid is None:
+            return calculate_solar_position(latitude, longitude, elevation,
+                                            times, method=method)
+
+        def compute(days, step, phase):
+            return calculate_solar_position(
+                latitude, longitude, elevation,
+                _day_grid(days, step, phase, 'UTC'), method=method)
+
+        return self._lookup(
+            (method, latitude, longitude, elevation), times, grid, compute)
+
+    def clearsky(self, latitude, longitude, elevation, apparent_zenith):
+        """
+        Get the clear sky irradiance like :py:func:`calculate_clearsky`.
+        Cached values are only used if apparent_zenith is the solar
+        position of the site at its index as returned by
+        :py:meth:`solar_position`, e.g. not an interval average.
+
+        Parameters
+        ----------
+        latitude : float
+        longitude : float
+        elevation : float
+        apparent_zenith : pd.Series
+            Solar apparent zenith
+
+        Returns
+        -------
+        cs : pd.DataFrame
+            Columns are ghi, dni, dhi.
+        """
+        times = apparent_zenith.index
+        grid = _time_grid(times)
+        if grid is not None:
+            solpos = self._lookup(
+                ('nrel_numpy', latitude, longitude, elevation), times, grid,
+                None)
+            if solpos is not None and np.array_equal(
+                    solpos['apparent_zenith'].values, apparent_zenith.values,
+                    equal_nan=True):
+
+                def compute(days, step, phase):
+                    grid_times = _day_grid(days, step, phase, times.tz)
+                    return calculate_clearsky(
+                        latitude, longitude, elevation, self.solar_position(
+                            latitude, longitude, elevation,
+                            grid_times)['apparent_zenith'])
+
+                # turbidity and extraterrestrial irradiance depend on the
+                # day of year in the time zone of the index
+                return self._lookup(
+                    ('clearsky', str(times.tz), latitude, longitude,
+                     elevation), times, grid, compute)
+        return calculate_clearsky(latitude, longitude, elevation,
+                                  apparent_zenith)
+
+
+SOLAR_POSITION_CACHE = SolarPositionCache()
+
+
+def cached_solar_position(latitude, longitude, elevation, times,
+                          method='nrel_numpy'):
+    """
+    :py:func:`calculate_solar_position` using the
+    :py:class:`SolarPositionCache` at ``pvmodel.SOLAR_POSITION_CACHE``.
+    Replace ``SOLAR_POSITION_CACHE`` to e.g. change its size or add an
+    on-disk tier.
+
+    Parameters
+    ----------
+    latitude : float
+    longitude : float
+    elevation : float
+    times : pd.DatetimeIndex
+    method : str, default 'nrel_numpy'
+        See :py:func:`calculate_solar_position`.
+
+    Returns
+    -------
+    solar_position : pd.DataFrame
+    """
+    return SOLAR_POSITION_CACHE.solar_position(latitude, longitude,
+                                               elevation, times,
+                                               method=method)
+
+
+def cached_clearsky(latitude, longitude, elevation, apparent_zenith):
+    """
+    :py:func:`calculate_clearsky` using the :py:class:`SolarPositionCache`
+    at ``pvmodel.SOLAR_POSITION_CACHE``.
+
+    Parameters
+    ----------
+    latitude : float
+    longitude : float
+    elevation : float
+    apparent_zenith : pd.Series
+        Solar apparent zenith
+
+    Returns
+    -------
+    cs : pd.DataFrame
+        Columns are ghi, dni, dhi.
+    """
+    return SOLAR_POSITION_CACHE.clearsky(latitude, longitude, elevation,
+                                         apparent_zenith)
+
+
 def aoi_func_factory(modeling_parameters):
     """
     Create a function to calculate AOI, surface tilt, and surface
@@ -211,15 +643,39 @@ def calculate_poa_effective_explicit(surface_tilt, surface_azimuth, aoi,
         Solar apparent zenith
     azimuth : pd.Series
         Solar azimuth
-    ghi : pd.Series
-    dni : pd.Series
-    dhi : pd.Series
+    ghi : pd.Series or pd.DataFrame
+    dni : pd.Series or pd.DataFrame
+    dhi : pd.Series or pd.DataFrame
+        DataFrames have one column per e.g. ensemble member and the same
+        columns. All columns are computed at once.
 
     Returns
     -------
-    poa_effective : pd.Series
+    poa_effective : pd.Series or pd.DataFrame
+        Same type as ghi.
     """
     dni_extra = pvlib.irradiance.get_extra_radiation(apparent_zenith.index)
+    if isinstance(ghi, pd.DataFrame):
+        # broadcast the values that only vary with time along the columns
+        poa_effective = _poa_effective(
+            *map(_broadcast_column, (surface_tilt, surface_azimuth, aoi,
+                                     apparent_zenith, azimuth, dni_extra)),
+            ghi.values, dni.values, dhi.values)
+        return pd.DataFrame(poa_effective, index=ghi.index,
+                            columns=ghi.columns)
+    return _poa_effective(surface_tilt, surface_azimuth, aoi,
+                          apparent_zenith, azimuth, dni_extra, ghi, dni, dhi)
+
+
+def _broadcast_column(arg):
+    """Make a time series a column that broadcasts against 2D arrays"""
+    if isinstance(arg, (pd.Series, pd.Index, np.ndarray)):
+        return np.asarray(arg)[:, np.newaxis]
+    return arg
+
+
+def _poa_effective(surface_tilt, surface_azimuth, aoi, apparent_zenith,
+                   azimuth, dni_extra, ghi, dni, dhi):
     poa_sky_diffuse = pvlib.irradiance.get_sky_diffuse(
         surface_tilt, surface_azimuth,
         apparent_zenith, azimuth,
@@ -233,7 +689,10 @@ def calculate_poa_effective_explicit(surface_tilt, surface_azimuth, aoi,
     poa_effective = beam_effective + poa_sky_diffuse + poa_ground_diffuse
     # aoi, tilt, azi is not defined for tracking systems
     # when sun is below horizon. replace nan with 0
-    poa_effective = poa_effective.where(aoi.notna(), other=0.)
+    if isinstance(poa_effective, pd.Series):
+        poa_effective = poa_effective.where(aoi.notna(), other=0.)
+    else:
+        poa_effective = np.where(np.isnan(aoi), 0., poa_effective)
     return poa_effective
 
 
@@ -251,13 +710,14 @@ def calculate_poa_effective(aoi_func, apparent_zenith, azimuth, ghi, dni, dhi):
         Solar apparent zenith
     azimuth : pd.Series
         Solar azimuth
-    ghi : pd.Series
-    dni : pd.Series
-    dhi : pd.Series
+    ghi : pd.Series or pd.DataFrame
+    dni : pd.Series or pd.DataFrame
+    dhi : pd.Series or pd.DataFrame
+        DataFrames have one column per e.g. ensemble member.
 
     Returns
     -------
-    poa_effective : pd.Series
+    poa_effective : pd.Series or pd.DataFrame
     """
     surface_tilt, surface_azimuth, aoi = aoi_func(apparent_zenith, azimuth)
     poa_effective = calculate_poa_effective_explicit(
@@ -281,14 +741,30 @@ def calculate_power(dc_capacity, temperature_coefficient, dc_loss_factor,
     dc_loss_factor : float
     ac_capacity : float
     ac_loss_factor : float
-    poa_effective : pd.Series
-    temp_air : pd.Series, default 20
-    wind_speed : pd.Series, default 1
+    poa_effective : pd.Series or pd.DataFrame
+        A DataFrame has one column per e.g. ensemble member. All columns
+        are computed at once.
+    temp_air : pd.Series or pd.DataFrame, default 20
+    wind_speed : pd.Series or pd.DataFrame, default 1
+        Series are broadcast along the columns of a DataFrame
+        poa_effective. DataFrames must have the same columns as
+        poa_effective.
 
     Returns
     -------
-    ac_power : pd.Series
+    ac_power : pd.Series or pd.DataFrame
+        Same type as poa_effective.
     """
+    if isinstance(poa_effective, pd.DataFrame):
+        temp_air, wind_speed = [
+            arg.values if isinstance(arg, pd.DataFrame)
+            else _broadcast_column(arg) for arg in (temp_air, wind_speed)]
+        ac = calculate_power(
+            dc_capacity, temperature_coefficient, dc_loss_factor,
+            ac_capacity, ac_loss_factor, poa_effective.values,
+            temp_air=temp_air, wind_speed=wind_speed)
+        return pd.DataFrame(ac, index=poa_effective.index,
+                            columns=poa_effective.columns)
     pvtemps = pvlib.temperature.pvsyst_cell(poa_effective, temp_air,
                                             wind_speed=wind_speed)
     dc = pvlib.pvsystem.pvwatts_dc(poa_effective, pvtemps, dc_capacity,
@@ -296,7 +772,7 @@ def calculate_power(dc_capacity, temperature_coefficient, dc_loss_factor,
     dc *= (1 - dc_loss_factor / 100)
     # set eta values to turn off clipping in pvwatts inverter model
     ac = pvlib.inverter.pvwatts(dc, dc_capacity, eta_inv_nom=1, eta_inv_ref=1)
-    ac = ac.clip(upper=ac_capacity)
+    ac = np.clip(ac, None, ac_capacity)
     ac *= (1 - ac_loss_factor / 100)
     return ac
 
@@ -315,15 +791,19 @@ def irradiance_to_power(modeling_parameters, apparent_zenith, azimuth, ghi,
         Solar apparent zenith
     azimuth : pd.Series
         Solar azimuth
-    ghi : pd.Series
-    dni : pd.Series
-    dhi : pd.Series
-    temp_air : pd.Series, default 20
-    wind_speed : pd.Series, default 1
+    ghi : pd.Series or pd.DataFrame
+    dni : pd.Series or pd.DataFrame
+    dhi : pd.Series or pd.DataFrame
+    temp_air : pd.Series or pd.DataFrame, default 20
+    wind_speed : pd.Series or pd.DataFrame, default 1
+        DataFrames have one column per e.g. ensemble member and the same
+        columns. All columns are computed at once with the solar position
+        broadcast along the columns.
 
     Returns
     -------
-    ac_power : pd.Series
+    ac_power : pd.Series or pd.DataFrame
+        Same type as ghi.
     """
     aoi_func = aoi_func_factory(modeling_parameters)
     poa_effective = calculate_poa_effective(
@@ -58,15 +58,21 @@ def cloud_cover_to_irradiance_ghi_clear(cloud_cover, ghi_clear, zenith):
     Parameters
     ----------
     site : datamodel.Site
-    cloud_cover : Series
-        Cloud cover in %.
+    cloud_cover : Series or DataFrame
+        Cloud cover in %. The columns of a DataFrame, e.g. the members
+        of an ensemble, are converted together.
+    ghi_clear : Series
+        GHI under clear sky conditions.
     zenith : Series
         Solar zenith
 
     Returns
     -------
-    ghi : pd.Series, dni : pd.Series, dhi : pd.Series
+    ghi, dni, dhi : pd.Series or pd.DataFrame
+        Same type as cloud_cover.
     """
+    if isinstance(cloud_cover, pd.DataFrame):
+        ghi_clear = np.asarray(ghi_clear)[:, np.newaxis]
     ghi = cloud_cover_to_ghi_linear(cloud_cover, ghi_clear)
     dni, dhi = pvmodel.complete_irradiance_components(ghi, zenith)
     return ghi, dni, dhi
@@ -91,8 +97,9 @@ def cloud_cover_to_irradiance(latitude, longitude, elevation, cloud_cover,
     latitude : float
     longitude : float
     elevation : float
-    cloud_cover : Series
-        Cloud cover in %.
+    cloud_cover : Series or DataFrame
+        Cloud cover in %. The columns of a DataFrame, e.g. the members
+        of an ensemble, are converted together.
     apparent_zenith : Series
         Solar apparent zenith
     zenith : Series
@@ -100,17 +107,17 @@ def cloud_cover_to_irradiance(latitude, longitude, elevation, cloud_cover,
 
     Returns
     -------
-    ghi : pd.Series
-    dni : pd.Series
-    dhi : pd.Series
+    ghi : pd.Series or pd.DataFrame
+    dni : pd.Series or pd.DataFrame
+    dhi : pd.Series or pd.DataFrame
 
     See also
     --------
     cloud_cover_to_irradiance_ghi_clear
     cloud_cover_to_ghi_linear
     """
-    cs = pvmodel.calculate_clearsky(latitude, longitude, elevation,
-                                    apparent_zenith)
+    cs = pvmodel.cached_clearsky(latitude, longitude, elevation,
+                                 apparent_zenith)
     ghi, dni, dhi = cloud_cover_to_irradiance_ghi_clear(
         cloud_cover, cs['ghi'], zenith)
     return ghi, dni, dhi
@@ -183,8 +190,10 @@ def unmix_intervals(mixed, lower=0, upper=100):
 
     Parameters
     ----------
-    data : pd.Series
-        The first time must be the first output of a cycle.
+    data : pd.Series or pd.DataFrame
+        The first time must be the first output of a cycle. The columns
+        of a DataFrame, e.g. the members of an ensemble, are unmixed
+        together.
     lower : None or float
         Lower bound. Useful for handling numerical precision issues in
         input data.
@@ -194,7 +203,7 @@ def unmix_intervals(mixed, lower=0, upper=100):
 
     Returns
     -------
-    pd.Series
+    pd.Series or pd.DataFrame
         Data is the unmixed interval average with ending label.
     """
     intervals = (mixed.index[1:] - mixed.index[:-1]).unique()
@@ -222,8 +231,8 @@ def unmix_intervals(mixed, lower=0, upper=100):
         # mixed_8 = (f8 + f9) / 2 ...
         # To efficiently compute the values for all forecast times,
         # we use slices for every 6th element, calculate the forecasts
-        # at every 6th point, then interleave them by constructing a 2D
-        # array and reshaping it to a 1D array.
+        # at every 6th point, then interleave them by stacking them
+        # along a new second axis and reshaping back to the time axis.
         mixed_1 = mixed_vals[0::6]
         mixed_2 = mixed_vals[1::6]
         mixed_3 = mixed_vals[2::6]
@@ -236,7 +245,7 @@ def unmix_intervals(mixed, lower=0, upper=100):
         f4 = 4 * mixed_4 - 3 * mixed_3
         f5 = 5 * mixed_5 - 4 * mixed_4
         f6 = 6 * mixed_6 - 5 * mixed_5
-        f = np.array([f1, f2, f3, f4, f5, f6])
+        f = np.stack([f1, f2, f3, f4, f5, f6], axis=1)
     elif interval == pd.Timedelta('3h'):
         _check_start_time(start, interval)
         # similar to above, but
@@ -244,11 +253,15 @@ def unmix_intervals(mixed, lower=0, upper=100):
         # mixed_6 = (f_0_3 + f_3_6) / 2
         f3 = mixed_vals[0::2]
         f6 = 2 * mixed_vals[1::2] - f3
-        f = np.array([f3, f6])
+        f = np.stack([f3, f6], axis=1)
     else:
         raise ValueError('mixed period must be 6 hours and data interval must '
                          'be 3 hours or 1 hour')
-    unmixed = pd.Series(f.reshape(-1, order='F'), index=mixed.index)
+    f = f.reshape((-1,) + mixed_vals.shape[1:])
+    if isinstance(mixed, pd.DataFrame):
+        unmixed = pd.DataFrame(f, index=mixed.index, columns=mixed.columns)
+    else:
+        unmixed = pd.Series(f, index=mixed.index)
     unmixed = unmixed.clip(lower=0, upper=100)
     return unmixed
 
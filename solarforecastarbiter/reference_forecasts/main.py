@@ -5,6 +5,9 @@ The functions in this module use the
 :py:mod:`solarforecastarbiter.datamodel` objects.
 """
 from collections import namedtuple, defaultdict
+from concurrent.futures import (
+    ProcessPoolExecutor, ThreadPoolExecutor, as_completed)
+from functools import partial
 import itertools
 import json
 import logging
@@ -16,7 +19,7 @@ import pandas as pd
 
 from solarforecastarbiter import datamodel, pvmodel
 from solarforecastarbiter.utils import generate_continuous_chunks
-from solarforecastarbiter.io import api
+from solarforecastarbiter.io import api, nwp
 from solarforecastarbiter.io.utils import adjust_timeseries_for_interval_label
 from solarforecastarbiter.reference_forecasts import persistence, models, utils
 
@@ -24,6 +27,11 @@ from solarforecastarbiter.reference_forecasts import persistence, models, utils
 logger = logging.getLogger(__name__)
 
 
+NWPOutput = namedtuple(
+    'NWPOutput', ['ghi', 'dni', 'dhi', 'air_temperature', 'wind_speed',
+                  'ac_power'])
+
+
 def run_nwp(forecast, model, run_time, issue_time):
     """
     Calculate benchmark irradiance and power forecasts for a Forecast or
@@ -112,7 +120,7 @@ def run_nwp(forecast, model, run_time, issue_time):
     site = forecast.site
     logger.info(
         'Calculating forecast for model %s starting at %s from %s to %s',
-        model, init_time, start, end)
+        getattr(model, 'func', model).__name__, init_time, start, end)
     # model will account for interval_label
     *forecasts, resampler, solar_position_calculator = model(
         site.latitude, site.longitude, site.elevation,
@@ -120,35 +128,16 @@ def run_nwp(forecast, model, run_time, issue_time):
 
     if isinstance(site, datamodel.SolarPowerPlant):
         solar_position = solar_position_calculator()
-        if isinstance(forecasts[0], pd.DataFrame):
-            # must iterate over columns because pvmodel.irradiance_to_power
-            # calls operations that do not properly broadcast Series along
-            # a DataFrame time index. pvlib.irradiance.haydavies operation
-            # (AI = dni_ens / dni_extra) is the known culprit, though there
-            # may be more.
-            ac_power = {}
-            for col in forecasts[0].columns:
-                member_fx = [fx.get(col) for fx in forecasts]
-                member_ac_power = pvmodel.irradiance_to_power(
-                    site.modeling_parameters,
-                    solar_position['apparent_zenith'],
-                    solar_position['azimuth'],
-                    *member_fx)
-                ac_power[col] = member_ac_power
-            ac_power = pd.DataFrame(ac_power)
-        else:
-            ac_power = pvmodel.irradiance_to_power(
-                site.modeling_parameters, solar_position['apparent_zenith'],
-                solar_position['azimuth'], *forecasts)
+        # ensemble DataFrames are broadcast against the solar position
+        ac_power = pvmodel.irradiance_to_power(
+            site.modeling_parameters, solar_position['apparent_zenith'],
+            solar_position['azimuth'], *forecasts)
     else:
         ac_power = None
 
     # resample data after power calculation
     resampled = list(map(resampler, (*forecasts, ac_power)))
-    nwpoutput = namedtuple(
-        'NWPOutput', ['ghi', 'dni', 'dhi', 'air_temperature', 'wind_speed',
-                      'ac_power'])
-    return nwpoutput(*resampled)
+    return NWPOutput(*resampled)
 
 
 def _default_load_data(session):
@@ -403,7 +392,8 @@ def _post_forecast_values(session, fx, fx_vals, model_str):
         session.post_forecast_values(fx.forecast_id, fx_vals)
 
 
-def process_nwp_forecast_groups(session, run_time, forecast_df):
+def process_nwp_forecast_groups(session, run_time, forecast_df,
+                                max_workers=1):
     """
     Groups NWP forecasts based on piggyback_on, calculates the forecast as
     appropriate for *run_time*, and uploads the values to the API.
@@ -418,35 +408,60 @@ def process_nwp_forecast_groups(session, run_time, forecast_df):
     forecast_df : pandas.DataFrame
         Dataframe of the forecast objects as procduced by
         :py:func:`solarforecastarbiter.reference_forecasts.main.find_reference_nwp_forecasts`.
+    max_workers : int, default 1
+        Number of processes used to compute the forecasts of the groups
+        concurrently. The values are posted from as many threads. If 1,
+        groups are processed one after another. In both cases, errors
+        computing or posting the forecasts of a group are logged and do
+        not stop the processing of the other groups.
     """  # NOQA
-    for run_for, group in forecast_df.groupby('piggyback_on'):
-        _process_single_group(session, run_for, group, run_time)
+    groups = [(run_for, group, run_time) for run_for, group
+              in forecast_df.groupby('piggyback_on')]
+    _process_groups(session, groups, _nwp_points(forecast_df), max_workers)
+
+
+def _nwp_points(forecast_df):
+    return list(dict.fromkeys(
+        (fx.site.latitude, fx.site.longitude)
+        for fx in forecast_df.forecast))
+
+
+def _process_groups(session, groups, points, max_workers):
+    if max_workers > 1:
+        _process_groups_concurrently(session, groups, points, max_workers)
+        return
+    # load the data for all sites from each model file at once
+    loader = nwp.BatchLoader(points)
+    for run_for, group, run_time in groups:
+        _process_single_group(session, run_for, group, run_time,
+                              load_forecast=loader.load_forecast)
 
 
-def _process_single_group(session, run_for, group, run_time):
+def _prepare_group(run_for, group, run_time):
+    """Find the key forecast, model and issue time of a group or log
+    why the group cannot be processed and return None"""
     logger.info('Computing forecasts for group %s at %s', run_for, run_time)
     errors = _verify_nwp_forecasts_compatible(group)
     if errors:
         logger.error(
             'Not all forecasts compatible in group with %s. '
             'The following parameters may differ: %s', run_for, errors)
-        return
+        return None
     try:
         key_fx = group.loc[run_for].forecast
     except KeyError:
         logger.error('Forecast, %s, that others are piggybacking on not '
                      'found', run_for)
-        return
+        return None
     model_str = group.loc[run_for].model
-    model = getattr(models, model_str)
     issue_time = group.loc[run_for].next_issue_time
     if issue_time is None:
         issue_time = utils.get_next_issue_time(key_fx, run_time)
-    try:
-        nwp_result = run_nwp(key_fx, model, run_time, issue_time)
-    except FileNotFoundError as e:
-        logger.error('Could not process group of %s, %s', run_for, str(e))
-        return
+    return key_fx, model_str, issue_time
+
+
+def _post_group_values(session, run_for, group, nwp_result, model_str,
+                       issue_time):
     for fx_id, fx in group['forecast'].iteritems():
         fx_vals = getattr(nwp_result, fx.variable)
         if fx_vals is None:
@@ -458,7 +473,94 @@ def _process_single_group(session, run_for, group, run_time):
         _post_forecast_values(session, fx, fx_vals, model_str)
 
 
-def make_latest_nwp_forecasts(token, run_time, issue_buffer, base_url=None):
+def _process_single_group(session, run_for, group, run_time,
+                          load_forecast=None):
+    prepared = _prepare_group(run_for, group, run_time)
+    if prepared is None:
+        return
+    key_fx, model_str, issue_time = prepared
+    model = getattr(models, model_str)
+    if load_forecast is not None:
+        model = partial(model, load_forecast=load_forecast)
+    try:
+        nwp_result = run_nwp(key_fx, model, run_time, issue_time)
+    except FileNotFoundError as e:
+        logger.error('Could not process group of %s, %s', run_for, str(e))
+        return
+    except Exception:
+        logger.exception('Failed to compute forecasts for group of %s '
+                         'issued at %s', run_for, issue_time)
+        return
+    try:
+        _post_group_values(session, run_for, group, nwp_result, model_str,
+                           issue_time)
+    except Exception:
+        logger.exception('Failed to post forecasts for group of %s '
+                         'issued at %s', run_for, issue_time)
+
+
+# loader of the NWP data in each worker process
+_WORKER_LOADER = None
+
+
+def _run_nwp_in_worker(forecast, model_str, run_time, issue_time, points,
+                       base_path):
+    global _WORKER_LOADER
+    if (
+            _WORKER_LOADER is None or
+            _WORKER_LOADER.points != points or
+            _WORKER_LOADER.base_path != base_path
+    ):
+        _WORKER_LOADER = nwp.BatchLoader(points, base_path=base_path)
+    model = partial(getattr(models, model_str),
+                    load_forecast=_WORKER_LOADER.load_forecast)
+    return run_nwp(forecast, model, run_time, issue_time)
+
+
+def _process_groups_concurrently(session, groups, points, max_workers):
+    """Compute the forecasts of each group in a process pool and post the
+    values from a thread pool. As in :py:func:`_process_single_group`,
+    errors are logged for each group and do not stop the processing of
+    the other groups."""
+    with ProcessPoolExecutor(max_workers=max_workers) as pool, \
+            ThreadPoolExecutor(max_workers=max_workers) as posters:
+        running = {}
+        for run_for, group, run_time in groups:
+            prepared = _prepare_group(run_for, group, run_time)
+            if prepared is None:
+                continue
+            key_fx, model_str, issue_time = prepared
+            fut = pool.submit(_run_nwp_in_worker, key_fx, model_str,
+                              run_time, issue_time, points, nwp.BASE_PATH)
+            running[fut] = (run_for, group, model_str, issue_time)
+
+        posting = {}
+        for fut in as_completed(running):
+            run_for, group, model_str, issue_time = running[fut]
+            try:
+                nwp_result = fut.result()
+            except FileNotFoundError as e:
+                logger.error('Could not process group of %s, %s', run_for,
+                             str(e))
+                continue
+            except Exception:
+                logger.exception('Failed to compute forecasts for group '
+                                 'of %s issued at %s', run_for, issue_time)
+                continue
+            posting[posters.submit(
+                _post_group_values, session, run_for, group, nwp_result,
+                model_str, issue_time)] = (run_for, issue_time)
+
+        for fut in as_completed(posting):
+            try:
+                fut.result()
+            except Exception:
+                logger.exception('Failed to post forecasts for group of %s '
+                                 'issued at %s', *posting[fut])
+
+
+def make_latest_nwp_forecasts(token, run_time, issue_buffer, base_url=None,
+                              max_workers=1):
     """
     Make all reference NWP forecasts for *run_time* that are within
     *issue_buffer* of the next issue time for the forecast. For example,
@@ -479,6 +581,8 @@ def make_latest_nwp_forecasts(token, run_time, issue_buffer, base_url=None):
         each forecast that will be updated
     base_url : str or None, default None
         Alternate base_url of the API
+    max_workers : int, default 1
+        Number of processes used to compute the forecast groups
     """
     session, forecast_df = _get_nwp_forecast_df(token, run_time, base_url)
     execute_for = forecast_df[
@@ -486,11 +590,13 @@ def make_latest_nwp_forecasts(token, run_time, issue_buffer, base_url=None):
     if execute_for.empty:
         logger.info('No forecasts to be made at %s', run_time)
         return
-    process_nwp_forecast_groups(session, run_time, execute_for)
+    process_nwp_forecast_groups(session, run_time, execute_for,
+                                max_workers=max_workers)
 
 
 def _get_nwp_forecast_df(token, run_time, base_url):
-    session = api.APISession(token, base_url=base_url)
+    session = api.APISession(token, base_url=base_url,
+                             metadata_ttl=api.TASK_METADATA_TTL)
     user_info = session.get_user_info()
     forecasts = session.list_forecasts()
     forecasts += session.list_probabilistic_forecasts()
@@ -525,7 +631,7 @@ def _find_group_gaps(session, forecasts, start, end):
     return sorted(times)
 
 
-def fill_nwp_forecast_gaps(token, start, end, base_url=None):
+def fill_nwp_forecast_gaps(token, start, end, base_url=None, max_workers=1):
     """
     Make all reference NWP forecasts that are missing from *start* to *end*.
     Only forecasts that belong to the same provider/organization
@@ -541,16 +647,20 @@ def fill_nwp_forecast_gaps(token, start, end, base_url=None):
         End of the period to check and fill forecast gaps
     base_url : str or None, default None
         Alternate base_url of the API
+    max_workers : int, default 1
+        Number of processes used to compute the forecast groups
     """
     session, forecast_df = _get_nwp_forecast_df(token, None, base_url)
+    groups = []
     # go through each group separately
     for run_for, group in forecast_df.groupby('piggyback_on'):
         issue_times = _find_group_gaps(session, group.forecast.to_list(),
                                        start, end)
-        group = group.copy()
         for issue_time in issue_times:
+            group = group.copy()
             group.loc[:, 'next_issue_time'] = issue_time
-            _process_single_group(session, run_for, group, issue_time)
+            groups.append((run_for, group, issue_time))
+    _process_groups(session, groups, _nwp_points(forecast_df), max_workers)
 
 
 def _is_reference_persistence_forecast(extra_params_string):
@@ -723,7 +833,8 @@ def make_latest_persistence_forecasts(token, max_run_time, base_url=None):
     base_url : str or None, default None
         Alternate base_url of the API
     """
-    session = api.APISession(token, base_url=base_url)
+    session = api.APISession(token, base_url=base_url,
+                             metadata_ttl=api.TASK_METADATA_TTL)
     forecasts = session.list_forecasts()
     observations = session.list_observations()
     params = generate_reference_persistence_forecast_parameters(
@@ -778,7 +889,8 @@ def make_latest_probabilistic_persistence_forecasts(
     base_url : str or None, default None
         Alternate base_url of the API
     """
-    session = api.APISession(token, base_url=base_url)
+    session = api.APISession(token, base_url=base_url,
+                             metadata_ttl=api.TASK_METADATA_TTL)
     forecasts = session.list_probabilistic_forecasts()
     observations = session.list_observations()
     params = generate_reference_persistence_forecast_parameters(
@@ -852,7 +964,8 @@ def generate_reference_persistence_forecast_gaps_parameters(
 
 
 def _fill_persistence_gaps(token, start, end, base_url, forecast_fnc):
-    session = api.APISession(token, base_url=base_url)
+    session = api.APISession(token, base_url=base_url,
+                             metadata_ttl=api.TASK_METADATA_TTL)
     forecasts = getattr(session, forecast_fnc)()
     observations = session.list_observations()
     params = generate_reference_persistence_forecast_gaps_parameters(
@@ -73,6 +73,12 @@ from solarforecastarbiter.reference_forecasts import forecast
 import pandas as pd
 
 
+# default solar position algorithm of the 5 minute solar position used to
+# convert cloud cover to irradiance and power. 'ephemeris' is faster but
+# less precise, see pvmodel.calculate_solar_position
+RESAMPLE_SOLAR_POSITION_METHOD = 'nrel_numpy'
+
+
 def get_nwp_model(func):
     """Get the NWP model string from a modeling function"""
     return inspect.signature(func).parameters['__model'].default
@@ -81,7 +87,8 @@ def get_nwp_model(func):
 def _resample_using_cloud_cover(latitude, longitude, elevation,
                                 cloud_cover, air_temperature, wind_speed,
                                 start, end, interval_label,
-                                fill_method, solar_position=None):
+                                fill_method, solar_position=None,
+                                solar_position_method=None):
     """
     Calculate all irradiance components from cloud cover.
 
@@ -101,9 +108,10 @@ def _resample_using_cloud_cover(latitude, longitude, elevation,
     latitude : float
     longitude : float
     elevation : float
-    cloud_cover : pd.Series
-    air_temperature : pd.Series
-    wind_speed : pd.Series
+    cloud_cover : pd.Series or pd.DataFrame
+    air_temperature : pd.Series or pd.DataFrame
+    wind_speed : pd.Series or pd.DataFrame
+        DataFrames have one column per ensemble member, e.g. GEFS.
     start : pd.Timestamp
     end : pd.Timestamp
     interval_label : str
@@ -112,16 +120,20 @@ def _resample_using_cloud_cover(latitude, longitude, elevation,
         'bfill' (recommended for GFS), 'interpolate' (recommended for
         NAM/RAP), or any other method of pd.Series.
     solar_position : pd.DataFrame or None
-        Provide a DataFrame to avoid unnecessary recomputation for e.g.
-        GEFS members. If None, solar position is computed.
+        Provide a DataFrame to avoid unnecessary recomputation.
+        If None, solar position is computed.
+    solar_position_method : str or None
+        Algorithm used to compute the solar position, see
+        :py:func:`solarforecastarbiter.pvmodel.calculate_solar_position`.
+        If None, RESAMPLE_SOLAR_POSITION_METHOD.
 
     Returns
     -------
-    ghi : pd.Series
-    dni : pd.Series
-    dhi : pd.Series
-    air_temperature : pd.Series
-    wind_speed : pd.Series
+    ghi : pd.Series or pd.DataFrame
+    dni : pd.Series or pd.DataFrame
+    dhi : pd.Series or pd.DataFrame
+    air_temperature : pd.Series or pd.DataFrame
+    wind_speed : pd.Series or pd.DataFrame
     resampler : function
     sol_pos_calculator : function
         When called, immediatedly returns pre-computed solar position.
@@ -149,8 +161,9 @@ def _resample_using_cloud_cover(latitude, longitude, elevation,
         resample_fill_slicer(v) for v in (air_temperature, wind_speed)
     ]
     if solar_position is None:
-        solar_position = pvmodel.calculate_solar_position(
-            latitude, longitude, elevation, cloud_cover.index)
+        solar_position = pvmodel.cached_solar_position(
+            latitude, longitude, elevation, cloud_cover.index,
+            method=(solar_position_method or RESAMPLE_SOLAR_POSITION_METHOD))
     ghi, dni, dhi = forecast.cloud_cover_to_irradiance(
         latitude, longitude, elevation, cloud_cover,
         solar_position['apparent_zenith'], solar_position['zenith'])
@@ -168,7 +181,7 @@ def _ghi_to_dni_dhi(latitude, longitude, elevation, ghi):
     """
     Calculate DNI, DHI from GHI and calculated solar position.
     """
-    solar_position = pvmodel.calculate_solar_position(
+    solar_position = pvmodel.cached_solar_position(
         latitude, longitude, elevation, ghi.index)
     dni, dhi = pvmodel.complete_irradiance_components(
         ghi, solar_position['zenith'])
@@ -210,7 +223,7 @@ def hrrr_subhourly_to_subhourly_instantaneous(latitude, longitude, elevation,
     # so that DatetimeIndex has well-defined freq attribute
     resampler = partial(forecast.resample, freq='15min')
     solar_pos_calculator = partial(
-        pvmodel.calculate_solar_position, latitude, longitude, elevation,
+        pvmodel.cached_solar_position, latitude, longitude, elevation,
         ghi.index)
     return (ghi, dni, dhi, air_temperature, wind_speed,
             resampler, solar_pos_calculator)
@@ -264,7 +277,7 @@ def hrrr_subhourly_to_hourly_mean(latitude, longitude, elevation,
     label = datamodel.CLOSED_MAPPING[interval_label]
     resampler = partial(forecast.resample, freq='1h', label=label)
     solar_pos_calculator = partial(
-        pvmodel.calculate_solar_position, latitude, longitude, elevation,
+        pvmodel.cached_solar_position, latitude, longitude, elevation,
         ghi.index)
     return (ghi, dni, dhi, air_temperature, wind_speed,
             resampler, solar_pos_calculator)
@@ -544,45 +557,26 @@ def gefs_half_deg_to_hourly_mean(latitude, longitude, elevation,
     ``constant_values=[0, 5, ...95, 100]``.
     """
     start_floored, end_ceil = _adjust_gfs_start_end(start, end)
+    members = ['c00'] + [f'p{member:02d}' for member in range(1, 21)]
 
-    def _load_gefs_member(member, solar_position):
-        cloud_cover_mixed, air_temperature, wind_speed = load_forecast(
-            latitude, longitude, init_time, start_floored, end_ceil, member,
+    def _load_gefs_member(member):
+        return load_forecast(
+            latitude, longitude, init_time, start_floored, end_ceil,
+            f'gefs_{member}',
             variables=('cloud_cover', 'air_temperature', 'wind_speed'))
-        cloud_cover = _unmix_various_gefs_intervals(
-            init_time, start_floored, end_ceil, cloud_cover_mixed)
-        return _resample_using_cloud_cover(
-            latitude, longitude, elevation, cloud_cover, air_temperature,
-            wind_speed, start, end, interval_label, 'bfill',
-            solar_position=solar_position)
-
-    # load and process control forecast, then load and process
-    # permutations. for efficiency, use control's solar position.
-    # accumulate results in dicts so they can be easily converted to
-    # DataFrames.
-    ghi, dni, dhi, air_temperature, wind_speed, resampler, sol_pos_calc = \
-        _load_gefs_member('gefs_c00', None)
-    solar_position = sol_pos_calc()
-    ghi_ens = {'c00': ghi}
-    dni_ens = {'c00': dni}
-    dhi_ens = {'c00': dhi}
-    air_temperature_ens = {'c00': air_temperature}
-    wind_speed_ens = {'c00': wind_speed}
-    for member in range(1, 21):
-        key = f'p{member:02d}'
-        ghi, dni, dhi, air_temperature, wind_speed, _, _ = \
-            _load_gefs_member(f'gefs_{key}', solar_position)
-        ghi_ens[key] = ghi
-        dni_ens[key] = dni
-        dhi_ens[key] = dhi
-        air_temperature_ens[key] = air_temperature
-        wind_speed_ens[key] = wind_speed
-
-    ghi_ens = pd.DataFrame(ghi_ens)
-    dni_ens = pd.DataFrame(dni_ens)
-    dhi_ens = pd.DataFrame(dhi_ens)
-    air_temperature_ens = pd.DataFrame(air_temperature_ens)
-    wind_speed_ens = pd.DataFrame(wind_speed_ens)
+
+    # each member is in a separate file. process the loaded ensemble as
+    # DataFrames with one column per member.
+    loaded = [_load_gefs_member(member) for member in members]
+    cloud_cover_mixed, air_temperature, wind_speed = [
+        pd.DataFrame(dict(zip(members, variable)))
+        for variable in zip(*loaded)]
+    cloud_cover = _unmix_various_gefs_intervals(
+        init_time, start_floored, end_ceil, cloud_cover_mixed)
+    (ghi_ens, dni_ens, dhi_ens, air_temperature_ens, wind_speed_ens,
+     resampler, sol_pos_calc) = _resample_using_cloud_cover(
+        latitude, longitude, elevation, cloud_cover, air_temperature,
+        wind_speed, start, end, interval_label, 'bfill')
 
     def resample_sort(fx):
         resampled = resampler(fx)
@@ -253,9 +253,9 @@ def persistence_scalar_index(observation, data_start, data_end, forecast_start,
     # partial-up the metadata for solar position and
     # clearsky calculation clarity and consistency
     site = observation.site
-    calc_solpos = partial(pvmodel.calculate_solar_position,
+    calc_solpos = partial(pvmodel.cached_solar_position,
                           site.latitude, site.longitude, site.elevation)
-    calc_cs = partial(pvmodel.calculate_clearsky,
+    calc_cs = partial(pvmodel.cached_clearsky,
                       site.latitude, site.longitude, site.elevation)
 
     # Calculate solar position and clearsky for obs time range.
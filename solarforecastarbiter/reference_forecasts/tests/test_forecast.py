@@ -1,7 +1,8 @@
 import itertools
 
+import numpy as np
 import pandas as pd
-from pandas.testing import assert_series_equal
+from pandas.testing import assert_frame_equal, assert_series_equal
 
 import pytest
 
@@ -120,6 +121,21 @@ def test_cloud_cover_to_irradiance_ghi_clear():
     assert_series_equal(out[2], dhi_exp)
 
 
+def test_cloud_cover_to_irradiance_ghi_clear_frame():
+    index = pd.date_range(start='20190101', periods=3, freq='1h')
+    cloud_cover = pd.DataFrame({'c00': [0, 50, 100.], 'p01': [100, 0, 50.]},
+                               index=index)
+    ghi_clear = pd.Series([10, 10, 1000.], index=index)
+    zenith = pd.Series([90.0, 89.9, 45], index=index)
+    out = forecast.cloud_cover_to_irradiance_ghi_clear(
+        cloud_cover, ghi_clear, zenith)
+    for col in cloud_cover:
+        expected = forecast.cloud_cover_to_irradiance_ghi_clear(
+            cloud_cover[col], ghi_clear, zenith)
+        for frame, ser in zip(out, expected):
+            assert_series_equal(frame[col], ser, check_names=False)
+
+
 @pytest.mark.xfail(raises=AssertionError, strict=True)
 def test_cloud_cover_to_irradiance():
     index = pd.date_range(start='20190101', periods=3, freq='1h')
@@ -164,6 +180,18 @@ def test_unmix_intervals(mixed, expected):
     assert_series_equal(out, expected_s)
 
 
+@pytest.mark.parametrize('freq,npts', [('1h', 12), ('3h', 4)])
+def test_unmix_intervals_frame(freq, npts):
+    start = '20190101 01Z' if freq == '1h' else '20190101 03Z'
+    index = pd.date_range(start=start, freq=freq, periods=npts)
+    mixed = pd.DataFrame(np.random.default_rng(0).uniform(0, 100, (npts, 3)),
+                         index=index, columns=['c00', 'p01', 'p02'])
+    out = forecast.unmix_intervals(mixed)
+    expected = pd.DataFrame({col: forecast.unmix_intervals(mixed[col])
+                             for col in mixed})
+    assert_frame_equal(out, expected)
+
+
 # allowed times are 1, 7, 13, 19Z
 _1h_allowed_0700 = [0, 6, 12, 18]
 _1h_not_allowed_0700 = [x for x in range(0, 24) if x not in _1h_allowed_0700]
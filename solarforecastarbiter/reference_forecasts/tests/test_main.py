@@ -1,8 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
 import datetime as dt
 from functools import partial
 import inspect
 from pathlib import Path
+import pickle
 import re
 import types
 import uuid
@@ -12,6 +14,7 @@ import pandas as pd
 from pandas.testing import assert_frame_equal, assert_series_equal
 import pytest
 import pytz
+import requests
 
 
 from solarforecastarbiter import datamodel
@@ -738,6 +741,34 @@ def test_process_nwp_forecast_groups(mocker, forecast_list):
     assert post_vals.call_count == 4
 
 
+def test_process_nwp_forecast_groups_batch_loader(mocker, forecast_list):
+    api = mocker.MagicMock()
+    run_nwp = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main.run_nwp')
+    mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main._post_forecast_values')
+
+    class res:
+        ac_power = [0]
+        ghi = [0]
+
+    run_nwp.return_value = res
+    fxs = main.find_reference_nwp_forecasts(forecast_list[:-4])
+    main.process_nwp_forecast_groups(api, pd.Timestamp('20190501T0000Z'), fxs)
+    loaders = set()
+    for call in run_nwp.call_args_list:
+        model = call[0][1]
+        assert isinstance(model, partial)
+        assert models.get_nwp_model(model) == models.get_nwp_model(
+            model.func)
+        loader = model.keywords['load_forecast'].__self__
+        assert isinstance(loader, nwp.BatchLoader)
+        loaders.add(loader)
+    assert len(loaders) == 1
+    assert set(loaders.pop().points) == {
+        (fx.site.latitude, fx.site.longitude) for fx in fxs.forecast}
+
+
 @pytest.mark.parametrize('run_time', [None, pd.Timestamp('20190501T0000Z')])
 def test_process_nwp_forecast_groups_issue_time(mocker, forecast_list,
                                                 run_time):
@@ -823,6 +854,122 @@ def test_process_nwp_forecast_groups_missing_runfor(mocker, forecast_list):
     assert api.post_forecast_values.call_count == 0
 
 
+@pytest.fixture()
+def thread_pool_for_groups(mocker):
+    # threads share the mocked run_nwp unlike processes
+    mocker.patch.object(main, 'ProcessPoolExecutor', new=ThreadPoolExecutor)
+
+
+def test_process_nwp_forecast_groups_concurrent(mocker, forecast_list,
+                                                thread_pool_for_groups):
+    api = mocker.MagicMock()
+    run_nwp = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main.run_nwp')
+    post_vals = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main._post_forecast_values')
+
+    class res:
+        ac_power = [0]
+        ghi = [0]
+
+    run_nwp.return_value = res
+    fxs = main.find_reference_nwp_forecasts(forecast_list[:-4])
+    logger = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main.logger')
+    main.process_nwp_forecast_groups(api, pd.Timestamp('20190501T0000Z'), fxs,
+                                     max_workers=2)
+    assert not logger.error.called
+    assert not logger.exception.called
+    assert post_vals.call_count == 4
+    for call in run_nwp.call_args_list:
+        assert isinstance(call[0][1].keywords['load_forecast'].__self__,
+                          nwp.BatchLoader)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+@pytest.mark.parametrize('err,log', [
+    (FileNotFoundError, 'error'),
+    (ValueError, 'exception'),
+])
+def test_process_nwp_forecast_groups_run_errors(
+        mocker, forecast_list, thread_pool_for_groups, err, log,
+        max_workers):
+    api = mocker.MagicMock()
+
+    class res:
+        ac_power = [0]
+        ghi = [0]
+
+    run_nwp = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main.run_nwp',
+        side_effect=[err('bad'), res, res])
+    post_vals = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main._post_forecast_values')
+    fxs = main.find_reference_nwp_forecasts(forecast_list[:-4])
+    logger = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main.logger')
+    main.process_nwp_forecast_groups(api, pd.Timestamp('20190501T0000Z'), fxs,
+                                     max_workers=max_workers)
+    assert getattr(logger, log).call_count == 1
+    assert run_nwp.call_count == 3
+    # one group failed, the others still posted
+    assert 0 < post_vals.call_count < 4
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_process_nwp_forecast_groups_post_errors(
+        mocker, forecast_list, thread_pool_for_groups, max_workers):
+    api = mocker.MagicMock()
+
+    class res:
+        ac_power = [0]
+        ghi = [0]
+
+    mocker.patch('solarforecastarbiter.reference_forecasts.main.run_nwp',
+                 return_value=res)
+    post_vals = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main._post_forecast_values',
+        side_effect=requests.HTTPError)
+    fxs = main.find_reference_nwp_forecasts(forecast_list[:-4])
+    logger = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main.logger')
+    main.process_nwp_forecast_groups(api, pd.Timestamp('20190501T0000Z'), fxs,
+                                     max_workers=max_workers)
+    assert logger.exception.call_count == 3
+    assert post_vals.call_count == 3
+
+
+def test__run_nwp_in_worker(mocker, forecast_list):
+    run_nwp = mocker.patch(
+        'solarforecastarbiter.reference_forecasts.main.run_nwp')
+    mocker.patch.object(main, '_WORKER_LOADER', None)
+    fx = forecast_list[0]
+    points = [(fx.site.latitude, fx.site.longitude)]
+    run_time = pd.Timestamp('20190501T0000Z')
+    for _ in range(2):
+        main._run_nwp_in_worker(fx, 'rap_cloud_cover_to_hourly_mean',
+                                run_time, run_time, points, '/nwp')
+    loaders = {call[0][1].keywords['load_forecast'].__self__
+               for call in run_nwp.call_args_list}
+    assert len(loaders) == 1
+    loader = loaders.pop()
+    assert loader.points == points
+    assert loader.base_path == '/nwp'
+    assert run_nwp.call_args[0][1].func is (
+        models.rap_cloud_cover_to_hourly_mean)
+    main._run_nwp_in_worker(fx, 'rap_cloud_cover_to_hourly_mean',
+                            run_time, run_time, points, '/other')
+    assert run_nwp.call_args[0][1].keywords['load_forecast'].__self__ is not (
+        loader)
+
+
+def test_nwp_output_pickle():
+    out = main.NWPOutput(pd.Series([1.]), None, None, None, None, None)
+    new = pickle.loads(pickle.dumps(out))
+    assert_series_equal(new.ghi, out.ghi)
+    assert new.ac_power is None
+
+
 @pytest.mark.parametrize('ind', [0, 1, 2])
 def test__post_forecast_values_regular(mocker, forecast_list, ind):
     api = mocker.MagicMock()
@@ -1617,6 +1764,28 @@ def test_fill_nwp_forecast_gaps(forecast_list, mocker):
             run_nwp.assert_any_call(fx, mocker.ANY, rt, rt)
 
 
+def test_fill_nwp_forecast_gaps_concurrent(forecast_list, mocker,
+                                          thread_pool_for_groups):
+    session = mocker.patch('solarforecastarbiter.io.api.APISession')
+    session.return_value.get_user_info.return_value = {'organization': ''}
+    session.return_value.list_forecasts.return_value = forecast_list[:-3]
+    session.return_value.list_probabilistic_forecasts.return_value = []
+    run_nwp = mocker.patch.object(
+        main, 'run_nwp',
+        side_effect=FileNotFoundError)
+    session.return_value.get_value_gaps.return_value = [
+        (pd.Timestamp('2020-01-10T18:00Z'), pd.Timestamp('2020-01-12T06:00Z'))
+    ]
+    main.fill_nwp_forecast_gaps('token', pd.Timestamp('2020-01-01T00:00Z'),
+                                pd.Timestamp('2020-01-19T00:00Z'),
+                                max_workers=3)
+    assert run_nwp.call_count == 9
+    for fx in [forecast_list[0], forecast_list[1], forecast_list[3]]:
+        for i in range(3):
+            rt = pd.Timestamp('2020-01-10T17:00Z') + pd.Timedelta(hours=i * 12)
+            run_nwp.assert_any_call(fx, mocker.ANY, rt, rt)
+
+
 def test_generate_reference_persistence_forecast_gaps_parameters(
         mocker, perst_fx_obs):
     forecasts, observations = perst_fx_obs
@@ -2,8 +2,9 @@ from functools import partial
 from pathlib import Path
 import types
 
+import numpy as np
 import pandas as pd
-# from pandas.util.testing import assert_series_equal
+from pandas.testing import assert_series_equal
 
 import pytest
 
@@ -139,6 +140,49 @@ def test_gefs_half_deg_to_hourly_mean(start, end, init_time):
     check_out(out, start, end_fx_expected, end_strict=True)
 
 
+def test_gefs_half_deg_to_hourly_mean_members():
+    start = pd.Timestamp('20190515T0100Z')
+    end = pd.Timestamp('20190517T0000Z')
+    init_time = pd.Timestamp('20190515T0000Z')
+    out = models.gefs_half_deg_to_hourly_mean(
+        latitude, longitude, elevation, init_time, start, end,
+        'beginning', load_forecast=LOAD_FORECAST)
+    assert list(out[0].columns) == ['c00'] + [
+        f'p{i:02d}' for i in range(1, 21)]
+    start_floored, end_ceil = models._adjust_gfs_start_end(start, end)
+    # same as processing each member separately
+    for member in ('c00', 'p07', 'p20'):
+        cloud_cover_mixed, air_temperature, wind_speed = LOAD_FORECAST(
+            latitude, longitude, init_time, start_floored, end_ceil,
+            f'gefs_{member}',
+            variables=('cloud_cover', 'air_temperature', 'wind_speed'))
+        cloud_cover = models._unmix_various_gefs_intervals(
+            init_time, start_floored, end_ceil, cloud_cover_mixed)
+        expected = models._resample_using_cloud_cover(
+            latitude, longitude, elevation, cloud_cover, air_temperature,
+            wind_speed, start, end, 'beginning', 'bfill')
+        for frame, ser in zip(out[:5], expected[:5]):
+            assert_series_equal(frame[member], ser, check_names=False)
+
+
+def test_resample_using_cloud_cover_solar_position_method(mocker):
+    index = pd.date_range('20190515T0000Z', freq='1h', periods=25)
+    cloud_cover = pd.Series(np.linspace(0, 100, 25), index=index)
+    air_temperature = pd.Series(20., index=index)
+    wind_speed = pd.Series(2., index=index)
+    args = (latitude, longitude, elevation, cloud_cover, air_temperature,
+            wind_speed, index[1], index[-1], 'beginning', 'bfill')
+    expected = models._resample_using_cloud_cover(*args)
+    out = models._resample_using_cloud_cover(
+        *args, solar_position_method='ephemeris')
+    assert 'solar_time' in out[-1]()
+    for fx, exp in zip(out[:3], expected[:3]):
+        assert_series_equal(fx, exp, atol=1)
+    mocker.patch.object(models, 'RESAMPLE_SOLAR_POSITION_METHOD',
+                        new='ephemeris')
+    assert 'solar_time' in models._resample_using_cloud_cover(*args)[-1]()
+
+
 @pytest.mark.parametrize('model', [
     'hrrr_hourly',
     'hrrr_subhourly',
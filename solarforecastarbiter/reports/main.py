@@ -48,6 +48,8 @@ Considerations:
   the API will need to call for the aligned data separately
   to be able to create time series, scatter, etc. plots.
 """
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from functools import wraps
 import pkg_resources
 import platform
@@ -64,11 +66,17 @@ from solarforecastarbiter.utils import hijack_loggers
 from solarforecastarbiter.validation.tasks import apply_validation
 
 
+# number of objects to retrieve data for concurrently when computing a report
+DATA_MAX_WORKERS = 4
+
+
 def get_data_for_report(session, report):
     """
     Get data for report.
 
     1 API call is made for each unique forecast and observation object.
+    Data for different objects is retrieved concurrently according to the
+    `max_workers` of the session.
 
     Parameters
     ----------
@@ -84,27 +92,23 @@ def get_data_for_report(session, report):
         the corresponding data. Keys also include any reference
         forecasts that exist in the report.
     """
-    data = {}
     start = report.report_parameters.start
     end = report.report_parameters.end
+    objects = []
+    data_objects = []
     for fxobs in report.report_parameters.object_pairs:
-        # forecasts and especially observations may be repeated.
-        # only get the raw data once.
-        if fxobs.forecast not in data:
-            # use get_values instead of get_forecast_values so that api module
-            # can handle determ., prob constant value, or prob group values
-            data[fxobs.forecast] = session.get_values(
-                fxobs.forecast, start, end)
-        if fxobs.data_object not in data:
-            obs_data = session.get_values(
-                fxobs.data_object, start, end)
-            data[fxobs.data_object] = apply_validation(
-                fxobs.data_object, obs_data)
+        objects.append(fxobs.forecast)
+        objects.append(fxobs.data_object)
+        data_objects.append(fxobs.data_object)
         if fxobs.reference_forecast is not None:
-            if fxobs.reference_forecast not in data:
-                data[fxobs.reference_forecast] = session.get_values(
-                    fxobs.reference_forecast, start, end)
-
+            objects.append(fxobs.reference_forecast)
+    # forecasts and especially observations may be repeated.
+    # get_values_bulk only gets the raw data once.
+    # use get_values instead of get_forecast_values so that api module
+    # can handle determ., prob constant value, or prob group values
+    data = session.get_values_bulk(objects, start, end)
+    for data_object in dict.fromkeys(data_objects):
+        data[data_object] = apply_validation(data_object, data[data_object])
     return data
 
 
@@ -148,7 +152,7 @@ def infer_timezone(report_parameters):
     return timezone
 
 
-def create_raw_report_from_data(report, data):
+def create_raw_report_from_data(report, data, executor=None):
     """
     Create a raw report using data and report metadata.
 
@@ -159,6 +163,9 @@ def create_raw_report_from_data(report, data):
     data : dict
         Keys are all Forecast and Observation (or Aggregate)
         objects in the report, values are the corresponding data.
+    executor : concurrent.futures.Executor, optional
+        Executor used to preprocess the forecast, observation pairs in
+        parallel. See ``preprocessing.process_forecast_observations``.
 
     Returns
     -------
@@ -183,7 +190,8 @@ def create_raw_report_from_data(report, data):
             report_params.forecast_fill_method,
             report_params.start, report_params.end,
             data, timezone,
-            costs=report_params.costs)
+            costs=report_params.costs,
+            executor=executor)
 
         # Calculate metrics
         metrics_list = calculator.calculate_metrics(
@@ -247,7 +255,18 @@ def capture_report_failure(report_id, session):
     return decorator
 
 
-def compute_report(access_token, report_id, base_url=None):
+def _preprocessing_executor(report, max_workers):
+    """Process pool to preprocess the pairs of report in parallel, or a
+    context that provides None if only one process would be used."""
+    npairs = len(report.report_parameters.object_pairs)
+    max_workers = min(npairs, max_workers)
+    if max_workers > 1:
+        return ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        return nullcontext()
+
+
+def compute_report(access_token, report_id, base_url=None, max_workers=1):
     """
     Create a raw report using data from API. Typically called as a task.
     Failures will attempt to post a message for the failure in an
@@ -260,12 +279,19 @@ def compute_report(access_token, report_id, base_url=None):
     report_id : str
         ID of the report to fetch from the API and generate the raw
         report for
+    base_url : str or None, default None
+        Alternate base_url of the API
+    max_workers : int, default 1
+        Number of processes used to preprocess the forecast, observation
+        pairs of the report in parallel. If 1, the pairs are preprocessed
+        one after another in this process.
 
     Returns
     -------
     raw_report : :py:class:`solarforecastarbiter.datamodel.RawReport`
     """
-    session = APISession(access_token, base_url=base_url)
+    session = APISession(access_token, base_url=base_url,
+                         max_workers=DATA_MAX_WORKERS)
     fail_wrapper = capture_report_failure(report_id, session)
     report = fail_wrapper(session.get_report, err_msg=(
         'Failed to retrieve report. Perhaps the report does not exist, '
@@ -275,9 +301,10 @@ def compute_report(access_token, report_id, base_url=None):
         'Failed to retrieve data for report which may indicate a lack '
         'of permissions or that an object does not exist.')
     )(session, report)
-    raw_report = fail_wrapper(create_raw_report_from_data, err_msg=(
-        'Unhandled exception when computing report.')
-    )(report, data)
+    with _preprocessing_executor(report, max_workers) as executor:
+        raw_report = fail_wrapper(create_raw_report_from_data, err_msg=(
+            'Unhandled exception when computing report.')
+        )(report, data, executor=executor)
     fail_wrapper(session.post_raw_report, err_msg=(
         'Computation of report completed, but failed to upload result to '
         'the API.')
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import re
 import uuid
@@ -296,6 +297,29 @@ def test_compute_report(mocker, report_objects, mock_data):
     assert len(raw.plots.figures) > 0
 
 
+@pytest.mark.parametrize('max_workers,pool_workers', [
+    (1, None), (2, 2), (8, 3)])
+def test_compute_report_max_workers(mocker, report_objects, mock_data,
+                                    max_workers, pool_workers):
+    report = report_objects[0]
+    mocker.patch(
+        'solarforecastarbiter.io.api.APISession.get_report',
+        return_value=report)
+    mocker.patch(
+        'solarforecastarbiter.io.api.APISession.post_raw_report'
+    )
+    # threads share the mocked data unlike processes
+    pool = mocker.patch.object(main, 'ProcessPoolExecutor',
+                               side_effect=ThreadPoolExecutor)
+    raw = main.compute_report('nope', report.report_id,
+                              max_workers=max_workers)
+    assert isinstance(raw, datamodel.RawReport)
+    if pool_workers is None:
+        assert not pool.called
+    else:
+        assert pool.call_args[1] == {'max_workers': pool_workers}
+
+
 def test_compute_report_request_mock(
         mocker, report_objects, mock_data, requests_mock):
     report = report_objects[0]
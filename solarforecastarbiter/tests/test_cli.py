@@ -141,7 +141,17 @@ def test_validate_cmd_all(cli_token, mocker):
                                    pd.Timestamp('2019-01-02T00:00Z'))
     assert mocked.call_args[1] == {
         'only_missing': True,
-        'base_url': 'https://api.solarforecastarbiter.org'}
+        'base_url': 'https://api.solarforecastarbiter.org',
+        'by_day': False, 'max_workers': 1}
+
+
+def test_validate_cmd_all_workers(cli_token, mocker):
+    mocked = mocker.patch(
+        'solarforecastarbiter.validation.tasks.fetch_and_validate_all_observations')  # NOQA
+    runner = CliRunner()
+    runner.invoke(cli.validate, ['-u user', '-p pass', '--workers=4'])
+    assert mocked.called
+    assert mocked.call_args[1]['max_workers'] == 4
 
 
 def test_validate_cmd_single(cli_token, mocker):
@@ -158,7 +168,17 @@ def test_validate_cmd_single(cli_token, mocker):
                                    pd.Timestamp('2019-01-02T00:00Z'))
     assert mocked.call_args[1] == {
         'only_missing': True,
-        'base_url': 'https://api.solarforecastarbiter.org'}
+        'base_url': 'https://api.solarforecastarbiter.org',
+        'by_day': False}
+
+
+def test_validate_cmd_by_day(cli_token, mocker):
+    mocked = mocker.patch(
+        'solarforecastarbiter.validation.tasks.fetch_and_validate_observation')  # NOQA
+    runner = CliRunner()
+    runner.invoke(cli.validate, ['-u user', '-p pass', '--by-day', 'OBS_ID'])
+    assert mocked.called
+    assert mocked.call_args[1]['by_day']
 
 
 def test_referencedata_init(cli_token, mocker):
@@ -207,6 +227,50 @@ def test_fetchnwp(mocker):
     assert mocked.called
 
 
+def test_fetchnwp_sites(cli_token, mocker, site_metadata, tmp_path):
+    mocker.patch('solarforecastarbiter.io.fetch.nwp.check_wgrib2')
+    mocked = mocker.patch('solarforecastarbiter.io.fetch.nwp.run',
+                          return_value=asyncio.sleep(0))
+    list_sites = mocker.patch(
+        'solarforecastarbiter.cli.APISession.list_sites',
+        return_value=[site_metadata])
+    site_file = tmp_path / 'sites.csv'
+    site_file.write_text('latitude,longitude\n40.0,-105.0\n')
+    runner = CliRunner()
+    res = runner.invoke(cli.fetchnwp, [
+        '--site-file', str(site_file), '--sites-from-api', '-u user',
+        '-p pass', '/tmp', 'rap'])
+    assert res.exit_code == 0
+    # sites are requested for each model run, not at startup
+    assert not list_sites.called
+    get_sites = mocked.call_args[0][-1]
+    assert get_sites() == [
+        (40.0, -105.0), (site_metadata.latitude, site_metadata.longitude)]
+    assert list_sites.call_count == 1
+    assert cli_token.call_count == 2
+
+
+def test_fetchnwp_site_file(mocker, tmp_path):
+    mocker.patch('solarforecastarbiter.io.fetch.nwp.check_wgrib2')
+    mocked = mocker.patch('solarforecastarbiter.io.fetch.nwp.run',
+                          return_value=asyncio.sleep(0))
+    site_file = tmp_path / 'sites.csv'
+    site_file.write_text('latitude,longitude\n40.0,-105.0\n')
+    runner = CliRunner()
+    res = runner.invoke(cli.fetchnwp, [
+        '--site-file', str(site_file), '/tmp', 'rap'])
+    assert res.exit_code == 0
+    assert mocked.call_args[0][-1] == [(40.0, -105.0)]
+
+
+def test_fetchnwp_sites_from_api_no_user(mocker, monkeypatch):
+    monkeypatch.delenv('SFA_API_USER', raising=False)
+    mocker.patch('solarforecastarbiter.io.fetch.nwp.check_wgrib2')
+    runner = CliRunner()
+    res = runner.invoke(cli.fetchnwp, ['--sites-from-api', '/tmp', 'rap'])
+    assert res.exit_code == 1
+
+
 def test_fetchnwp_netcdfonly(mocker):
     mocker.patch('solarforecastarbiter.io.fetch.nwp.check_wgrib2')
     mocked = mocker.patch('solarforecastarbiter.io.fetch.nwp.optimize_only',
@@ -238,7 +302,7 @@ def test_reference_nwp(cli_token, mocker):
         assert cli.nwp.BASE_PATH == str(Path(tmpdir).resolve())
     assert res.exit_code == 0
     mocked.assert_called_with('TOKEN', pd.Timestamp('20190501T1200Z'),
-                              pd.Timedelta('2h'), mocker.ANY)
+                              pd.Timedelta('2h'), mocker.ANY, max_workers=1)
 
 
 def test_report(cli_token, mocker, report_objects):
@@ -418,7 +482,7 @@ def test_refnwp_latest(cli_token, mocker):
         assert cli.nwp.BASE_PATH == str(Path(tmpdir).resolve())
     assert res.exit_code == 0
     mocked.assert_called_with('TOKEN', pd.Timestamp('20190501T1200Z'),
-                              pd.Timedelta('2h'), mocker.ANY)
+                              pd.Timedelta('2h'), mocker.ANY, max_workers=1)
 
 
 def test_refnwp_fill(cli_token, mocker):
@@ -433,7 +497,21 @@ def test_refnwp_fill(cli_token, mocker):
         assert cli.nwp.BASE_PATH == str(Path(tmpdir).resolve())
     assert res.exit_code == 0
     mocked.assert_called_with('TOKEN', pd.Timestamp('2020-01-02T12:00Z'),
-                              pd.Timestamp('2020-04-01T23:23Z'), mocker.ANY)
+                              pd.Timestamp('2020-04-01T23:23Z'), mocker.ANY,
+                              max_workers=1)
+
+
+def test_refnwp_fill_workers(cli_token, mocker):
+    mocked = mocker.patch(
+        'solarforecastarbiter.cli.reference_forecasts.fill_nwp_forecast_gaps')  # NOQA
+    runner = CliRunner()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        res = runner.invoke(cli.refnwp_fill,
+                            ['-u user', '-p pass', '--start=2020-01-02T12:00Z',
+                             '--end=2020-04-01T23:23Z', '--workers=4',
+                             tmpdir])
+    assert res.exit_code == 0
+    assert mocked.call_args[1] == {'max_workers': 4}
 
 
 def test_refpers_latest(cli_token, mocker):
@@ -1,10 +1,12 @@
 import datetime
 from functools import partial
 
+import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal, assert_series_equal
 import pytest
 
+import pvlib
 from pvlib.location import Location
 
 from solarforecastarbiter import pvmodel
@@ -59,6 +61,20 @@ def test_complete_irradiance_components():
     assert_series_equal(expected_dhi, dhi, check_names=False)
 
 
+def test_complete_irradiance_components_frame():
+    index = pd.DatetimeIndex(
+        ['20190101', '20190101', '20190101', '20190629'], tz='UTC')
+    ghi = pd.DataFrame({'c00': [0, 50, 1000, 1000.],
+                        'p01': [10, 0, 500, 900.]}, index=index)
+    zenith = pd.Series([120, 85, 10, 10], index=index)
+    dni, dhi = pvmodel.complete_irradiance_components(ghi, zenith)
+    for col in ghi:
+        expected_dni, expected_dhi = pvmodel.complete_irradiance_components(
+            ghi[col], zenith)
+        assert_series_equal(dni[col], expected_dni, check_names=False)
+        assert_series_equal(dhi[col], expected_dhi, check_names=False)
+
+
 @pytest.fixture
 def times():
     return pd.date_range(start='20190101', periods=2, freq='12H',
@@ -213,3 +229,199 @@ def test_irradiance_to_power(modeling_parameters_system_type, apparent_zenith,
     expected_fixed = pd.Series([0., 0.003], index=index)
     expected_tracking = pd.Series([0., 0.00293178], index=index)
     fixed_or_tracking(system_type, expected_fixed, expected_tracking, out)
+
+
+@pytest.fixture
+def ensemble_weather(golden_mst):
+    times = pd.date_range(start='20190515', end='20190517', freq='1h',
+                          tz=golden_mst.tz)
+    solpos = pvmodel.calculate_solar_position(
+        golden_mst.latitude, golden_mst.longitude, golden_mst.altitude, times)
+    cs = pvmodel.calculate_clearsky(
+        golden_mst.latitude, golden_mst.longitude, golden_mst.altitude,
+        solpos['apparent_zenith'])
+    scale = pd.DataFrame(
+        np.random.default_rng(0).uniform(0.2, 1., (len(times), 21)),
+        index=times)
+    temp_air = scale * 20 + 5
+    wind_speed = pd.Series(np.linspace(0, 10, len(times)), index=times)
+    irrad = [scale.mul(cs[k], axis=0) for k in ('ghi', 'dni', 'dhi')]
+    return solpos, irrad, temp_air, wind_speed
+
+
+def test_irradiance_to_power_frame(modeling_parameters_system_type,
+                                   ensemble_weather):
+    modeling_parameters, _ = modeling_parameters_system_type
+    solpos, irrad, temp_air, wind_speed = ensemble_weather
+    out = pvmodel.irradiance_to_power(
+        modeling_parameters, solpos['apparent_zenith'], solpos['azimuth'],
+        *irrad, temp_air=temp_air, wind_speed=wind_speed)
+    assert isinstance(out, pd.DataFrame)
+    assert (out.iloc[:, 1:] > 0).any().all()
+    for col in irrad[0].columns:
+        expected = pvmodel.irradiance_to_power(
+            modeling_parameters, solpos['apparent_zenith'],
+            solpos['azimuth'], *(fx[col] for fx in irrad),
+            temp_air=temp_air[col], wind_speed=wind_speed)
+        assert_series_equal(out[col], expected, check_exact=True,
+                            check_names=False)
+
+
+def test_calculate_power_frame_scalar_weather(poa_effective):
+    poa = pd.DataFrame({'a': poa_effective, 'b': poa_effective / 2})
+    out = pvmodel.calculate_power(10, -0.5, 0, 10, 0, poa)
+    for col in poa.columns:
+        expected = pvmodel.calculate_power(10, -0.5, 0, 10, 0, poa[col])
+        assert_series_equal(out[col], expected)
+
+
+@pytest.mark.parametrize('freq,start,end,tz', [
+    ('1min', '20190515T1307', '20190517T0200', 'UTC'),
+    ('1h', '20190515T0030', '20190520', 'America/Phoenix'),
+    ('5min', '20191231T2000', '20200101T0400', 'Etc/GMT+7'),
+    ('15min', '20190515', '20190516', None),
+])
+def test_solar_position_cache(golden_mst, freq, start, end, tz):
+    cache = pvmodel.SolarPositionCache()
+    args = (golden_mst.latitude, golden_mst.longitude, golden_mst.altitude)
+    times = pd.date_range(start, end, freq=freq, tz=tz)
+    expected = pvmodel.calculate_solar_position(*args, times)
+    expected_cs = pvmodel.calculate_clearsky(
+        *args, expected['apparent_zenith'])
+    for _ in range(2):
+        out = cache.solar_position(*args, times)
+        assert_frame_equal(out, expected, check_exact=True)
+        cs = cache.clearsky(*args, out['apparent_zenith'])
+        assert_frame_equal(cs, expected_cs, check_exact=True)
+    # subsets are sliced from the cached days
+    size = cache.size
+    out = cache.solar_position(*args, times[3:-3])
+    assert_frame_equal(out, expected.iloc[3:-3], check_exact=True)
+    assert cache.size == size
+
+
+def test_solar_position_cache_uncached(golden_mst):
+    cache = pvmodel.SolarPositionCache()
+    args = (golden_mst.latitude, golden_mst.longitude, golden_mst.altitude)
+    times = pd.DatetimeIndex(['20190515T1200', '20190515T1300',
+                              '20190515T1330'], tz='UTC')
+    out = cache.solar_position(*args, times)
+    assert_frame_equal(out, pvmodel.calculate_solar_position(*args, times))
+    assert cache.size == 0
+    # interval average zenith does not use the cache
+    times = pd.date_range('20190515', freq='1min', periods=120, tz='UTC')
+    solpos = cache.solar_position(*args, times)
+    mean_zenith = solpos['apparent_zenith'].resample('1h').mean()
+    out = cache.clearsky(*args, mean_zenith)
+    assert_frame_equal(out, pvmodel.calculate_clearsky(*args, mean_zenith))
+
+
+def test_solar_position_cache_evict(golden_mst):
+    cache = pvmodel.SolarPositionCache()
+    args = (golden_mst.latitude, golden_mst.longitude, golden_mst.altitude)
+    times = pd.date_range('20190515', freq='1h', periods=72, tz='UTC')
+    cache.solar_position(*args, times)
+    day_size = cache.size // 3
+    cache.max_size = 2 * day_size
+    cache.solar_position(*args, times[-24:])
+    cache.solar_position(*args, times[:24] + pd.Timedelta('3D'))
+    assert cache.size == 2 * day_size
+    assert [k[-1] for k in cache._chunks] == [
+        (pd.Timestamp(t).value // pvmodel.DAY_NS)
+        for t in ('20190517', '20190518')]
+    cache.clear()
+    assert cache.size == 0
+
+
+def test_solar_position_cache_disk(golden_mst, tmp_path, mocker):
+    args = (golden_mst.latitude, golden_mst.longitude, golden_mst.altitude)
+    times = pd.date_range('20190515', '20190517', freq='5min',
+                          tz=golden_mst.tz)
+    cache = pvmodel.SolarPositionCache(cache_dir=tmp_path)
+    expected = cache.solar_position(*args, times)
+    expected_cs = cache.clearsky(*args, expected['apparent_zenith'])
+    assert len(list(tmp_path.glob('*.npz'))) == 6
+    calc = mocker.spy(pvmodel, 'calculate_solar_position')
+    new_cache = pvmodel.SolarPositionCache(cache_dir=tmp_path)
+    out = new_cache.solar_position(*args, times)
+    assert_frame_equal(out, expected, check_exact=True)
+    assert_frame_equal(new_cache.clearsky(*args, out['apparent_zenith']),
+                       expected_cs, check_exact=True)
+    calc.assert_not_called()
+
+
+def test_cached_solar_position(golden_mst, mocker):
+    cache = pvmodel.SolarPositionCache()
+    mocker.patch.object(pvmodel, 'SOLAR_POSITION_CACHE', cache)
+    args = (golden_mst.latitude, golden_mst.longitude, golden_mst.altitude)
+    times = pd.date_range('20190515', freq='1h', periods=24, tz='UTC')
+    solpos = pvmodel.cached_solar_position(*args, times)
+    cs = pvmodel.cached_clearsky(*args, solpos['apparent_zenith'])
+    assert len(cache._chunks) == 2
+    assert_frame_equal(cs, pvmodel.calculate_clearsky(
+        *args, solpos['apparent_zenith']))
+
+
+@pytest.mark.parametrize('latitude,longitude', [
+    (32.2, -110.9), (-33.9, 151.2), (89.99, 179.99), (0, 0)])
+@pytest.mark.parametrize('tz', ['UTC', 'Australia/Sydney', None])
+def test_lookup_linke_turbidity(latitude, longitude, tz):
+    times = pd.date_range('20151220', '20170110', freq='7h', tz=tz)
+    out = pvmodel.lookup_linke_turbidity(times, latitude, longitude)
+    expected = pvlib.clearsky.lookup_linke_turbidity(times, latitude,
+                                                     longitude)
+    assert_series_equal(out, expected, check_exact=True)
+
+
+def test_linke_turbidity_table_path(tmp_path, mocker):
+    path = tmp_path / 'lt.json'
+    table = pvmodel.LinkeTurbidityTable(path)
+    times = pd.date_range('20190101', freq='1D', periods=365, tz='UTC')
+    expected = table.lookup(times, 32.2, -110.9)
+    assert path.exists()
+    lookup = mocker.spy(pvlib.clearsky, 'lookup_linke_turbidity')
+    new_table = pvmodel.LinkeTurbidityTable(path)
+    assert_series_equal(new_table.lookup(times, 32.2, -110.9), expected)
+    lookup.assert_not_called()
+
+
+def test_linke_turbidity_table_out_of_range():
+    with pytest.raises(IndexError):
+        pvmodel.LinkeTurbidityTable().monthly(91, 0)
+
+
+def test_calculate_solar_position_ephemeris(golden_mst):
+    args = (golden_mst.latitude, golden_mst.longitude, golden_mst.altitude)
+    times = pd.date_range('20190101', '20200101', freq='17min',
+                          tz=golden_mst.tz)
+    spa = pvmodel.calculate_solar_position(*args, times)
+    out = pvmodel.calculate_solar_position(*args, times, method='ephemeris')
+    assert (out['zenith'] - spa['zenith']).abs().max() < 0.01
+    azimuth_diff = (out['azimuth'] - spa['azimuth'] + 180) % 360 - 180
+    assert azimuth_diff.abs().max() < 0.04
+    assert (out['apparent_zenith'] -
+            spa['apparent_zenith']).abs().max() < 0.4
+
+
+def test_calculate_solar_position_bad_method(golden_mst):
+    times = pd.date_range('20190101', freq='1h', periods=3, tz='UTC')
+    with pytest.raises(ValueError):
+        pvmodel.calculate_solar_position(
+            golden_mst.latitude, golden_mst.longitude, golden_mst.altitude,
+            times, method='pyephem')
+
+
+def test_solar_position_cache_method(golden_mst):
+    cache = pvmodel.SolarPositionCache()
+    args = (golden_mst.latitude, golden_mst.longitude, golden_mst.altitude)
+    times = pd.date_range('20190515', freq='1min', periods=600, tz='UTC')
+    spa = cache.solar_position(*args, times)
+    out = cache.solar_position(*args, times, method='ephemeris')
+    assert_frame_equal(out, pvmodel.calculate_solar_position(
+        *args, times, method='ephemeris'))
+    assert 'solar_time' in out
+    assert 'equation_of_time' in spa
+    # clear sky of the low precision zenith is not served from the cache
+    assert_frame_equal(
+        cache.clearsky(*args, out['apparent_zenith']),
+        pvmodel.calculate_clearsky(*args, out['apparent_zenith']))
@@ -2,7 +2,7 @@
 Define constant mappings between bit-mask values and understandable quality
 flags
 """
-from functools import wraps
+from functools import lru_cache, wraps
 
 
 import pandas as pd
@@ -182,22 +182,58 @@ def check_if_single_value_flagged(flag, flag_description,
         if not has_data_been_validated(flag):
             raise ValueError('Data has not been validated')
         _flag_description_checks(flag_description)
-    mask_dict = BITMASK_DESCRIPTION_DICT[get_version(flag)]
+    return bool(_flagged_for_version(flag, get_version(flag),
+                                     _description_tuple(flag_description)))
+
+
+def _description_tuple(flag_description):
     if isinstance(flag_description, str):
-        mask = mask_dict[flag_description]
-        ok_mask = mask == 0
-    else:
-        mask = 0
-        ok_mask = False
-        for k in flag_description:
+        return (flag_description,)
+    return tuple(flag_description)
+
+
+@lru_cache(maxsize=None)
+def _version_mask_table(version, descriptions):
+    """Combine the bit masks of the descriptions for a flag version.
+
+    Returns the OR of the fundamental masks, whether 'OK' is one of the
+    descriptions, and the descriptions that are keys of DERIVED_MASKS.
+    """
+    mask_dict = BITMASK_DESCRIPTION_DICT[version]
+    mask = 0
+    ok_mask = False
+    derived = []
+    for k in descriptions:
+        if k in mask_dict:
             m = mask_dict[k]
             if m == 0:
                 ok_mask = True
             mask |= m
-
-    out = bool(flag & mask)
+        elif k in DERIVED_MASKS:
+            derived.append(k)
+        else:
+            raise KeyError(k)
+    return mask, ok_mask, tuple(derived)
+
+
+def _evaluate_description(flags, version, description):
+    mask_dict = BITMASK_DESCRIPTION_DICT[version]
+    if description in mask_dict:
+        return (flags & mask_dict[description]) != 0
+    func, *cols = DERIVED_MASKS[description]
+    return func(*[_evaluate_description(flags, version, col)
+                  for col in cols])
+
+
+def _flagged_for_version(flags, version, descriptions):
+    """Check integer flags (or an array of flags) that all have the same
+    version against descriptions"""
+    mask, ok_mask, derived = _version_mask_table(int(version), descriptions)
+    out = (flags & mask) != 0
     if ok_mask:
-        out |= which_data_is_ok(flag)
+        out |= which_data_is_ok(flags)
+    for k in derived:
+        out |= _evaluate_description(flags, version, k)
     return out
 
 
@@ -279,10 +315,23 @@ def convert_mask_into_dataframe(flag_series):
        Columns may vary depending the version of the quality
        flags in the series.
     """
-    vers = get_version(flag_series)
-    fundamental_masks = flag_series.groupby(vers, sort=False).apply(
+    # a series usually has only a few distinct flags, so build the masks
+    # for each distinct flag and index them back to the full series.
+    # distinct flags are kept in order of appearance so that columns are
+    # ordered as if the whole series was grouped
+    unique_flags, first, inverse = np.unique(
+        flag_series.values, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    position = np.empty_like(order)
+    position[order] = np.arange(len(order))
+    inverse = position[inverse]
+    unique_flags = pd.Series(unique_flags[order])
+    vers = get_version(unique_flags)
+    fundamental_masks = unique_flags.groupby(vers, sort=False).apply(
         _convert_version_mask).fillna(False)
-    out = _add_derived_masks(fundamental_masks)
+    masks = _add_derived_masks(fundamental_masks)
+    out = masks.loc[inverse]
+    out.index = flag_series.index
     return out
 
 
@@ -307,8 +356,18 @@ def convert_flag_frame_to_strings(flag_frame, sep=', ', empty='OK'):
         Of joined column names from `flag_frame` separated by `sep` if True.
         Has the same index as `flag_frame`.
     """
-    return np.logical_and(flag_frame, flag_frame.columns + sep).replace(
-        False, '').sum(axis=1).str.rstrip(sep).replace('', empty)
+    values = flag_frame.values.astype(bool)
+    # join the names once for each distinct row, identifying rows by
+    # their packed bits
+    packed = np.packbits(values, axis=1)
+    row_keys = np.ascontiguousarray(packed).view(
+        np.dtype((np.void, packed.shape[1]))).reshape(-1)
+    _, first, inverse = np.unique(row_keys, return_index=True,
+                                  return_inverse=True)
+    columns = np.asarray(flag_frame.columns, dtype=object)
+    strings = np.array([sep.join(columns[row]) or empty
+                        for row in values[first]], dtype=object)
+    return pd.Series(strings[inverse], index=flag_frame.index)
 
 
 def check_if_series_flagged(flag_series, flag_description):
@@ -323,7 +382,8 @@ def check_if_series_flagged(flag_series, flag_description):
     flag_description : string or iterable of strings
         Checks to compare `flag_series` to. If this is an iterable, the result
         will be a boolean indicating if the flag represents *ANY* of the
-        checks.
+        checks. Keys of DERIVED_MASKS, e.g. 'DAYTIME STALE VALUES', are
+        also accepted.
 
     Returns
     -------
@@ -343,6 +403,17 @@ def check_if_series_flagged(flag_series, flag_description):
     if not has_data_been_validated(flag_series).all():
         raise ValueError('Data has not been validated')
     _flag_description_checks(flag_description)
-    return flag_series.apply(check_if_single_value_flagged,
-                             flag_description=flag_description,
-                             _perform_checks=False)
+    descriptions = _description_tuple(flag_description)
+    flags = flag_series.values
+    versions = get_version(flags)
+    unique_versions = np.unique(versions)
+    if len(unique_versions) == 1:
+        out = _flagged_for_version(flags, unique_versions[0], descriptions)
+    else:
+        out = np.zeros(len(flags), dtype=bool)
+        for version in unique_versions:
+            sel = versions == version
+            out[sel] = _flagged_for_version(flags[sel], version,
+                                            descriptions)
+    return pd.Series(out, index=flag_series.index, name=flag_series.name,
+                     dtype=bool)
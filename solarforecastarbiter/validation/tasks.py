@@ -1,4 +1,6 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import logging
+import time
 
 
 import numpy as np
@@ -13,6 +15,16 @@ from solarforecastarbiter.validation import validator, quality_mapping
 
 logger = logging.getLogger(__name__)
 
+# solar position algorithm for the 1 minute solar position that is only
+# used for interval night flags and interval average solar position.
+# see pvmodel.calculate_solar_position
+RESAMPLE_SOLAR_POSITION_METHOD = 'ephemeris'
+
+# longest time span of the window of validator.detect_clearsky_ghi
+_CLEARSKY_WINDOW = pd.Timedelta('60min')
+# default window of validator.detect_clipping
+_CLIPPING_WINDOW = 4
+
 
 def _validate_timestamp(observation, values):
     return validator.check_timestamp_spacing(
@@ -42,7 +54,7 @@ def _solpos_night(observation, values):
 
 
 def _solpos_night_instantaneous(observation, values):
-    solar_position = pvmodel.calculate_solar_position(
+    solar_position = pvmodel.cached_solar_position(
         observation.site.latitude, observation.site.longitude,
         observation.site.elevation, values.index)
     night_flag = validator.check_day_night(solar_position['zenith'],
@@ -77,9 +89,10 @@ def _solpos_night_resample(observation, values):
     obs_range = _resample_date_range(interval_length, closed, freq, values)
     # could add logic to remove points from obs_range where there are
     # gaps in values. that would reduce computation time in some situations
-    solar_position = pvmodel.calculate_solar_position(
+    solar_position = pvmodel.cached_solar_position(
         observation.site.latitude, observation.site.longitude,
-        observation.site.elevation, obs_range
+        observation.site.elevation, obs_range,
+        method=RESAMPLE_SOLAR_POSITION_METHOD
     )
     # get the night flag as bitmask
     night_flag = validator.check_day_night_interval(
@@ -142,7 +155,7 @@ def validate_ghi(observation, values):
     """
     solar_position, dni_extra, timestamp_flag, night_flag = _solpos_dni_extra(
         observation, values)
-    clearsky = pvmodel.calculate_clearsky(
+    clearsky = pvmodel.cached_clearsky(
         observation.site.latitude, observation.site.longitude,
         observation.site.elevation, solar_position['apparent_zenith'])
 
@@ -240,7 +253,7 @@ def validate_poa_global(observation, values):
     """
     solar_position, dni_extra, timestamp_flag, night_flag = _solpos_dni_extra(
         observation, values)
-    clearsky = pvmodel.calculate_clearsky(
+    clearsky = pvmodel.cached_clearsky(
         observation.site.latitude, observation.site.longitude,
         observation.site.elevation, solar_position['apparent_zenith'])
     aoi_func = pvmodel.aoi_func_factory(observation.site.modeling_parameters)
@@ -695,6 +708,94 @@ def apply_validation(observation, observation_values):
         return apply_immediate_validation(observation, data)
 
 
+def _day_lookback_points(interval_length):
+    """Number of values before each chunk to validate with the chunk so
+    that the windows of the stale, interpolation, clipping and clear sky
+    checks at the start of the chunk are complete"""
+    interval_length = pd.Timedelta(interval_length)
+    windows = [validator.stale_interpolated_window(interval_length),
+               _CLIPPING_WINDOW]
+    # the clear sky check only applies to intervals of 15 minutes or less
+    # with a window of 10 intervals up to an hour
+    if interval_length <= pd.Timedelta('15min'):
+        windows.append(int(np.ceil(
+            min(10 * interval_length, _CLEARSKY_WINDOW) / interval_length)))
+    return max(windows)
+
+
+def stream_daily_validation(observation, chunks, lookback=None):
+    """
+    Apply daily validation to consecutive chunks of observation values,
+    e.g. one day at a time, so that only one chunk must be in memory.
+
+    Each chunk is validated together with the last `lookback` values of
+    the previous chunk so that the windowed checks at the start of a
+    chunk see the values that precede it. Levels for the clipping check
+    are found from the chunk and its look-back values. Chunks with 10 or
+    fewer valid values have immediate validation applied instead.
+
+    Parameters
+    ----------
+    observation : solarforecastarbiter.datamodel.Observation
+    chunks : iterable of pandas.DataFrame
+        Consecutive, non-overlapping observation values with 'value' and
+        'quality_flag' columns
+    lookback : int or None
+        Number of values of the previous chunk to validate with each chunk.
+        If None, the length of the longest window of the stale,
+        interpolation, clipping and clear sky checks for the
+        `interval_length` of the observation.
+
+    Yields
+    ------
+    pandas.DataFrame
+        The validated values of each non-empty chunk
+    """
+    if lookback is None:
+        lookback = _day_lookback_points(observation.interval_length)
+    previous = None
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        chunk = chunk.sort_index()
+        if previous is None:
+            data = chunk.copy()
+        else:
+            data = pd.concat([previous, chunk])
+        if len(data['value'].dropna()) > 10:
+            validated = apply_daily_validation(observation, data)
+        else:
+            validated = apply_immediate_validation(observation, data)
+        previous = chunk.iloc[-lookback:]
+        # a copy so that callers may modify it, e.g. to add columns
+        yield validated.iloc[len(validated) - len(chunk):].copy()
+
+
+def _day_ranges(observation, start, end):
+    """Split start to end at the midnights of the site timezone"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if start.tzinfo is None:
+        start = start.tz_localize('UTC')
+    if end.tzinfo is None:
+        end = end.tz_localize('UTC')
+    tz = observation.site.timezone
+    midnights = pd.date_range(start.tz_convert(tz).normalize(),
+                              end.tz_convert(tz), freq='1D')
+    edges = [start] + [m for m in midnights if start < m < end] + [end]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _fetch_days(session, observation, start, end):
+    ranges = _day_ranges(observation, start, end)
+    for i, (day_start, day_end) in enumerate(ranges):
+        values = session.get_observation_values(
+            observation.observation_id, day_start, day_end)
+        # the end of each day is the start of the next
+        if i < len(ranges) - 1:
+            values = values[values.index < day_end]
+        yield values
+
+
 def _group_continuous_week_post(session, observation, observation_values):
     # observation_values expected to be sorted
     # observation values already have uneven frequency checked
@@ -715,9 +816,15 @@ def _group_continuous_week_post(session, observation, observation_values):
                                         params='donotvalidate')
 
 
-def _validate_post(session, observation, start, end):
+def _validate_post(session, observation, start, end, by_day=False):
     logger.info('Validating data for %s from %s to %s',
                 observation.name, start, end)
+    if by_day and (
+            pd.Timestamp(end) - pd.Timestamp(start) >= pd.Timedelta('1d')):
+        for validated in stream_daily_validation(
+                observation, _fetch_days(session, observation, start, end)):
+            _group_continuous_week_post(session, observation, validated)
+        return
     observation_values = session.get_observation_values(
         observation.observation_id, start, end)
     validated = apply_validation(observation, observation_values)
@@ -766,17 +873,19 @@ def _find_unvalidated_time_ranges(session, observation, min_start, max_end):
     yield first, last
 
 
-def _split_validation(session, observation, start, end, only_missing):
+def _split_validation(session, observation, start, end, only_missing,
+                      by_day=False):
     if not only_missing:
-        return _validate_post(session, observation, start, end)
+        return _validate_post(session, observation, start, end, by_day)
 
     for _start, _end in _find_unvalidated_time_ranges(
             session, observation, start, end):
-        _validate_post(session, observation, _start, _end)
+        _validate_post(session, observation, _start, _end, by_day)
 
 
 def fetch_and_validate_observation(access_token, observation_id, start, end,
-                                   only_missing=False, base_url=None):
+                                   only_missing=False, base_url=None,
+                                   by_day=False):
     """Task that will run immediately after Observation values are
     uploaded to the API to validate the data. If over a day of data is
     present, daily validation will be applied.
@@ -804,14 +913,46 @@ def fetch_and_validate_observation(access_token, observation_id, start, end,
         is validated.
     base_url : str, default None
         URL for the API to fetch and post data
+    by_day : boolean, default False
+        If True, periods of more than a day are fetched, validated, and
+        posted one day (in the site timezone) at a time with
+        :py:func:`stream_daily_validation`. This bounds the memory required
+        to validate long periods, and with `only_missing`, an interrupted
+        validation resumes at the first day that was not posted.
     """
     session = APISession(access_token, base_url=base_url)
     observation = session.get_observation(observation_id)
-    _split_validation(session, observation, start, end, only_missing)
+    _split_validation(session, observation, start, end, only_missing,
+                      by_day)
+
+
+def _validate_observation_in_worker(access_token, observation, start, end,
+                                    only_missing, base_url, by_day):
+    """Validate one observation with a new APISession and return the
+    time taken in seconds"""
+    tstart = time.monotonic()
+    session = APISession(access_token, base_url=base_url)
+    _split_validation(session, observation, start, end, only_missing,
+                      by_day)
+    return time.monotonic() - tstart
+
+
+def _log_validation_timings(observations, timings, elapsed):
+    failed = [obs for obs in observations if timings.get(obs) is None]
+    logger.info('Validated %s observations in %.1f s, %s failed',
+                len(observations) - len(failed), elapsed, len(failed))
+    for obs in sorted(observations, key=lambda o: -(timings.get(o) or 0)):
+        duration = timings.get(obs)
+        if duration is None:
+            logger.info('  %s (%s): failed', obs.name, obs.observation_id)
+        else:
+            logger.info('  %s (%s): %.1f s', obs.name, obs.observation_id,
+                        duration)
 
 
 def fetch_and_validate_all_observations(access_token, start, end,
-                                        only_missing=True, base_url=None):
+                                        only_missing=True, base_url=None,
+                                        by_day=False, max_workers=1):
     """
     Run the observation validation for all observations that the user
     has access to in their organization. See further discussion in
@@ -831,11 +972,55 @@ def fetch_and_validate_all_observations(access_token, start, end,
         is validated.
     base_url : str, default None
         URL for the API to fetch and post data
+    by_day : boolean, default False
+        If True, validate and post periods of more than a day one day at
+        a time. See
+        :py:func:`fetch_and_validate_observation`
+    max_workers : int, default 1
+        Number of processes used to validate observations concurrently,
+        each with its own API session. If 1, observations are validated
+        one after another. In both cases, errors are logged without
+        stopping the validation of the other observations.
 
+    Returns
+    -------
+    dict
+        Seconds taken to validate each observation, keyed by the
+        Observation. None for observations that failed validation.
     """
     session = APISession(access_token, base_url=base_url)
     user_info = session.get_user_info()
     observations = [obs for obs in session.list_observations()
                     if obs.provider == user_info['organization']]
-    for observation in observations:
-        _split_validation(session, observation, start, end, only_missing)
+    timings = {}
+    all_start = time.monotonic()
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            running = {
+                pool.submit(_validate_observation_in_worker, access_token,
+                            observation, start, end, only_missing, base_url,
+                            by_day): observation
+                for observation in observations}
+            for fut in as_completed(running):
+                observation = running[fut]
+                try:
+                    timings[observation] = fut.result()
+                except Exception:
+                    logger.exception('Failed to validate %s',
+                                     observation.observation_id)
+                    timings[observation] = None
+    else:
+        for observation in observations:
+            tstart = time.monotonic()
+            try:
+                _split_validation(session, observation, start, end,
+                                  only_missing, by_day)
+            except Exception:
+                logger.exception('Failed to validate %s',
+                                 observation.observation_id)
+                timings[observation] = None
+            else:
+                timings[observation] = time.monotonic() - tstart
+    _log_validation_timings(observations, timings,
+                            time.monotonic() - all_start)
+    return timings
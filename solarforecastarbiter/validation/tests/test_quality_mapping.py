@@ -2,7 +2,8 @@ from itertools import product
 
 
 import pandas as pd
-from pandas.testing import assert_series_equal, assert_frame_equal
+from pandas.testing import (
+    assert_series_equal, assert_frame_equal, assert_index_equal)
 import pytest
 
 
@@ -291,6 +292,33 @@ def test_convert_flag_frame_to_strings():
     assert_series_equal(expected, out)
 
 
+def test_convert_mask_into_dataframe_repeated_flags():
+    flags = pd.Series([1, 2, 2 | 1 << 10, 0, 2, 2 | 1 << 10, 1],
+                      index=pd.date_range('2020-01-01', freq='1h',
+                                          periods=7))
+    out = quality_mapping.convert_mask_into_dataframe(flags)
+    assert_index_equal(out.index, flags.index)
+    assert list(out.columns) == (
+        ['NOT VALIDATED'] + DESCRIPTIONS + DERIVED_DESCRIPTIONS)
+    assert_series_equal(out['NOT VALIDATED'], pd.Series(
+        [True, False, False, True, False, False, True], index=flags.index,
+        name='NOT VALIDATED'))
+    assert_series_equal(out['DAYTIME STALE VALUES'], pd.Series(
+        [False, False, True, False, False, True, False], index=flags.index,
+        name='DAYTIME STALE VALUES'))
+
+
+def test_convert_flag_frame_to_strings_repeated_rows():
+    frame = pd.DataFrame({'FIRST': [True, False, True, False, True],
+                          'SECOND': [False, False, True, False, True]},
+                         index=pd.date_range('2020-01-01', freq='1h',
+                                             periods=5))
+    expected = pd.Series(['FIRST', 'OK', 'FIRST | SECOND', 'OK',
+                          'FIRST | SECOND'], index=frame.index)
+    out = quality_mapping.convert_flag_frame_to_strings(frame, sep=' | ')
+    assert_series_equal(out, expected)
+
+
 @pytest.mark.parametrize('expected,desc', [
     (pd.Series([1, 0, 0, 0], dtype=bool), 'OK'),
     (pd.Series([0, 1, 0, 1], dtype=bool), 'USER FLAGGED'),
@@ -305,6 +333,28 @@ def test_check_if_series_flagged(expected, desc):
     assert_series_equal(out, expected)
 
 
+@pytest.mark.parametrize('desc', [
+    'OK', 'NIGHTTIME', ['OK', 'CLEARSKY'], ['STALE VALUES', 'SHADED'],
+    'DAYTIME', 'DAYTIME STALE VALUES', ['OK', 'DAYTIME INTERPOLATED VALUES'],
+])
+def test_check_if_series_flagged_matches_frame(desc):
+    flags = pd.Series(
+        [2, 3, 2 | 1 << 4, 2 | 1 << 10, 2 | 1 << 4 | 1 << 10,
+         2 | 1 << 5 | 1 << 11, 2 | 1 << 6, 2 | 1 << 4 | 1 << 11],
+        index=pd.date_range('2020-01-01', freq='1h', periods=8),
+        name='quality_flag')
+    frame = quality_mapping.convert_mask_into_dataframe(flags)
+    frame['OK'] = quality_mapping.which_data_is_ok(flags)
+    expected = frame[list(quality_mapping._description_tuple(desc))].any(
+        axis=1)
+    expected.name = 'quality_flag'
+    out = quality_mapping.check_if_series_flagged(flags, desc)
+    assert_series_equal(out, expected)
+    single = flags.apply(quality_mapping.check_if_single_value_flagged,
+                         flag_description=desc)
+    assert_series_equal(out, single)
+
+
 def test_check_if_series_flagged_validated_fail():
     with pytest.raises(ValueError):
         quality_mapping.check_if_series_flagged(pd.Series([0, 1, 0]), 'OK')
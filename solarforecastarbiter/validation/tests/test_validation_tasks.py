@@ -1,4 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
 import datetime as dt
+import warnings
 import numpy as np
 import pandas as pd
 from pandas.testing import assert_series_equal, assert_frame_equal
@@ -1249,6 +1251,97 @@ def test_apply_daily_validation_not_enough(mocker, make_observation):
         tasks.apply_daily_validation(obs, data)
 
 
+@pytest.fixture()
+def multiday_data(single_site):
+    index = pd.date_range(start='2019-01-01T00:00', end='2019-01-03T23:00',
+                          freq='1h', tz=single_site.timezone)
+    value = np.arange(len(index), dtype=float) % 7
+    # stale and interpolated values across midnight
+    value[22:27] = 3.
+    value[46:52] = np.arange(6) + 10.
+    return pd.DataFrame({'value': value, 'quality_flag': 0}, index=index)
+
+
+def test_stream_daily_validation(make_observation, multiday_data):
+    obs = make_observation('air_temperature')
+    chunks = [day for _, day in multiday_data.groupby(
+        multiday_data.index.date)]
+    expected = tasks.apply_daily_validation(obs, multiday_data.copy())
+    out = list(tasks.stream_daily_validation(obs, chunks))
+    assert len(out) == 3
+    for validated, chunk in zip(out, chunks):
+        assert_frame_equal(validated, expected.loc[chunk.index])
+
+
+def test_stream_daily_validation_copies(make_observation, multiday_data):
+    obs = make_observation('air_temperature')
+    chunks = [day for _, day in multiday_data.groupby(
+        multiday_data.index.date)]
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', pd.errors.SettingWithCopyWarning)
+        for validated in tasks.stream_daily_validation(obs, chunks):
+            validated['gid'] = 1
+
+
+@pytest.mark.parametrize('interval_length,expected', [
+    ('1min', 10),
+    ('5min', 10),
+    ('15min', 6),
+    ('1h', 4),
+    ('1d', 4),
+])
+def test__day_lookback_points(interval_length, expected):
+    assert tasks._day_lookback_points(
+        pd.Timedelta(interval_length)) == expected
+
+
+def test_stream_daily_validation_short_chunk(make_observation,
+                                             multiday_data):
+    obs = make_observation('air_temperature')
+    chunks = [multiday_data.iloc[:5], multiday_data.iloc[:0],
+              multiday_data.iloc[5:30]]
+    out = list(tasks.stream_daily_validation(obs, chunks, lookback=3))
+    assert len(out) == 2
+    # too short for daily validation
+    assert not (out[0]['quality_flag'] & DAILY_VALIDATION_FLAG).any()
+    assert (out[1]['quality_flag'] & DAILY_VALIDATION_FLAG).all()
+    assert_frame_equal(
+        out[1], tasks.apply_daily_validation(
+            obs, multiday_data.iloc[2:30]).iloc[3:])
+
+
+def test_fetch_and_validate_observation_by_day(mocker, make_observation,
+                                               multiday_data):
+    obs = make_observation('air_temperature')
+    mocker.patch('solarforecastarbiter.io.api.APISession.get_observation',
+                 return_value=obs)
+    get_mock = mocker.patch(
+        'solarforecastarbiter.io.api.APISession.get_observation_values',
+        side_effect=lambda obsid, start, end: multiday_data.loc[start:end])
+    post_mock = mocker.patch(
+        'solarforecastarbiter.io.api.APISession.post_observation_values')
+    tasks.fetch_and_validate_observation(
+        '', obs.observation_id, multiday_data.index[0],
+        multiday_data.index[-1], by_day=True)
+    assert get_mock.call_count == 3
+    expected = tasks.apply_daily_validation(obs, multiday_data.copy())
+    posted_df = pd.concat([cal[0][1] for cal in post_mock.call_args_list])
+    assert_frame_equal(posted_df, expected, check_freq=False)
+
+
+def test__day_ranges(make_observation):
+    obs = make_observation('ghi')
+    out = tasks._day_ranges(obs, '2019-01-01T12:00Z', '2019-01-03T12:00Z')
+    tz = obs.site.timezone
+    assert out == [
+        (pd.Timestamp('2019-01-01T12:00Z'),
+         pd.Timestamp('2019-01-02T00:00', tz=tz)),
+        (pd.Timestamp('2019-01-02T00:00', tz=tz),
+         pd.Timestamp('2019-01-03T00:00', tz=tz)),
+        (pd.Timestamp('2019-01-03T00:00', tz=tz),
+         pd.Timestamp('2019-01-03T12:00Z'))]
+
+
 def test_fetch_and_validate_all_observations(mocker, make_observation,
                                              daily_index):
     obs = [make_observation('dhi'), make_observation('dni')]
@@ -1279,6 +1372,74 @@ def test_fetch_and_validate_all_observations(mocker, make_observation,
     assert validate_mock.call_count == 2
 
 
+@pytest.fixture()
+def thread_pool_for_validation(mocker):
+    # threads share the mocked APISession methods unlike processes
+    mocker.patch.object(tasks, 'ProcessPoolExecutor', new=ThreadPoolExecutor)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_fetch_and_validate_all_observations_isolated(
+        mocker, make_observation, daily_index, thread_pool_for_validation,
+        max_workers):
+    obs = [make_observation('dhi'), make_observation('dni'),
+           make_observation('ghi')]
+    obs[1] = obs[1].replace(observation_id='BADOBS')
+    data = pd.DataFrame(
+        [(0, 0), (100, 0), (-100, 0), (100, 0), (300, 0),
+         (300, 0), (300, 0), (300, 0), (100, 0), (0, 0),
+         (100, 1), (0, 0), (0, 0)],
+        index=daily_index,
+        columns=['value', 'quality_flag'])
+    mocker.patch('solarforecastarbiter.io.api.APISession.list_observations',
+                 return_value=obs)
+    mocker.patch('solarforecastarbiter.io.api.APISession.get_user_info',
+                 return_value={'organization': obs[0].provider})
+
+    def get_values(obsid, start, end):
+        if obsid == 'BADOBS':
+            raise ValueError('bad')
+        return data.copy()
+
+    mocker.patch(
+        'solarforecastarbiter.io.api.APISession.get_observation_values',
+        side_effect=get_values)
+    post_mock = mocker.patch(
+        'solarforecastarbiter.io.api.APISession.post_observation_values')
+    logger = mocker.patch('solarforecastarbiter.validation.tasks.logger')
+    timings = tasks.fetch_and_validate_all_observations(
+        '', data.index[0], data.index[-1], only_missing=False,
+        max_workers=max_workers)
+    assert logger.exception.call_count == 1
+    # the other observations are still validated and posted
+    assert {cal[0][0] for cal in post_mock.call_args_list} == {'OBSID'}
+    assert post_mock.call_count == 4
+    assert set(timings) == set(obs)
+    assert timings[obs[1]] is None
+    assert timings[obs[0]] >= 0
+    assert timings[obs[2]] >= 0
+
+
+def test_fetch_and_validate_all_observations_timings(
+        mocker, make_observation):
+    obs = [make_observation('dhi'), make_observation('dni')]
+    mocker.patch('solarforecastarbiter.io.api.APISession.list_observations',
+                 return_value=obs)
+    mocker.patch('solarforecastarbiter.io.api.APISession.get_user_info',
+                 return_value={'organization': obs[0].provider})
+    split = mocker.patch(
+        'solarforecastarbiter.validation.tasks._split_validation')
+    logger = mocker.patch('solarforecastarbiter.validation.tasks.logger')
+    timings = tasks.fetch_and_validate_all_observations(
+        '', pd.Timestamp('2019-01-01T00:00Z'),
+        pd.Timestamp('2019-01-02T00:00Z'))
+    assert split.call_count == 2
+    assert list(timings) == obs
+    assert all(t >= 0 for t in timings.values())
+    # summary and one line for each observation
+    assert logger.info.call_count == 3
+
+
 def test_fetch_and_validate_all_observations_only_missing(
         mocker, make_observation, daily_index):
     obs = [make_observation('dhi'), make_observation('dni')]
@@ -1534,3 +1695,26 @@ def test_find_unvalidated_time_ranges_empty(mocker):
     out = list(tasks._find_unvalidated_time_ranges(
         session, obs, '2019-01-01T00:00Z', '2020-01-01T00:00Z'))
     assert out == []
+
+
+@pytest.mark.parametrize('interval_label', ['beginning', 'ending'])
+def test_solpos_night_resample_method(single_site, interval_label,
+                                      monkeypatch):
+    obs = Observation(
+        name='test', variable='ghi', interval_value_type='interval_mean',
+        interval_length=pd.Timedelta('15min'), interval_label=interval_label,
+        site=single_site, uncertainty=0.1, observation_id='OBSID',
+        provider='Organization 1', extra_parameters='')
+    values = pd.Series(
+        1., index=pd.date_range('20190601', '20190701', freq='15min',
+                                tz=single_site.timezone))
+    monkeypatch.setattr(tasks, 'RESAMPLE_SOLAR_POSITION_METHOD',
+                        'nrel_numpy')
+    expected_solpos, expected_night = tasks._solpos_night_resample(
+        obs, values)
+    monkeypatch.setattr(tasks, 'RESAMPLE_SOLAR_POSITION_METHOD',
+                        'ephemeris')
+    solpos, night = tasks._solpos_night_resample(obs, values)
+    assert_series_equal(night, expected_night)
+    assert_series_equal(solpos['zenith'], expected_solpos['zenith'],
+                        atol=0.01)
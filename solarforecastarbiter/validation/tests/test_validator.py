@@ -391,6 +391,33 @@ def test_detect_interpolation():
         validator.detect_interpolation(x, window=2)
 
 
+@pytest.mark.parametrize('window', [2, 3, 6])
+@pytest.mark.parametrize('kwargs', [{}, {'rtol': 1e-2}, {'atol': 0.15}])
+def test_detect_stale_values_rolling_allclose(window, kwargs):
+    # same flags as np.allclose applied to each rolling window
+    rng = np.random.default_rng(0)
+    data = rng.choice([0., 1., 1.000001, 2., np.nan, np.inf, 5e-9], 500)
+    data = np.where(rng.random(500) < 0.3, rng.normal(size=500).round(1),
+                    data)
+    x = pd.Series(data, index=pd.date_range('20200101', freq='1min',
+                                            periods=500), name='ghi')
+
+    def rolling_allclose(x, window):
+        return x.rolling(window=window).apply(
+            lambda v: np.allclose(v, v[0], **kwargs), raw=True
+        ).fillna(False).astype(bool)
+
+    assert_series_equal(
+        validator.detect_stale_values(x, window=window, **kwargs),
+        rolling_allclose(x, window))
+    if window > 2:
+        assert_series_equal(
+            validator.detect_interpolation(x, window=window, **kwargs),
+            rolling_allclose(x.diff(), window - 1))
+    assert not validator.detect_stale_values(x[:window - 1],
+                                             window=window).any()
+
+
 @pytest.fixture
 def ghi_clearsky():
     MST = pytz.timezone('Etc/GMT+7')
@@ -657,12 +657,16 @@ def check_timestamp_spacing(times, freq):
     return flags
 
 
-def _all_close_to_first(x, rtol=1e-5, atol=1e-8):
-    """ Returns True if all values in x are close to x[0].
+def _all_close_to_first(x, window, rtol=1e-5, atol=1e-8):
+    """ Returns True for each value of x where all values in the window of
+    length window ending at the value are close to the first value in the
+    window. Equivalent to, but much faster than, applying numpy.allclose
+    to each rolling window of x.
 
     Parameters
     ----------
-    x : array
+    x : Series
+    window : int
     rtol : float, default 1e-5
         relative tolerance for detecting a change in data values
     atol : float, default 1e-8
@@ -670,9 +674,23 @@ def _all_close_to_first(x, rtol=1e-5, atol=1e-8):
 
     Returns
     -------
-    Boolean
+    Series
+        False for windows that are incomplete or contain NaN or inf
     """
-    return np.allclose(a=x, b=x[0], rtol=rtol, atol=atol)
+    values = np.asarray(x, dtype=float)
+    # like pandas rolling, windows with inf are incomplete
+    values = np.where(np.isinf(values), np.nan, values)
+    nwindows = len(values) - window + 1
+    flags = np.zeros(len(values), dtype=bool)
+    if nwindows > 0:
+        first = values[:nwindows]
+        close = np.ones(nwindows, dtype=bool)
+        # compare the k-th value of every window to the first at once
+        for k in range(window):
+            close &= np.isclose(values[k:k + nwindows], first, rtol=rtol,
+                                atol=atol)
+        flags[window - 1:] = close
+    return pd.Series(flags, index=x.index, name=x.name)
 
 
 @mask_flags('STALE VALUES', invert=False)
@@ -707,9 +725,7 @@ def detect_stale_values(x, window=6, rtol=1e-5, atol=1e-8):
     if window < 2:
         raise ValueError(f'window set to {window}, must be at least 2')
 
-    flags = x.rolling(window=window).apply(
-        _all_close_to_first, raw=True, kwargs={'rtol': rtol, 'atol': atol}
-        ).fillna(False).astype(bool)
+    flags = _all_close_to_first(x, window, rtol=rtol, atol=atol)
     return flags
 
 
@@ -755,7 +771,7 @@ def detect_interpolation(x, window=6, rtol=1e-5, atol=1e-8):
         raise ValueError(f'window set to {window}, must be at least 3')
 
     # reduce window by 1 because we're passing the first difference
-    flags = detect_stale_values(x.diff(periods=1), window=window-1, rtol=rtol,
+    flags = _all_close_to_first(x.diff(periods=1), window - 1, rtol=rtol,
                                 atol=atol)
     return flags
 